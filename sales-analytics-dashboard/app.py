@@ -1,22 +1,49 @@
 """
 Application Dash principale pour le dashboard analytique
 """
+import hashlib
+import importlib
+import io
+
 import dash
-from dash import dcc, html, Input, Output, State, callback
+from dash import dcc, html, Input, Output, State, ClientsideFunction
+from flask import Response, request
 import dash_bootstrap_components as dbc
-import pandas as pd
-from datetime import datetime, timedelta
-import plotly.graph_objects as go
  
 from src.components.layout.header import create_header
 from src.components.layout.main_view import create_main_content
-from src.components.layout.header import create_header
 from src.components.layout.footer import create_footer_bar
 
+from config.database import DATABASE_CONFIG, DATABASE_LABELS, DEFAULT_DATABASE
+from config.settings import APP_CONFIG, PERFORMANCE_CONFIG
+from src.database.scheduler import QueryRejected, query_context
+from src.utils.memory import tracked_memory
+from src.utils.metrics import CONTENT_TYPE, SIZE_BUCKETS, get_metrics, timed_callback
+from src.utils.profiling import install_profiling, stage
+
+# Modules lourds (pandas, SQLAlchemy, plotly) importés à la première
+# utilisation par les callbacks, pour un démarrage rapide ; le serveur de
+# production les précharge avant le fork (preload_modules)
+DEFERRED_MODULES = (
+    'pandas',
+    'src.database.connection',
+    'src.database.cost_guard',
+    'src.database.sampling',
+    'src.database.views',
+    'src.database.warmup',
+    'src.database.invalidation',
+    'src.visualizations.charts.figure_updates',
+    'src.visualizations.render_cache',
+)
+
+
+def preload_modules():
+    """Importe immédiatement les modules différés"""
+    for name in DEFERRED_MODULES:
+        importlib.import_module(name)
+
 
 # Imports des modules personnalisés (à adapter selon votre structure)
-# from src.database.connection import get_db_connection
-# from src.database.query_builder import QueryBuilder
 # from src.visualizations.charts.stacked_bar import StackedBarChart
 # from src.visualizations.tables.hierarchical_table import HierarchicalTable
 
@@ -49,169 +76,596 @@ CATEGORIES = [
     {'label': 'Alimentation', 'value': 'alimentation'}
 ]
 
+def start_background_tasks():
+    """
+    Démarre les tâches de fond du processus serveur (invalidation du cache,
+    préchauffage, stockage colonnaire, libération des pools inactifs)
+
+    Les threads ne survivant pas au fork, le serveur de production l'appelle
+    dans chaque worker (wsgi.init_worker).
+    """
+    if not DATABASE_CONFIG['database']:
+        return
+    from src.database.columnar_store import get_columnar_store
+    from src.database.connection import get_engine_registry
+    from src.database.dimensions import get_dimension_cache
+    from src.database.invalidation import install_cache_invalidation
+    from src.database.warmup import get_cache_warmer
+
+    # Préchauffage du cache au démarrage puis après chaque chargement de données
+    cache_warmer = get_cache_warmer()
+    cache_invalidator = install_cache_invalidation()
+    cache_warmer.attach(cache_invalidator.notifier)
+    get_dimension_cache().attach(cache_invalidator.notifier)
+    columnar_store = get_columnar_store()
+    if columnar_store is not None:
+        columnar_store.attach(cache_invalidator.notifier)
+    cache_warmer.start()
+    # Libère les connexions des bases inutilisées
+    get_engine_registry().start_eviction()
+
 # ============================================
 # LAYOUT DE L'APPLICATION
 # ============================================
 
 
 
+def serve_layout():
+    """
+    Layout principal, construit à chaque chargement de page
+
+    Les catégories et régions proviennent du cache de dimensions en mémoire
+    lorsqu'une base de données est configurée.
+    """
+    categories, regions = CATEGORIES, None
+    if DATABASE_CONFIG['database']:
+        from src.database.dimensions import get_dimension_cache
+
+        dimensions = get_dimension_cache()
+        categories = dimensions.options('categorie', all_label='Toutes')
+        regions = dimensions.options('region', all_label='Toutes les régions')
+
+    return html.Div([
+        create_header(),
+
+        dbc.Container([
+            # Avertissement du garde-fou de coût (vue simplifiée ou à confirmer)
+            dbc.Alert([
+                html.Span(id='cost-guard-message'),
+                dbc.Button(
+                    "Exécuter quand même",
+                    id='cost-guard-confirm',
+                    color="warning",
+                    size="sm",
+                    className="ms-3"
+                )
+            ], id='cost-guard-alert', color="warning", is_open=False, className="mt-2"),
+            create_main_content(INDICATORS, categories, GRANULARITIES, regions)
+        ], fluid=True),
+        create_footer_bar(),
+
+        # Store pour les données (résultat exact et sélection correspondante)
+        dcc.Store(id='data-store'),
+        dcc.Store(id='data-key'),
+        # Aperçu approximatif affiché en attendant le résultat exact
+        dcc.Store(id='preview-store')
+    ], className="dashboard-container")
+
+
 # Layout principal
-app.layout = html.Div([
-    create_header(),
-    
-    dbc.Container([
-        create_main_content(INDICATORS, CATEGORIES, GRANULARITIES) 
-    ], fluid=True),
-    create_footer_bar(),
-    
-    # Store pour les données
-    dcc.Store(id='data-store')
-], className="dashboard-container")
+app.layout = serve_layout
 
 # ============================================
 # CALLBACKS
 # ============================================
 
+# Filtres qui définissent la vue affichée
+VIEW_INPUTS = [
+    Input('main-indicator-dropdown', 'value'),
+    Input('category-dropdown', 'value'),
+    Input('granularity-dropdown', 'value'),
+    Input('region-dropdown', 'value'),
+    Input('date-picker', 'start_date'),
+    Input('date-picker', 'end_date'),
+    Input('select-database', 'value')
+]
+
+
+def make_selection(indicator, category, granularity, region, start_date, end_date, database):
+    """Sélection correspondant aux valeurs des filtres"""
+    from src.database.views import ViewSelection
+
+    return ViewSelection(
+        indicator, category, granularity, region, start_date, end_date,
+        database=DATABASE_LABELS.get(database, DEFAULT_DATABASE)
+    )
+
+
+def data_token(json_data):
+    """Empreinte des données d'un store (None si vide)"""
+    if json_data is None:
+        return None
+    return hashlib.md5(json_data.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def store_frame(json_data):
+    """
+    Lecture différée du data-store : faite au premier appel, et jamais si
+    les composants viennent du cache des composants rendus
+    """
+    parsed = []
+
+    def frame():
+        if not parsed:
+            import pandas as pd
+            with stage('transform'):
+                parsed.append(pd.read_json(io.StringIO(json_data), orient='split'))
+        return parsed[0]
+    return frame
+
+
+def figure_entry(token, frame, approximate, barmode, options):
+    """
+    Graphique complet (forme JSON décodée, partagée : à ne pas modifier) et
+    taille de sa sérialisation, construit seulement s'il est absent du cache
+    des composants rendus
+
+    Args:
+        token: Empreinte des données (data_token ou render_cache.data_hash)
+        frame: Fonction retournant le DataFrame des données
+    """
+    from src.visualizations.charts.figure_updates import build_figure
+    from src.visualizations.render_cache import render_entry
+
+    options = sorted(options or [])
+
+    def build():
+        data = frame()
+        with stage('render'):
+            return build_figure(data, approximate, barmode, options)
+    return render_entry(
+        'main_chart', token, build, approximate=approximate, barmode=barmode, options=options
+    )
+
+
+def with_x_range(fig, x_range):
+    """Copie du graphique avec la plage d'abscisses affichée (sans modifier le cache)"""
+    layout = dict(fig['layout'])
+    layout['xaxis'] = {**layout.get('xaxis', {}), 'range': x_range}
+    return {**fig, 'layout': layout}
+
+
+def figure_shape(token, frame):
+    """Structure du graphique (chart_shape), depuis le cache si possible"""
+    from src.visualizations.charts.figure_updates import chart_shape
+    from src.visualizations.render_cache import cached_render
+
+    return cached_render('chart_shape', token, lambda: chart_shape(frame()))
+
+
 @app.callback(
-    Output('data-store', 'data'),
     [
-        Input('main-indicator-dropdown', 'value'),
-        Input('category-dropdown', 'value'),
-        Input('granularity-dropdown', 'value'),
-        Input('region-dropdown', 'value'),
-        Input('date-picker', 'start_date'),
-        Input('date-picker', 'end_date')
-    ]
+        Output('data-store', 'data'),
+        Output('data-key', 'data'),
+        Output('cost-guard-alert', 'is_open'),
+        Output('cost-guard-message', 'children'),
+        Output('cost-guard-confirm', 'style')
+    ],
+    VIEW_INPUTS + [Input('time-dimension', 'value'), Input('cost-guard-confirm', 'n_clicks')]
 )
-def update_data_store(indicator, category, granularity, region, start_date, end_date):
+@timed_callback
+@tracked_memory
+def update_data_store(indicator, category, granularity, region, start_date, end_date,
+                      database, time_step, confirm_clicks):
     """
     Récupère les données de la base de données selon les filtres
+
+    Au-delà du budget de largeur du graphique, les périodes sont regroupées
+    (semaine, mois...) dès la requête ; le zoom recharge le détail.
     """
-    # Ici, vous appelleriez votre QueryBuilder et DatabaseConnection
-    # query_builder = QueryBuilder()
-    # db = get_db_connection()
-    
-    # filters = {
-    #     'region': [region] if region != 'all' else None,
-    #     'categorie': [category] if category != 'all' else None,
-    #     'date_debut': start_date,
-    #     'date_fin': end_date
-    # }
-    
-    # query, params = query_builder.build_query(indicator, filters, granularity)
-    # data = db.execute_query(query, params)
-    
-    # Pour l'exemple, générer des données fictives
-    dates = pd.date_range(start=start_date, end=end_date, freq='MS')
+    import pandas as pd
+    from src.visualizations.charts.downsampling import display_time_dimension, regroup_message
+
+    hidden = {'display': 'none'}
+    time_dimension = display_time_dimension(start_date, end_date, time_step)
+    alert = (False, None, hidden)
+    if time_dimension != time_step:
+        alert = (True, regroup_message(time_step, time_dimension, start_date, end_date), hidden)
+
+    if DATABASE_CONFIG['database']:
+        from src.database.connection import streaming_reads
+        from src.database.cost_guard import get_cost_guard
+        from src.database.views import get_query_log, load_view, to_store_frame, view_key
+        from src.database.warmup import get_cache_warmer
+
+        selection = make_selection(
+            indicator, category, granularity, region, start_date, end_date, database
+        )
+        requested = selection
+        try:
+            # Équité entre utilisateurs : une file de requêtes par client
+            with query_context('interactive', user=request.remote_addr):
+                # Estimation du coût (budget mémoire seul si l'utilisateur a confirmé)
+                decision = get_cost_guard().check(
+                    selection, time_dimension,
+                    confirmed=dash.ctx.triggered_id == 'cost-guard-confirm'
+                )
+                if decision.action == 'confirm':
+                    return dash.no_update, dash.no_update, True, decision.message, {}
+                if decision.action == 'downgrade':
+                    alert = (True, decision.message, hidden)
+                selection, time_dimension = decision.selection, decision.time_dimension
+                with stage('fetch'), streaming_reads(decision.streaming):
+                    data = load_view(selection, time_dimension=time_dimension)
+        except QueryRejected as e:
+            print(f"Requête refusée: {e}")
+            return (dash.no_update,) * 5
+        get_query_log().record(requested)
+        # Pendant l'inactivité, précharger la granularité suivante, au mois
+        # (sauf si la vue a été simplifiée ou réduite : la suivante dépasserait le budget)
+        if (selection == requested and time_dimension == 'mois'
+                and not (decision.top_n or decision.streaming)):
+            get_cache_warmer().schedule_prefetch(selection, user=request.remote_addr)
+
+        with stage('transform'):
+            df = to_store_frame(
+                data, selection.granularity, time_dimension, decision.top_n, selection.indicator
+            )
+        with stage('serialize'):
+            json_data = df.to_json(date_format='iso', orient='split')
+        return (json_data, view_key(requested, time_step)) + alert
+
+    # Sans base de données configurée, générer des données fictives
+    import numpy as np
+    from src.database.views import PERIOD_FORMATS
+
+    frequency = {'jour': 'D', 'semaine': 'W-MON', 'mois': 'MS', 'annee': 'YS'}[time_dimension]
+    dates = pd.date_range(start=start_date, end=end_date, freq=frequency)
     categories_list = ['Catégorie A', 'Catégorie B', 'Catégorie C']
+
+    df = pd.DataFrame({
+        'periode': np.repeat(dates.strftime(PERIOD_FORMATS[time_dimension]), len(categories_list)),
+        'categorie': np.tile(categories_list, len(dates)),
+        'valeur': np.random.default_rng().integers(10000, 50000, len(dates) * len(categories_list))
+    })
     
-    data_list = []
-    for date in dates:
-        for cat in categories_list:
-            data_list.append({
-                'periode': date.strftime('%Y-%m'),
-                'categorie': cat,
-                'valeur': pd.np.random.randint(10000, 50000)
-            })
-    
-    df = pd.DataFrame(data_list)
-    
-    return df.to_json(date_format='iso', orient='split')
+    return (df.to_json(date_format='iso', orient='split'), None) + alert
+
+
+@app.callback(
+    Output('preview-store', 'data'),
+    VIEW_INPUTS + [Input('time-dimension', 'value')]
+)
+@timed_callback
+@tracked_memory
+def update_preview(indicator, category, granularity, region, start_date, end_date, database,
+                   time_step):
+    """
+    Calcule un aperçu sur échantillon, affiché pendant le calcul exact
+    (requêtes absentes du cache uniquement)
+    """
+    if not (DATABASE_CONFIG['database'] and PERFORMANCE_CONFIG['progressive_results']):
+        return dash.no_update
+    from src.database.connection import streaming_reads
+    from src.database.cost_guard import get_cost_guard
+    from src.database.sampling import load_preview
+    from src.database.views import to_store_frame, view_key
+    from src.visualizations.charts.downsampling import display_time_dimension
+
+    selection = make_selection(
+        indicator, category, granularity, region, start_date, end_date, database
+    )
+    try:
+        with query_context('interactive', user=request.remote_addr):
+            decision = get_cost_guard().check(
+                selection, display_time_dimension(start_date, end_date, time_step)
+            )
+            if decision.action == 'confirm':
+                return dash.no_update
+            with stage('fetch'), streaming_reads(decision.streaming):
+                preview = load_preview(decision.selection, decision.time_dimension)
+    except Exception as e:
+        print(f"Aperçu indisponible: {e}")
+        return dash.no_update
+
+    if preview is None:
+        return dash.no_update
+    with stage('transform'):
+        df = to_store_frame(
+            preview, decision.selection.granularity, decision.time_dimension,
+            decision.top_n, decision.selection.indicator
+        )
+    with stage('serialize'):
+        json_data = df.to_json(date_format='iso', orient='split')
+    return {'key': view_key(selection, time_step), 'data': json_data}
+
 
 @app.callback(
-    Output('chart-container', 'children'),
+    [
+        Output('main-chart', 'figure'),
+        Output('chart-shape', 'data'),
+        Output('chart-rendered', 'data')
+    ],
     [
         Input('data-store', 'data'),
-        Input('main-indicator-dropdown', 'value')
+        Input('preview-store', 'data'),
+        Input('tabs', 'active_tab')
+    ],
+    [
+        State('chart-rendered', 'data'),
+        State('chart-shape', 'data'),
+        State('chart-barmode', 'value'),
+        State('chart-display', 'value'),
+        State('data-key', 'data'),
+        State('time-dimension', 'value')
+    ] + [
+        State(view_input.component_id, view_input.component_property)
+        for view_input in VIEW_INPUTS
     ]
 )
-def update_chart(json_data, indicator):
+@timed_callback
+@tracked_memory
+def update_chart(json_data, preview, active_tab, rendered, shape, barmode, options,
+                 data_key, time_step, *filters):
     """
     Met à jour le graphique selon les données
+
+    Le graphique n'est calculé que si son onglet est affiché ; sinon il l'est
+    à l'ouverture de l'onglet, depuis le data-store.
+
+    Si les traces sont inchangées (mêmes catégories et périodes), seules les
+    valeurs sont envoyées (Patch) ; sinon le graphique est reconstruit.
+
+    Un aperçu n'est affiché que s'il correspond à la sélection courante et
+    que le résultat exact n'est pas encore arrivé.
     """
+    unchanged = (dash.no_update,) * 3
+    if active_tab != 'tab-chart':
+        return unchanged
+    from src.database.views import view_key
+    from src.visualizations.charts.figure_updates import (
+        empty_figure,
+        get_payload_stats,
+        patch_figure,
+        payload_size,
+    )
+
+    approximate = dash.ctx.triggered_id == 'preview-store'
+    if approximate:
+        current_key = view_key(make_selection(*filters), time_step)
+        if not preview or preview['key'] != current_key or data_key == current_key:
+            return unchanged
+        json_data = preview['data']
+
+    token = data_token(json_data)
+    if token == rendered and json_data is not None:
+        return unchanged
+
     if json_data is None:
-        return html.Div("Aucune donnée disponible")
-    
-    df = pd.read_json(json_data, orient='split')
-    
-    # Créer le graphique à bandes empilées
-    fig = go.Figure()
-    
-    for category in df['categorie'].unique():
-        cat_data = df[df['categorie'] == category]
-        fig.add_trace(go.Bar(
-            name=category,
-            x=cat_data['periode'],
-            y=cat_data['valeur'],
-            text=cat_data['valeur'].apply(lambda x: f"{x:,.0f}"),
-            textposition='inside'
-        ))
-    
-    fig.update_layout(
-        title="Évolution de l'indicateur par période",
-        barmode='stack',
-        xaxis_title="Période",
-        yaxis_title="Valeur",
-        hovermode='x unified',
-        height=500,
-        plot_bgcolor='white',
-        paper_bgcolor='white'
+        return empty_figure("Aucune donnée disponible"), None, None
+
+    # Données déjà affichées avec les mêmes options : ni lecture ni construction
+    frame = store_frame(json_data)
+    new_shape = figure_shape(token, frame)
+    measure = PERFORMANCE_CONFIG['figure_payload_stats']
+
+    if new_shape == shape:
+        with stage('render'):
+            patch = patch_figure(frame(), approximate)
+        if measure:
+            # Taille complète estimée : le graphique n'est pas reconstruit
+            get_payload_stats().record('patch', payload_size(patch), shape=new_shape)
+        return patch, dash.no_update, token
+
+    fig, size = figure_entry(token, frame, approximate, barmode, options)
+    if measure:
+        get_payload_stats().record('full', size, shape=new_shape)
+    return fig, new_shape, token
+
+
+@app.callback(
+    [
+        Output('main-chart', 'figure', allow_duplicate=True),
+        Output('chart-shape', 'data', allow_duplicate=True),
+        Output('chart-rendered', 'data', allow_duplicate=True),
+        Output('chart-zoom', 'data')
+    ],
+    Input('main-chart', 'relayoutData'),
+    [
+        State('data-store', 'data'),
+        State('chart-rendered', 'data'),
+        State('chart-zoom', 'data'),
+        State('chart-barmode', 'value'),
+        State('chart-display', 'value'),
+        State('time-dimension', 'value')
+    ] + [
+        State(view_input.component_id, view_input.component_property)
+        for view_input in VIEW_INPUTS
+    ],
+    prevent_initial_call=True
+)
+@timed_callback
+@tracked_memory
+def zoom_chart(relayout, json_data, rendered, zoom, barmode, options, time_step, *filters):
+    """
+    Recharge la plage zoomée à une résolution plus fine
+
+    Si la vue complète a été regroupée (semaine, mois...) et que la plage
+    visible tient dans le budget de largeur à un pas plus fin, elle est lue
+    à ce pas. Le retour à la vue complète (double-clic) réaffiche le
+    data-store. Le graphique zoomé n'est pas celui du data-store :
+    chart-rendered est vidé pour qu'il soit reconstruit à la prochaine mise
+    à jour des données.
+    """
+    unchanged = (dash.no_update,) * 4
+    if not json_data:
+        return unchanged
+    from src.database.date_blocks import to_date
+    from src.visualizations.charts.downsampling import (
+        CHART_REDUCTIONS,
+        display_time_dimension,
+        zoom_range,
     )
-    
-    return dcc.Graph(figure=fig)
+
+    # Détail affiché : plage rechargée tant que le graphique du data-store n'a pas été redessiné
+    zoom = zoom if rendered is None else None
+    selection = make_selection(*filters)
+    overview = display_time_dimension(selection.start_date, selection.end_date, time_step)
+    window = zoom_range(relayout)
+
+    def show_overview(x_range=None):
+        token, frame = data_token(json_data), store_frame(json_data)
+        fig, _size = figure_entry(token, frame, False, barmode, options)
+        if x_range:
+            fig = with_x_range(fig, x_range)
+        return fig, figure_shape(token, frame), token, None
+
+    # Plage affichée par le navigateur, reprise telle quelle par le nouveau graphique
+    x_range = relayout.get('xaxis.range') or [
+        relayout.get('xaxis.range[0]'), relayout.get('xaxis.range[1]')
+    ]
+
+    if window is None:
+        if zoom and relayout.get('xaxis.autorange'):
+            return show_overview()
+        return unchanged
+
+    start, end = window
+    if selection.start_date and selection.end_date:
+        start = max(start, to_date(selection.start_date))
+        end = min(end, to_date(selection.end_date))
+    if start > end:
+        return unchanged
+    detail = display_time_dimension(start, end, time_step)
+    if detail == overview:
+        # Le pas de la vue complète suffit : zoom du navigateur
+        return show_overview(x_range) if zoom else unchanged
+    if zoom and zoom['time_dimension'] == detail and (
+        zoom['start'] <= start.isoformat() and end.isoformat() <= zoom['end']
+    ):
+        return unchanged
+    if not DATABASE_CONFIG['database']:
+        return unchanged
+
+    from src.database.connection import streaming_reads
+    from src.database.cost_guard import get_cost_guard
+    from src.database.views import load_view, to_store_frame
+    from src.visualizations.render_cache import data_hash
+
+    zoomed = selection._replace(start_date=start.isoformat(), end_date=end.isoformat())
+    try:
+        with query_context('interactive', user=request.remote_addr):
+            decision = get_cost_guard().check(zoomed, detail)
+            if decision.action == 'confirm':
+                return unchanged
+            with stage('fetch'), streaming_reads(decision.streaming):
+                data = load_view(decision.selection, time_dimension=decision.time_dimension)
+    except QueryRejected as e:
+        print(f"Requête refusée: {e}")
+        return unchanged
+
+    CHART_REDUCTIONS.inc(kind='zoom')
+    with stage('transform'):
+        df = to_store_frame(
+            data, decision.selection.granularity, decision.time_dimension,
+            decision.top_n, decision.selection.indicator
+        )
+    fig, _size = figure_entry(data_hash(df), lambda: df, False, barmode, options)
+    return with_x_range(fig, x_range), None, None, {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'time_dimension': decision.time_dimension
+    }
+
+
+# Options de présentation : appliquées dans le navigateur, sans requête
+app.clientside_callback(
+    ClientsideFunction(namespace='chart', function_name='apply_options'),
+    Output('main-chart', 'figure', allow_duplicate=True),
+    [
+        Input('chart-barmode', 'value'),
+        Input('chart-display', 'value')
+    ],
+    State('main-chart', 'figure'),
+    prevent_initial_call=True
+)
 
 @app.callback(
-    Output('table-container', 'children'),
-    Input('data-store', 'data')
+    [
+        Output('table-container', 'children'),
+        Output('table-rendered', 'data')
+    ],
+    [
+        Input('data-store', 'data'),
+        Input('tabs', 'active_tab')
+    ],
+    State('table-rendered', 'data')
 )
-def update_table(json_data):
+@timed_callback
+@tracked_memory
+def update_table(json_data, active_tab, rendered):
     """
     Met à jour le tableau selon les données
+
+    Le tableau n'est calculé que si son onglet est affiché ; sinon il l'est
+    à l'ouverture de l'onglet, depuis le data-store.
     """
+    token = data_token(json_data)
+    if active_tab != 'tab-table' or (token == rendered and json_data is not None):
+        return dash.no_update, dash.no_update
+
     if json_data is None:
-        return html.Div("Aucune donnée disponible")
-    
-    df = pd.read_json(json_data, orient='split')
-    
-    # Créer un tableau pivot
-    pivot = df.pivot_table(
-        values='valeur',
-        index='categorie',
-        columns='periode',
-        aggfunc='sum',
-        fill_value=0
-    ).reset_index()
-    
-    # Créer le DataTable
-    from dash import dash_table
-    
-    table = dash_table.DataTable(
-        data=pivot.to_dict('records'),
-        columns=[{'name': col, 'id': col} for col in pivot.columns],
-        style_table={'overflowX': 'auto'},
-        style_header={
-            'backgroundColor': '#2c3e50',
-            'color': 'white',
-            'fontWeight': 'bold',
-            'textAlign': 'center'
-        },
-        style_cell={
-            'textAlign': 'right',
-            'padding': '10px',
-            'fontFamily': 'monospace'
-        },
-        style_cell_conditional=[
-            {
-                'if': {'column_id': 'categorie'},
-                'textAlign': 'left',
-                'fontWeight': 'bold'
-            }
-        ],
-        export_format='xlsx',
-        export_headers='display'
-    )
-    
-    return table
+        return html.Div("Aucune donnée disponible"), None
+    from src.visualizations.render_cache import cached_render
+
+    def build():
+        import pandas as pd
+        from dash import dash_table
+
+        df = store_frame(json_data)()
+        with stage('transform'):
+            # Créer un tableau pivot (data-store déjà agrégé : une ligne par
+            # période et catégorie, pivot pandas direct)
+            pivot = pd.pivot_table(
+                df,
+                values='valeur',
+                index='categorie',
+                columns='periode',
+                aggfunc='sum',
+                fill_value=0
+            ).reset_index()
+
+        # Créer le DataTable
+        with stage('render'):
+            records = pivot.to_dict('records')
+        return dash_table.DataTable(
+            data=records,
+            columns=[{'name': col, 'id': col} for col in pivot.columns],
+            style_table={'overflowX': 'auto'},
+            style_header={
+                'backgroundColor': '#2c3e50',
+                'color': 'white',
+                'fontWeight': 'bold',
+                'textAlign': 'center'
+            },
+            style_cell={
+                'textAlign': 'right',
+                'padding': '10px',
+                'fontFamily': 'monospace'
+            },
+            style_cell_conditional=[
+                {
+                    'if': {'column_id': 'categorie'},
+                    'textAlign': 'left',
+                    'fontWeight': 'bold'
+                }
+            ],
+            export_format='xlsx',
+            export_headers='display'
+        )
+
+    # Même data-store : tableau repris du cache des composants rendus
+    return cached_render('pivot_table', token, build), token
 
 @app.callback(
     Output('indicator-list', 'children'),
@@ -238,6 +692,43 @@ def update_indicator_list(selected_indicator):
         ], className="mb-2", color="light")
     ])
 
+# ============================================
+# MÉTRIQUES
+# ============================================
+
+RESPONSE_BYTES = get_metrics().histogram(
+    'dashboard_callback_response_bytes',
+    "Taille des réponses des callbacks envoyées au navigateur",
+    ['callback'],
+    buckets=SIZE_BUCKETS
+)
+
+
+def callback_name():
+    """Nom du callback appelé par la requête courante"""
+    body = request.get_json(silent=True) or {}
+    callback = app.callback_map.get(body.get('output'), {}).get('callback')
+    return getattr(callback, '__name__', 'inconnu')
+
+
+@app.server.after_request
+def record_response_size(response):
+    """Taille des réponses de callback, par callback"""
+    if request.path.endswith('/_dash-update-component') and response.status_code == 200:
+        RESPONSE_BYTES.observe(response.content_length or 0, callback=callback_name())
+    return response
+
+
+# Profilage à la demande (en-tête / ?profile= d'administration, ou tirage)
+install_profiling(app.server, callback_name)
+
+
+@app.server.route('/metrics')
+def metrics():
+    """Métriques au format d'exposition Prometheus"""
+    return Response(get_metrics().render(), content_type=CONTENT_TYPE)
+
+
 # ============================================
 # CSS PERSONNALISÉ
 # ============================================
@@ -289,5 +780,11 @@ app.index_string = '''
 # LANCEMENT DE L'APPLICATION
 # ============================================
 
+# Serveur de développement ; en production : gunicorn -c gunicorn.conf.py wsgi:application
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=8050)
+    start_background_tasks()
+    app.run(
+        debug=APP_CONFIG['debug'],
+        host=APP_CONFIG['host'],
+        port=APP_CONFIG['port']
+    )
@@ -0,0 +1,27 @@
+/* Options de présentation du graphique principal, appliquées sans
+   aller-retour serveur (voir src/visualizations/charts/figure_updates.py) */
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    chart: {
+        apply_options: function(barmode, options, figure) {
+            if (!figure || !figure.data) {
+                return window.dash_clientside.no_update;
+            }
+            options = options || [];
+            const showTotals = options.includes('totals') && barmode === 'stack';
+
+            // Nouvel objet : Plotly ne redessine que si la référence change
+            const data = figure.data.map(function(trace) {
+                if (trace.meta === 'total') {
+                    return Object.assign({}, trace, {visible: showTotals});
+                }
+                return trace;
+            });
+            const layout = Object.assign({}, figure.layout, {
+                barmode: barmode,
+                showlegend: options.includes('legend')
+            });
+            return Object.assign({}, figure, {data: data, layout: layout});
+        }
+    }
+});
@@ -12,3 +12,52 @@ DATABASE_CONFIG = {
     'user': os.getenv('DB_USER'),
     'password': os.getenv('DB_PASSWORD')
 }
+
+# Tables de dimensions (optionnelles) ; à défaut, les membres sont lus
+# en une seule passe sur la table de faits
+DIMENSION_TABLES = {
+    'produit': os.getenv('DIM_PRODUIT_TABLE'),
+    'region': os.getenv('DIM_REGION_TABLE')
+}
+
+# Shards régionaux : "region_id=url,region_id=url" (plusieurs régions
+# peuvent partager la même URL) ; vide = une seule BD
+DATABASE_SHARDS = {
+    int(region_id): url.strip()
+    for region_id, _, url in (
+        entry.partition('=') for entry in os.getenv('DB_SHARDS', '').split(',')
+        if entry.strip()
+    )
+}
+
+
+def _pool_config(name: str) -> dict:
+    """URL et taille de pool d'une base logique (variables suffixées par son nom)"""
+    return {
+        'url': os.getenv(f'DB_URL_{name}'),
+        'pool_size': int(os.getenv(f'DB_POOL_SIZE_{name}', 5)),
+        'max_overflow': int(os.getenv(f'DB_MAX_OVERFLOW_{name}', 10))
+    }
+
+
+# Bases logiques (choix "Base de données" de la barre latérale) ; une base
+# sans URL propre partage le moteur de la base par défaut (variables DB_*)
+DEFAULT_DATABASE = 'entreprise'
+DATABASE_POOLS = {
+    'entreprise': _pool_config('ENTREPRISE'),
+    'region': _pool_config('REGION'),
+    'ventes': _pool_config('VENTES')
+}
+DATABASE_LABELS = {
+    'Entreprise': 'entreprise',
+    'Région': 'region',
+    'Ventes': 'ventes'
+}
+
+# Durée d'inactivité (secondes) après laquelle les connexions d'un pool sont fermées
+ENGINE_IDLE_TIMEOUT = int(os.getenv('DB_ENGINE_IDLE_TIMEOUT', 600))
+
+# Connexions autorisées par le serveur BD (max_connections moins une réserve),
+# réparties entre les workers du serveur de production puis entre les pools
+# de chaque worker (bases logiques et shards)
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', 90))
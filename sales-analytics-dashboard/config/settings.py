@@ -11,19 +11,93 @@ APP_CONFIG = {
     'debug': os.getenv('DEBUG_MODE', 'True').lower() == 'true'
 }
 
+# Serveur de production (gunicorn.conf.py)
+SERVER_CONFIG = {
+    'workers': int(os.getenv('SERVER_WORKERS', 2 * (os.cpu_count() or 1) + 1)),
+    'threads': int(os.getenv('SERVER_THREADS', 4)),
+    # Chargement de l'application dans le maître, partagée par fork
+    'preload': os.getenv('SERVER_PRELOAD', 'True').lower() == 'true',
+    'timeout': int(os.getenv('SERVER_TIMEOUT', 120)),
+    # Recyclage des workers après N requêtes (0 = jamais)
+    'max_requests': int(os.getenv('SERVER_MAX_REQUESTS', 0))
+}
+
 # Cache
 CACHE_CONFIG = {
     'type': os.getenv('CACHE_TYPE', 'redis'),
     'host': os.getenv('REDIS_HOST', 'localhost'),
     'port': int(os.getenv('REDIS_PORT', 6379)),
     'db': int(os.getenv('REDIS_DB', 0)),
-    'timeout': int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300))
+    'timeout': int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300)),
+    # Invalidation sur changement des données (local, listen, poll)
+    'notifier': os.getenv('CACHE_NOTIFIER', 'local'),
+    'notify_channel': os.getenv('CACHE_NOTIFY_CHANNEL', 'ventes_changes'),
+    'poll_interval': int(os.getenv('CACHE_POLL_INTERVAL', 30)),
+    # TTL appliqué lorsque l'invalidation sur changement est active
+    'invalidated_timeout': int(os.getenv('CACHE_INVALIDATED_TIMEOUT', 21600)),
+    # Résultats sur plage exacte (semaines, plages ouvertes) rafraîchis par
+    # watermark au lieu d'être purgés (src/database/incremental.py)
+    'incremental_refresh': os.getenv('CACHE_INCREMENTAL_REFRESH', 'True').lower() == 'true',
+    # Préchauffage et préchargement
+    'warmup_top_k': int(os.getenv('CACHE_WARMUP_TOP_K', 5)),
+    'prefetch_delay': float(os.getenv('CACHE_PREFETCH_DELAY', 2))
 }
 
 # Performance
 PERFORMANCE_CONFIG = {
     'max_rows_per_query': int(os.getenv('MAX_ROWS_PER_QUERY', 100000)),
-    'query_timeout': int(os.getenv('QUERY_TIMEOUT', 30))
+    'query_timeout': int(os.getenv('QUERY_TIMEOUT', 30)),
+    # Garde-fou sur les estimations (EXPLAIN) : coût planificateur maximal
+    # (0 = lignes seulement), 'downgrade', 'confirm' ou 'off'
+    'max_query_cost': float(os.getenv('MAX_QUERY_COST', 0)),
+    'cost_guard_mode': os.getenv('COST_GUARD_MODE', 'downgrade'),
+    'cost_estimate_timeout': int(os.getenv('COST_ESTIMATE_TIMEOUT', 3600)),
+    # Aperçu échantillonné affiché avant le résultat exact (requêtes hors cache)
+    'progressive_results': os.getenv('PROGRESSIVE_RESULTS', 'True').lower() == 'true',
+    'preview_sample_percent': float(os.getenv('PREVIEW_SAMPLE_PERCENT', 1)),
+    # Mesure des octets économisés par les mises à jour partielles du graphique
+    # (désactivée par défaut ; taille complète estimée, sans reconstruction)
+    'figure_payload_stats': os.getenv('FIGURE_PAYLOAD_STATS', 'False').lower() == 'true',
+    # Budget de largeur du graphique : barres par série au-delà desquelles les
+    # périodes sont regroupées (semaine, mois...), points des courbes
+    # superposées et méthode de réduction ('lttb' ou 'minmax')
+    'chart_max_bars': int(os.getenv('CHART_MAX_BARS', 200)),
+    'chart_max_line_points': int(os.getenv('CHART_MAX_LINE_POINTS', 500)),
+    'line_downsampling': os.getenv('LINE_DOWNSAMPLING', 'lttb'),
+    # Cache des graphiques et tableaux sérialisés, par contenu (0 = désactivé)
+    'render_cache_mb': int(os.getenv('RENDER_CACHE_MB', 64)),
+    # Mesure mémoire des callbacks et requêtes ('off', 'rss' ou 'tracemalloc')
+    'memory_tracking': os.getenv('MEMORY_TRACKING', 'rss'),
+    # Budget mémoire par requête (0 = sans limite) : lecture par morceaux,
+    # top N ou vue plus agrégée lorsque l'estimation le dépasse
+    'request_memory_budget_mb': int(os.getenv('REQUEST_MEMORY_BUDGET_MB', 0)),
+    # Budget du temps d'import de l'application (python -m src.utils.import_time)
+    'import_time_budget_ms': float(os.getenv('IMPORT_TIME_BUDGET_MS', 1500)),
+    # Regroupement par produit_id seul, libellés ajoutés depuis le cache de dimensions
+    'late_labels': os.getenv('LATE_LABELS', 'True').lower() == 'true',
+    # Stockage colonnaire en mémoire de sales.ventes (0 = désactivé)
+    'columnar_store_budget_mb': int(os.getenv('COLUMNAR_STORE_BUDGET_MB', 0)),
+    'columnar_store_chunksize': int(os.getenv('COLUMNAR_STORE_CHUNKSIZE', 200000)),
+    'columnar_store_float32': os.getenv('COLUMNAR_STORE_FLOAT32', 'False').lower() == 'true',
+    # Agrégations pandas parallélisées (pivot, groupby) sur les extraits de
+    # lignes détaillées (src.data_processing.aggregator, usage explicite)
+    'parallel_workers': int(os.getenv('PARALLEL_WORKERS', min(8, os.cpu_count() or 1))),
+    'parallel_min_rows': int(os.getenv('PARALLEL_MIN_ROWS', 200000)),
+    # Interrogation parallèle des shards régionaux (config.database.DATABASE_SHARDS)
+    'shard_workers': int(os.getenv('SHARD_WORKERS', 8)),
+    # Une transaction n'appartient qu'à une région : les comptages distincts
+    # des shards s'additionnent ; sinon, fusion exacte en deux phases
+    'shard_disjoint_transactions': os.getenv('SHARD_DISJOINT_TRANSACTIONS', 'True').lower() == 'true',
+    # Ordonnancement des requêtes : requêtes simultanées par priorité
+    # (0 = toute la capacité du pool), file d'attente bornée
+    'scheduler_interactive_slots': int(os.getenv('SCHEDULER_INTERACTIVE_SLOTS', 0)),
+    'scheduler_prefetch_slots': int(os.getenv('SCHEDULER_PREFETCH_SLOTS', 3)),
+    'scheduler_export_slots': int(os.getenv('SCHEDULER_EXPORT_SLOTS', 2)),
+    'scheduler_queue_size': int(os.getenv('SCHEDULER_QUEUE_SIZE', 50)),
+    'scheduler_wait_timeout': float(os.getenv('SCHEDULER_WAIT_TIMEOUT', 10)),
+    # Équité : le nombre de requêtes servies par utilisateur est divisé par
+    # deux à chaque intervalle (secondes) ; les utilisateurs inactifs sont oubliés
+    'scheduler_fairness_halflife': float(os.getenv('SCHEDULER_FAIRNESS_HALFLIFE', 60))
 }
 
 # Export
@@ -31,3 +105,16 @@ EXPORT_CONFIG = {
     'folder': os.getenv('EXPORT_FOLDER', 'data/exports'),
     'max_rows': int(os.getenv('MAX_EXPORT_ROWS', 50000))
 }
+
+# Profilage à la demande des callbacks (src/utils/profiling.py)
+PROFILING_CONFIG = {
+    # Part des requêtes de callback profilées au hasard (0 = aucune)
+    'sample_rate': float(os.getenv('PROFILING_SAMPLE_RATE', 0)),
+    # Jeton attendu dans l'en-tête ou le paramètre ?profile= (vide = désactivé)
+    'token': os.getenv('PROFILING_TOKEN', ''),
+    'header': os.getenv('PROFILING_HEADER', 'X-Dashboard-Profile'),
+    # 'sampling' (statistique, piles folded) ou 'cprofile' (déterministe, .pstats)
+    'mode': os.getenv('PROFILING_MODE', 'sampling'),
+    'interval_ms': float(os.getenv('PROFILING_INTERVAL_MS', 5)),
+    'folder': os.getenv('PROFILING_FOLDER', 'logs/profiles')
+}
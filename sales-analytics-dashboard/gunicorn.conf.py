@@ -0,0 +1,33 @@
+"""
+Configuration gunicorn du dashboard
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Workers et threads : SERVER_WORKERS / SERVER_THREADS (config/settings.py).
+Les pools de connexions de chaque worker sont plafonnés à
+DB_MAX_CONNECTIONS / SERVER_WORKERS.
+"""
+import gc
+
+from config.settings import APP_CONFIG, SERVER_CONFIG
+
+bind = f"{APP_CONFIG['host']}:{APP_CONFIG['port']}"
+workers = SERVER_CONFIG['workers']
+threads = SERVER_CONFIG['threads']
+worker_class = 'gthread'
+preload_app = SERVER_CONFIG['preload']
+timeout = SERVER_CONFIG['timeout']
+max_requests = SERVER_CONFIG['max_requests']
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    # Objets préchargés exclus du ramasse-miettes : leurs pages mémoire
+    # restent partagées au lieu d'être recopiées dans chaque worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from wsgi import init_worker
+
+    init_worker(server.cfg.workers)
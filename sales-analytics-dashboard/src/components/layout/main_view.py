@@ -3,11 +3,11 @@ import dash_bootstrap_components as dbc
 from src.components.layout.sidebar import create_sidebar
 from src.components.layout.page_content import create_page_content
 
-def create_main_content(indicators:list, categories:list, granularities:list):
+def create_main_content(indicators:list, categories:list, granularities:list, regions:list = None):
     return dbc.Row([
         # Side bar content
         dbc.Col([
-                create_sidebar(indicators),
+                create_sidebar(indicators, regions),
             ], width=3, className="pe-0"),
             
             # Main content
@@ -53,12 +53,57 @@ def create_page_content(indicators:list, categories:list, granularities:list):
         # Onglets pour basculer entre tableau et graphique
         dbc.Tabs([
             dbc.Tab(
-                html.Div(id='chart-container', className="p-4"),
+                html.Div([
+                    # Options de présentation (appliquées côté navigateur),
+                    # sauf le pas de temps qui change la requête
+                    html.Div([
+                        dbc.RadioItems(
+                            id='time-dimension',
+                            options=[
+                                {'label': "Jour", 'value': 'jour'},
+                                {'label': "Semaine", 'value': 'semaine'},
+                                {'label': "Mois", 'value': 'mois'},
+                                {'label': "Année", 'value': 'annee'}
+                            ],
+                            value='mois',
+                            inline=True
+                        ),
+                        dbc.RadioItems(
+                            id='chart-barmode',
+                            options=[
+                                {'label': "Empilé", 'value': 'stack'},
+                                {'label': "Groupé", 'value': 'group'}
+                            ],
+                            value='stack',
+                            inline=True
+                        ),
+                        dbc.Checklist(
+                            id='chart-display',
+                            options=[
+                                {'label': "Totaux", 'value': 'totals'},
+                                {'label': "Légende", 'value': 'legend'}
+                            ],
+                            value=['legend'],
+                            inline=True,
+                            switch=True
+                        )
+                    ], className="d-flex justify-content-between mb-2"),
+                    dcc.Graph(id='main-chart'),
+                    # Structure du graphique affiché (traces et périodes)
+                    dcc.Store(id='chart-shape'),
+                    # Empreinte des données affichées (calcul à l'ouverture de l'onglet)
+                    dcc.Store(id='chart-rendered'),
+                    # Plage rechargée au zoom (début, fin, pas de temps)
+                    dcc.Store(id='chart-zoom')
+                ], id='chart-container', className="p-4"),
                 label="Graphique",
                 tab_id="tab-chart"
             ),
             dbc.Tab(
-                html.Div(id='table-container', className="p-4"),
+                html.Div([
+                    html.Div(id='table-container'),
+                    dcc.Store(id='table-rendered')
+                ], className="p-4"),
                 label="Tableau",
                 tab_id="tab-table"
             )
@@ -1,15 +1,37 @@
+from datetime import date, timedelta
+
 import dash_bootstrap_components as dbc
-from dash import html
-from dash import dcc, html, Input, Output, State, callback
-import dash_bootstrap_components as dbc
-import pandas as pd
-from datetime import datetime, timedelta
-import plotly.graph_objects as go
+from dash import dcc, html
 
 from src.components.elements.input_radio import create_radio_group
 
  
-def create_sidebar(indicators:list):
+def create_region_filter(regions:list = None):
+    """Liste des régions, servie par le cache de dimensions si disponible"""
+    return dcc.Dropdown(
+        id='region-dropdown',
+        options=regions or [{'label': 'Toutes les régions', 'value': 'all'}],
+        value='all',
+        clearable=False
+    )
+
+
+def create_period_filter(days:int = 365):
+    """
+    Période affichée : les `days` derniers jours par défaut, comme la vue
+    préchauffée au démarrage (warmup.default_selection)
+    """
+    today = date.today()
+    return dcc.DatePickerRange(
+        id='date-picker',
+        start_date=(today - timedelta(days=days)).isoformat(),
+        end_date=today.isoformat(),
+        display_format='DD/MM/YYYY',
+        className="w-100"
+    )
+
+
+def create_sidebar(indicators:list, regions:list = None):
     """Crée la barre latérale avec les filtres"""
     return html.Div([
         dbc.Accordion(
@@ -44,14 +66,14 @@ def create_sidebar(indicators:list):
 
                 # 2. ITEM RÉGION
                 dbc.AccordionItem(
-                    html.Div("Liste des régions"),
+                    create_region_filter(regions),
                     title="Région",
                     item_id="item-region"
                 ),
 
                 # 3. ITEM PÉRIODE
                 dbc.AccordionItem(
-                    html.Div("Sélection de la période (RangeSlider, DatePicker)"),
+                    create_period_filter(),
                     title="Période",
                     item_id="item-periode"
                 ),
@@ -0,0 +1,303 @@
+"""
+Module d'agrégation post-BD parallélisée par partitions
+
+Les agrégations pandas (pivot_table, groupby) s'exécutent sur un seul cœur.
+Pour les grands extraits, les clés de groupe sont encodées en entiers puis
+placées en mémoire partagée : chaque processus du pool agrège une partition
+(un ou plusieurs mois consécutifs) sans recopie du DataFrame, et les
+agrégats partiels sont additionnés.
+
+En dessous de PARALLEL_MIN_ROWS lignes, ou avec un seul processus, le calcul
+reste celui de pandas.
+
+Usage explicite, réservé aux extraits de lignes détaillées (tableaux et
+graphiques construits sur des lignes de ventes, scripts d'analyse) : les
+vues du dashboard lisent des résultats déjà agrégés par la BD ou le stockage
+colonnaire, trop petits pour amortir le pool de processus, et ne passent
+pas par ce module.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import PERFORMANCE_CONFIG
+
+
+# Fonctions d'agrégation calculables à partir de sommes et de comptages partiels
+PARALLEL_AGGFUNCS = {'sum', 'count', 'mean'}
+
+# Au-delà de cette taille d'espace de clés, les clés sont compactées
+DENSE_KEY_LIMIT = 1 << 22
+
+
+def _partial_aggregate(
+    keys_name: str,
+    values_name: str,
+    n_rows: int,
+    n_keys: int,
+    start: int,
+    stop: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Agrège une partition [start, stop) lue en mémoire partagée
+    (exécuté dans un processus du pool)
+
+    Returns:
+        Tuple (sommes, valeurs non manquantes, lignes) par clé de groupe
+    """
+    keys_memory = shared_memory.SharedMemory(name=keys_name)
+    values_memory = shared_memory.SharedMemory(name=values_name)
+    try:
+        keys = np.ndarray((n_rows,), dtype=np.int64, buffer=keys_memory.buf)[start:stop]
+        values = np.ndarray((n_rows,), dtype=np.float64, buffer=values_memory.buf)[start:stop]
+        valid = ~np.isnan(values)
+        sums = np.bincount(keys[valid], weights=values[valid], minlength=n_keys)
+        counts = np.bincount(keys[valid], minlength=n_keys)
+        rows = np.bincount(keys, minlength=n_keys)
+        return sums, counts, rows
+    finally:
+        keys_memory.close()
+        values_memory.close()
+
+
+class ParallelAggregator:
+    """Agrégations groupées exécutées dans un pool de processus"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        min_rows: Optional[int] = None
+    ):
+        self.workers = workers or PERFORMANCE_CONFIG['parallel_workers']
+        self.min_rows = (
+            PERFORMANCE_CONFIG['parallel_min_rows'] if min_rows is None else min_rows
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Pool de processus créé à la première utilisation"""
+        with self._lock:
+            if self._pool is None:
+                # Pas de fork : le pool est créé depuis un thread de requête
+                # (verrous des autres threads, pools de connexions hérités).
+                # Le serveur forkserver ne précharge que ce module.
+                methods = multiprocessing.get_all_start_methods()
+                if 'forkserver' in methods:
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload([__name__])
+                else:
+                    context = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def close(self):
+        """Arrête le pool de processus"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def use_parallel(self, data: pd.DataFrame, aggfunc: str) -> bool:
+        """Indique si le calcul parallèle est pertinent"""
+        return (
+            self.workers > 1
+            and aggfunc in PARALLEL_AGGFUNCS
+            and len(data) >= self.min_rows
+        )
+
+    def groupby(
+        self,
+        data: pd.DataFrame,
+        by: List[str],
+        value: str,
+        aggfunc: str = 'sum',
+        partition_column: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Équivalent de data.groupby(by)[value].agg(aggfunc).reset_index()
+
+        Args:
+            data: DataFrame source
+            by: Colonnes de regroupement
+            value: Colonne à agréger
+            aggfunc: 'sum', 'count' ou 'mean' en parallèle (autres : pandas)
+            partition_column: Colonne de partitionnement (ex: 'periode') ;
+                              si elle est triée, les partitions suivent ses
+                              valeurs (un processus par groupe de mois)
+        """
+        if not self.use_parallel(data, aggfunc):
+            return data.groupby(by)[value].agg(aggfunc).reset_index()
+
+        codes, uniques, key_space = self._encode_keys(data, by)
+        valid = codes >= 0
+        if not valid.all():
+            # Comme pandas (dropna=True), les clés manquantes sont ignorées
+            data, codes = data[valid], codes[valid]
+        if key_space <= DENSE_KEY_LIMIT:
+            key_values, keys = np.arange(key_space, dtype=np.int64), codes
+        else:
+            key_values, keys = np.unique(codes, return_inverse=True)
+            keys = keys.astype(np.int64)
+        values = data[value].to_numpy(dtype=np.float64)
+
+        sums, counts, rows = self._run_partitions(
+            keys, values, len(key_values),
+            self._partition_bounds(data, partition_column)
+        )
+
+        present = rows > 0
+        if aggfunc == 'sum':
+            result_values = sums
+        elif aggfunc == 'count':
+            result_values = counts
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result_values = sums / counts
+
+        result = self._decode_keys(key_values[present], uniques, by)
+        result[value] = result_values[present]
+        if aggfunc in ('sum', 'count') and pd.api.types.is_integer_dtype(data[value]):
+            result[value] = result[value].astype(data[value].dtype)
+        return result
+
+    def pivot_table(
+        self,
+        data: pd.DataFrame,
+        values: str,
+        index: List[str],
+        columns: str,
+        aggfunc: str = 'sum',
+        fill_value: float = 0,
+        partition_column: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Équivalent de pd.pivot_table calculé par partitions"""
+        index = [index] if isinstance(index, str) else list(index)
+        if not self.use_parallel(data, aggfunc):
+            return pd.pivot_table(
+                data,
+                values=values,
+                index=index,
+                columns=columns,
+                aggfunc=aggfunc,
+                fill_value=fill_value
+            )
+
+        grouped = self.groupby(
+            data, index + [columns], values, aggfunc,
+            partition_column=partition_column or columns
+        )
+        pivot = grouped.set_index(index + [columns])[values].unstack(columns)
+        if fill_value is not None:
+            pivot = pivot.fillna(fill_value)
+            if pd.api.types.is_integer_dtype(data[values]) and aggfunc in ('sum', 'count'):
+                pivot = pivot.astype(data[values].dtype)
+        pivot.columns.name = columns
+        return pivot
+
+    def _encode_keys(self, data: pd.DataFrame, by: List[str]) -> Tuple[np.ndarray, list, int]:
+        """
+        Encode les colonnes de regroupement en une clé entière unique
+        (-1 si une valeur manque)
+
+        Returns:
+            Tuple (clés, valeurs uniques par colonne, taille de l'espace des clés)
+        """
+        combined = np.zeros(len(data), dtype=np.int64)
+        missing = np.zeros(len(data), dtype=bool)
+        uniques = []
+        key_space = 1
+        for column in by:
+            codes, column_uniques = pd.factorize(data[column], sort=True)
+            missing |= codes < 0
+            size = max(len(column_uniques), 1)
+            combined = combined * size + np.maximum(codes, 0)
+            key_space *= size
+            uniques.append(column_uniques)
+        combined[missing] = -1
+        return combined, uniques, key_space
+
+    @staticmethod
+    def _decode_keys(key_values: np.ndarray, uniques: list, by: List[str]) -> pd.DataFrame:
+        """Reconstitue les colonnes de regroupement à partir des clés entières"""
+        columns = {}
+        remainder = key_values
+        for column, column_uniques in reversed(list(zip(by, uniques))):
+            size = max(len(column_uniques), 1)
+            columns[column] = column_uniques.take(remainder % size)
+            remainder = remainder // size
+        return pd.DataFrame({column: columns[column] for column in by})
+
+    def _partition_bounds(
+        self,
+        data: pd.DataFrame,
+        partition_column: Optional[str]
+    ) -> List[Tuple[int, int]]:
+        """Bornes [start, stop) des partitions, alignées sur la colonne si elle est triée"""
+        n_rows = len(data)
+        n_parts = min(self.workers, n_rows) or 1
+        cuts = np.linspace(0, n_rows, n_parts + 1).astype(np.int64)
+
+        if partition_column is not None and partition_column in data:
+            column = data[partition_column]
+            if column.is_monotonic_increasing:
+                # Recaler chaque coupure sur le début de la partition (mois) suivante
+                values = column.to_numpy()
+                cuts[1:-1] = np.searchsorted(values, values[cuts[1:-1]], side='left')
+
+        cuts = np.unique(cuts)
+        return [(int(start), int(stop)) for start, stop in zip(cuts[:-1], cuts[1:])]
+
+    def _run_partitions(
+        self,
+        keys: np.ndarray,
+        values: np.ndarray,
+        n_keys: int,
+        bounds: List[Tuple[int, int]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Exécute les agrégations partielles en mémoire partagée puis les fusionne"""
+        keys_memory = shared_memory.SharedMemory(create=True, size=max(keys.nbytes, 1))
+        values_memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        try:
+            np.ndarray(keys.shape, dtype=np.int64, buffer=keys_memory.buf)[:] = keys
+            np.ndarray(values.shape, dtype=np.float64, buffer=values_memory.buf)[:] = values
+
+            futures = [
+                self.pool.submit(
+                    _partial_aggregate,
+                    keys_memory.name, values_memory.name,
+                    len(keys), n_keys, start, stop
+                )
+                for start, stop in bounds
+            ]
+            sums = np.zeros(n_keys, dtype=np.float64)
+            counts = np.zeros(n_keys, dtype=np.int64)
+            rows = np.zeros(n_keys, dtype=np.int64)
+            for future in futures:
+                partial_sums, partial_counts, partial_rows = future.result()
+                sums += partial_sums
+                counts += partial_counts
+                rows += partial_rows
+            return sums, counts, rows
+        finally:
+            keys_memory.close()
+            keys_memory.unlink()
+            values_memory.close()
+            values_memory.unlink()
+
+
+# Singleton partagé (le pool de processus est coûteux à créer)
+_aggregator = None
+
+def get_aggregator() -> ParallelAggregator:
+    """Retourne l'agrégateur parallèle partagé"""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = ParallelAggregator()
+    return _aggregator
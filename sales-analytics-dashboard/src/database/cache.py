@@ -0,0 +1,179 @@
+"""
+Module de cache en mémoire pour les résultats de requêtes
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import CACHE_CONFIG
+from src.utils.metrics import MetricFamily, get_metrics
+
+
+class QueryCache:
+    """Cache LRU en mémoire avec expiration (TTL) des entrées"""
+
+    def __init__(
+        self,
+        default_timeout: Optional[int] = None,
+        max_entries: int = 1024
+    ):
+        self.default_timeout = (
+            default_timeout if default_timeout is not None
+            else CACHE_CONFIG['timeout']
+        )
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Construit une clé stable à partir d'éléments sérialisables en JSON
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur associée à la clé, ou None si absente/expirée"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        """Lecture sans statistiques (verrou détenu)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _meta = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Enregistre une valeur dans le cache
+
+        Args:
+            key: Clé de l'entrée
+            value: Valeur à stocker
+            timeout: Durée de vie en secondes (0 = pas d'expiration)
+            meta: Périmètre des données (date_debut, date_fin, regions),
+                  utilisé pour l'invalidation ciblée
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._entries[key] = (expires_at, value, meta or {})
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def replace(self, key: str, value: Any) -> bool:
+        """
+        Remplace la valeur d'une entrée présente (expiration et métadonnées
+        conservées)
+
+        Returns:
+            False si l'entrée est absente ou expirée
+        """
+        with self._lock:
+            if self._lookup(key) is None:
+                return False
+            expires_at, _value, meta = self._entries[key]
+            self._entries[key] = (expires_at, value, meta)
+            return True
+
+    def matching(self, predicate: Callable[[Dict[str, Any]], bool]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Clés et métadonnées des entrées dont les métadonnées vérifient le prédicat"""
+        with self._lock:
+            return [
+                (key, meta) for key, (_expires_at, _value, meta) in self._entries.items()
+                if predicate(meta)
+            ]
+
+    def delete(self, key: str):
+        """Supprime une entrée du cache"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict(self, predicate: Callable[[Dict[str, Any]], bool]) -> int:
+        """
+        Supprime les entrées dont les métadonnées vérifient le prédicat
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        with self._lock:
+            keys = [
+                key for key, (_expires_at, _value, meta) in self._entries.items()
+                if predicate(meta)
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entrées, succès, échecs et taux de succès des lectures"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+    def __contains__(self, key: str) -> bool:
+        # Test de présence (aperçu, préchargement) : hors statistiques
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Singleton pour partager le cache entre les callbacks
+_query_cache = None
+
+def get_query_cache() -> QueryCache:
+    """Retourne l'instance unique du cache de requêtes"""
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryCache()
+    return _query_cache
+
+
+def _cache_metrics():
+    """Métriques du cache de requêtes partagé"""
+    stats = get_query_cache().stats()
+    return [
+        MetricFamily('dashboard_cache_hits_total', "Lectures servies par le cache", 'counter', [({}, stats['hits'])]),
+        MetricFamily('dashboard_cache_misses_total', "Lectures absentes du cache", 'counter', [({}, stats['misses'])]),
+        MetricFamily('dashboard_cache_hit_ratio', "Taux de succès du cache", 'gauge', [({}, stats['hit_ratio'])]),
+        MetricFamily('dashboard_cache_entries', "Entrées du cache", 'gauge', [({}, stats['entries'])])
+    ]
+
+
+get_metrics().register_collector(_cache_metrics)
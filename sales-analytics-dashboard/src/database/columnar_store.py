@@ -0,0 +1,518 @@
+"""
+Module de stockage colonnaire en mémoire de la table sales.ventes
+
+Pour les volumes moyens, la table de faits tient en mémoire si elle est
+stockée de façon compacte :
+    - date_vente : numéro de jour int32
+    - produit, région : codes de dictionnaire int32 (catégorie, sous-catégorie
+      et nom sont portés par le produit)
+    - montant_vente, quantite : float64 (ou float32)
+    - transaction_id : int64
+
+Les requêtes du QueryBuilder (filtres, découpage temporel, regroupement,
+sum / count distinct) sont alors calculées localement avec NumPy.
+
+Le stockage est maintenu par partition mensuelle : après un changement
+notifié, les empreintes (lignes, montants, quantités) de la période sont
+comparées à celles du dernier chargement et les mois modifiés sont relus en
+remplacement (ventes tardives, corrections de périodes passées, nouveaux
+mois).
+"""
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import PERFORMANCE_CONFIG
+from src.database.connection import DatabaseConnection, get_db_connection
+from src.database.date_blocks import to_date
+from src.database.dimensions import DictionaryColumn
+from src.database.incremental import (
+    changed_partitions,
+    fetch_partition_checksums,
+    period_end,
+    period_start,
+    replace_checksums,
+    sql_bound,
+)
+from src.database.query_builder import QueryBuilder
+from src.database.scheduler import query_context
+
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+# Au-delà de cette taille, les clés de groupe sont compactées avant bincount
+DENSE_GROUP_LIMIT = 1 << 22
+
+
+class MemoryBudgetExceeded(Exception):
+    """La table ne tient pas dans le budget mémoire configuré"""
+
+
+def _day_number(value: Any) -> int:
+    """Numéro de jour (depuis 1970-01-01) d'une date"""
+    return int((np.datetime64(to_date(value), 'D') - EPOCH).astype(np.int64))
+
+
+def _month_runs(months):
+    """Plages (premier jour, dernier jour) des suites de mois consécutifs"""
+    runs = []
+    for month in sorted(months):
+        if runs and month == runs[-1][1] + pd.Timedelta(days=1):
+            runs[-1][1] = period_end(month, 'mois')
+        else:
+            runs.append([month, period_end(month, 'mois')])
+    return [tuple(run) for run in runs]
+
+
+class ColumnarSalesStore:
+    """Copie compacte en mémoire de sales.ventes avec moteur d'agrégation local"""
+
+    def __init__(
+        self,
+        db: Optional[DatabaseConnection] = None,
+        query_builder: Optional[QueryBuilder] = None,
+        budget_mb: Optional[int] = None,
+        chunksize: Optional[int] = None,
+        float32: Optional[bool] = None
+    ):
+        self._db = db
+        self._query_builder = query_builder
+        self.budget_bytes = (
+            PERFORMANCE_CONFIG['columnar_store_budget_mb'] if budget_mb is None
+            else budget_mb
+        ) * 1024 * 1024
+        self.chunksize = chunksize or PERFORMANCE_CONFIG['columnar_store_chunksize']
+        if float32 is None:
+            float32 = PERFORMANCE_CONFIG['columnar_store_float32']
+        self.amount_dtype = np.float32 if float32 else np.float64
+        self._lock = threading.RLock()
+        self._loading: Optional[threading.Thread] = None
+        # Rafraîchissement en échec : rechargement complet au changement suivant
+        self._stale = False
+        self._reset()
+
+    def _reset(self):
+        """Vide le stockage"""
+        # Colonnes par ligne
+        self.days = np.empty(0, dtype=np.int32)
+        self.product_codes = np.empty(0, dtype=np.int32)
+        self.region_codes = np.empty(0, dtype=np.int32)
+        self.amounts = np.empty(0, dtype=self.amount_dtype)
+        self.quantities = np.empty(0, dtype=self.amount_dtype)
+        self.transactions = np.empty(0, dtype=np.int64)
+
+        # Dictionnaires
+        self.products = DictionaryColumn()
+        self.regions = DictionaryColumn()
+        self.categories = DictionaryColumn()
+        self.subcategories = DictionaryColumn()
+        self.product_names = DictionaryColumn()
+
+        # Attributs par code produit
+        self.product_category = np.empty(0, dtype=np.int32)
+        self.product_subcategory = np.empty(0, dtype=np.int32)
+        self.product_name = np.empty(0, dtype=np.int32)
+
+        # Empreintes mensuelles de la base lors du dernier chargement
+        self.checksums: Optional[pd.DataFrame] = None
+        self.watermark: Optional[pd.Timestamp] = None
+        self.available = False
+
+    @property
+    def db(self) -> DatabaseConnection:
+        """Connexion BD, ouverte à la première requête"""
+        if self._db is None:
+            self._db = get_db_connection()
+        return self._db
+
+    @property
+    def query_builder(self) -> QueryBuilder:
+        """Constructeur de requêtes, adapté par défaut au dialecte de la BD"""
+        if self._query_builder is None:
+            self._query_builder = QueryBuilder.for_connection(self.db)
+        return self._query_builder
+
+    @property
+    def row_bytes(self) -> int:
+        """Taille d'une ligne stockée"""
+        return 3 * 4 + 2 * np.dtype(self.amount_dtype).itemsize + 8
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire occupée par les colonnes"""
+        return sum(array.nbytes for array in (
+            self.days, self.product_codes, self.region_codes,
+            self.amounts, self.quantities, self.transactions,
+            self.product_category, self.product_subcategory, self.product_name
+        ))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def load(self) -> bool:
+        """
+        Chargement complet par blocs
+
+        Returns:
+            True si la table tient dans le budget mémoire
+        """
+        with self._lock:
+            self._reset()
+            try:
+                # Extraction complète : priorité la plus basse. Les empreintes
+                # sont lues d'abord : une écriture concurrente à l'extraction
+                # est relue au rafraîchissement suivant.
+                with query_context('export'):
+                    self.checksums = fetch_partition_checksums(self.db, self.query_builder, {})
+                    self._append({})
+            except MemoryBudgetExceeded as e:
+                print(f"Stockage colonnaire désactivé: {e}")
+                self._reset()
+                return False
+            except Exception:
+                self._reset()
+                self._stale = True
+                raise
+            self.available = True
+            return True
+
+    def start_loading(self) -> threading.Thread:
+        """Lance le chargement en tâche de fond (sauf chargement en cours)"""
+        with self._lock:
+            if self._loading is None or not self._loading.is_alive():
+                self._loading = threading.Thread(target=self.load, daemon=True)
+                self._loading.start()
+            return self._loading
+
+    def refresh(self, date_debut: Any = None, date_fin: Any = None) -> int:
+        """
+        Relit les partitions mensuelles modifiées de la période
+
+        Les mois dont l'empreinte a changé depuis le dernier chargement sont
+        supprimés puis relus en entier. Si la relecture échoue, le stockage
+        est désactivé (les vues repassent par les requêtes) puis rechargé au
+        changement suivant.
+
+        Args:
+            date_debut: Début de la période modifiée (None = non bornée)
+            date_fin: Fin de la période modifiée (None = non bornée)
+
+        Returns:
+            Nombre de lignes relues
+        """
+        if not self.available:
+            if self._stale:
+                self._stale = False
+                self.start_loading()
+            return 0
+        window = {}
+        if date_debut is not None:
+            window['date_debut'] = sql_bound(period_start(date_debut, 'mois'))
+        if date_fin is not None:
+            window['date_fin'] = sql_bound(period_end(date_fin, 'mois'))
+
+        with self._lock:
+            try:
+                with query_context('export'):
+                    current = fetch_partition_checksums(self.db, self.query_builder, window)
+                    months = changed_partitions(self.checksums, current, window)
+                    self._remove_months(months)
+                    before = len(self)
+                    for start, end in _month_runs(months):
+                        self._append({
+                            'date_debut': sql_bound(start),
+                            'date_fin': sql_bound(end)
+                        })
+                    self.checksums = replace_checksums(self.checksums, current, window)
+            except MemoryBudgetExceeded as e:
+                print(f"Stockage colonnaire désactivé: {e}")
+                self._reset()
+                return 0
+            except Exception as e:
+                print(f"Rafraîchissement du stockage colonnaire impossible, désactivé: {e}")
+                self._reset()
+                self._stale = True
+                return 0
+            return len(self) - before
+
+    def attach(self, notifier):
+        """Rafraîchit le stockage après chaque chargement de données notifié"""
+        notifier.subscribe(lambda event: self.refresh(event.date_debut, event.date_fin))
+
+    def _remove_months(self, months):
+        """Supprime les lignes des mois donnés (avant relecture)"""
+        if not months or not len(self):
+            return
+        month_numbers = self.days.astype('datetime64[D]').astype('datetime64[M]')
+        removed = np.isin(month_numbers, np.array(months, dtype='datetime64[M]'))
+        if removed.any():
+            kept = ~removed
+            for name in ('days', 'product_codes', 'region_codes', 'amounts', 'quantities', 'transactions'):
+                setattr(self, name, getattr(self, name)[kept])
+        self.watermark = (
+            pd.Timestamp(EPOCH + np.timedelta64(int(self.days.max()), 'D')) if len(self) else None
+        )
+
+    def _append(self, filters: Dict[str, Any]):
+        """Lit l'extraction par blocs, encode et ajoute les colonnes"""
+        query, params = self.query_builder.build_extract_query(filters)
+        parts = {name: [] for name in (
+            'days', 'product_codes', 'region_codes', 'amounts', 'quantities', 'transactions'
+        )}
+        rows = 0
+        watermark = self.watermark
+
+        for chunk in self.db.execute_query_chunked(query, params, self.chunksize):
+            rows += len(chunk)
+            if self.budget_bytes and self.nbytes + rows * self.row_bytes > self.budget_bytes:
+                raise MemoryBudgetExceeded(
+                    f"plus de {self.budget_bytes // (1024 * 1024)} Mo après {rows} lignes"
+                )
+
+            dates = pd.to_datetime(chunk['date_vente'])
+            days = (dates.to_numpy(dtype='datetime64[D]') - EPOCH).astype(np.int32)
+            product_codes = self.products.encode(chunk['produit_id'])
+            self._register_products(product_codes, chunk)
+
+            parts['days'].append(days)
+            parts['product_codes'].append(product_codes)
+            parts['region_codes'].append(self.regions.encode(chunk['region_id']))
+            parts['amounts'].append(chunk['montant_vente'].to_numpy(dtype=self.amount_dtype))
+            parts['quantities'].append(chunk['quantite'].to_numpy(dtype=self.amount_dtype))
+            parts['transactions'].append(chunk['transaction_id'].to_numpy(dtype=np.int64))
+
+            if len(chunk):
+                chunk_max = dates.max()
+                watermark = chunk_max if watermark is None else max(watermark, chunk_max)
+
+        for name, arrays in parts.items():
+            if arrays:
+                setattr(self, name, np.concatenate([getattr(self, name)] + arrays))
+        self.watermark = watermark
+
+    def _register_products(self, product_codes: np.ndarray, chunk: pd.DataFrame):
+        """Enregistre catégorie, sous-catégorie et nom des nouveaux produits"""
+        n_products = len(self.products.dictionary)
+        missing = n_products - len(self.product_category)
+        if missing > 0:
+            filler = np.full(missing, -1, dtype=np.int32)
+            self.product_category = np.concatenate([self.product_category, filler])
+            self.product_subcategory = np.concatenate([self.product_subcategory, filler])
+            self.product_name = np.concatenate([self.product_name, filler])
+
+        unknown = self.product_category[product_codes] == -1
+        if unknown.any():
+            rows = chunk[unknown]
+            codes = product_codes[unknown]
+            self.product_category[codes] = self.categories.encode(rows['categorie_principale'])
+            self.product_subcategory[codes] = self.subcategories.encode(rows['sous_categorie'])
+            self.product_name[codes] = self.product_names.encode(rows['nom_produit'])
+
+    def query(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois"
+    ) -> pd.DataFrame:
+        """
+        Équivalent local de QueryBuilder.build_query + execute_query
+
+        Args:
+            indicator_id: ID de l'indicateur à calculer
+            filters: Dictionnaire des filtres {type: valeurs}
+            granularity: Niveau de granularité
+            time_dimension: Dimension temporelle (jour, semaine, mois, annee)
+
+        Returns:
+            DataFrame (valeur, periode, colonnes de granularité)
+        """
+        with self._lock:
+            mask = self._filter_mask(filters)
+            days = self.days[mask]
+            product_codes = self.product_codes[mask]
+
+            periods = self._bucket(days, time_dimension)
+            groups, n_groups = self._group_codes(product_codes, granularity)
+
+            if len(periods):
+                period_min = int(periods.min())
+                keys = (periods - period_min) * n_groups + groups
+            else:
+                period_min = 0
+                keys = np.empty(0, dtype=np.int64)
+
+            # Compactage des clés si le produit cartésien est trop grand
+            span = int(keys.max()) + 1 if len(keys) else 0
+            if span > max(DENSE_GROUP_LIMIT, 4 * len(keys)):
+                key_values, slots = np.unique(keys, return_inverse=True)
+                n_slots = len(key_values)
+            else:
+                key_values, slots, n_slots = None, keys, span
+
+            row_counts = np.bincount(slots, minlength=n_slots)
+            values = self._aggregate(indicator_id, mask, slots, n_slots, row_counts)
+
+            present = np.flatnonzero(row_counts)
+            present_keys = present if key_values is None else key_values[present]
+            result = self._build_frame(
+                values[present],
+                present_keys // n_groups + period_min,
+                present_keys % n_groups,
+                n_groups,
+                granularity,
+                time_dimension
+            )
+
+        return result.sort_values(
+            [col for col in result.columns if col != 'valeur']
+        ).reset_index(drop=True)
+
+    def _filter_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(len(self.days), dtype=bool)
+
+        if filters.get('date_debut'):
+            mask &= self.days >= _day_number(filters['date_debut'])
+        if filters.get('date_apres'):
+            mask &= self.days > _day_number(filters['date_apres'])
+        if filters.get('date_fin'):
+            mask &= self.days <= _day_number(filters['date_fin'])
+
+        if filters.get('region'):
+            wanted = self.regions.dictionary.get_indexer(list(filters['region']))
+            mask &= np.isin(self.region_codes, wanted[wanted >= 0])
+
+        if filters.get('categorie'):
+            wanted = self.categories.dictionary.get_indexer(list(filters['categorie']))
+            product_mask = np.isin(self.product_category, wanted[wanted >= 0])
+            mask &= product_mask[self.product_codes]
+
+        return mask
+
+    @staticmethod
+    def _bucket(days: np.ndarray, time_dimension: str) -> np.ndarray:
+        """Numéro de période (jour, semaine, mois ou année) de chaque ligne"""
+        if time_dimension == 'jour':
+            return days.astype(np.int64)
+        if time_dimension == 'semaine':
+            # Le 01/01/1970 est un jeudi : semaines commençant le lundi
+            return (days.astype(np.int64) + 3) // 7
+        dates = days.astype('datetime64[D]')
+        if time_dimension == 'annee':
+            return dates.astype('datetime64[Y]').astype(np.int64)
+        return dates.astype('datetime64[M]').astype(np.int64)
+
+    @staticmethod
+    def _period_start(periods: np.ndarray, time_dimension: str) -> np.ndarray:
+        """Date de début (DATE_TRUNC) des numéros de période"""
+        if time_dimension == 'jour':
+            return periods.astype('datetime64[D]')
+        if time_dimension == 'semaine':
+            return (periods * 7 - 3).astype('datetime64[D]')
+        if time_dimension == 'annee':
+            return periods.astype('datetime64[Y]').astype('datetime64[D]')
+        return periods.astype('datetime64[M]').astype('datetime64[D]')
+
+    def _group_codes(self, product_codes: np.ndarray, granularity: str) -> tuple:
+        """Code de groupe de chaque ligne et nombre de groupes possibles"""
+        if granularity == 'categorie':
+            return (
+                self.product_category[product_codes].astype(np.int64),
+                max(len(self.categories.dictionary), 1)
+            )
+        if granularity == 'sous_categorie':
+            n_sub = max(len(self.subcategories.dictionary), 1)
+            return (
+                self.product_category[product_codes].astype(np.int64) * n_sub
+                + self.product_subcategory[product_codes],
+                max(len(self.categories.dictionary), 1) * n_sub
+            )
+        if granularity == 'produit':
+            return product_codes.astype(np.int64), max(len(self.products.dictionary), 1)
+        return np.zeros(len(product_codes), dtype=np.int64), 1
+
+    def _aggregate(
+        self,
+        indicator_id: str,
+        mask: np.ndarray,
+        slots: np.ndarray,
+        n_slots: int,
+        row_counts: np.ndarray
+    ) -> np.ndarray:
+        """Calcule l'indicateur par groupe (noyaux bincount)"""
+        if indicator_id == 'quantite_vendue':
+            return np.bincount(slots, weights=self.quantities[mask], minlength=n_slots)
+
+        if indicator_id == 'nombre_transactions':
+            transactions = self.transactions[mask]
+            order = np.lexsort((transactions, slots))
+            sorted_slots = slots[order]
+            sorted_transactions = transactions[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (
+                (sorted_slots[1:] != sorted_slots[:-1])
+                | (sorted_transactions[1:] != sorted_transactions[:-1])
+            )
+            return np.bincount(sorted_slots[first], minlength=n_slots).astype(np.float64)
+
+        sums = np.bincount(slots, weights=self.amounts[mask], minlength=n_slots)
+        if indicator_id == 'panier_moyen':
+            # Même définition que build_query : AVG(montant_vente)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return sums / row_counts
+        return sums
+
+    def _build_frame(
+        self,
+        values: np.ndarray,
+        periods: np.ndarray,
+        groups: np.ndarray,
+        n_groups: int,
+        granularity: str,
+        time_dimension: str
+    ) -> pd.DataFrame:
+        """Assemble le résultat au format de la requête SQL"""
+        result = pd.DataFrame({
+            'valeur': values,
+            'periode': pd.to_datetime(self._period_start(periods, time_dimension))
+        })
+
+        def labels(column: DictionaryColumn, codes: np.ndarray) -> pd.Categorical:
+            return pd.Categorical.from_codes(codes, categories=column.dictionary)
+
+        if granularity == 'categorie':
+            result['categorie_principale'] = labels(self.categories, groups)
+        elif granularity == 'sous_categorie':
+            n_sub = max(len(self.subcategories.dictionary), 1)
+            result['categorie_principale'] = labels(self.categories, groups // n_sub)
+            result['sous_categorie'] = labels(self.subcategories, groups % n_sub)
+        elif granularity == 'produit':
+            result['categorie_principale'] = labels(self.categories, self.product_category[groups])
+            result['sous_categorie'] = labels(self.subcategories, self.product_subcategory[groups])
+            result['produit_id'] = self.products.dictionary.to_numpy()[groups].astype(np.int64)
+            result['nom_produit'] = labels(self.product_names, self.product_name[groups])
+
+        return result
+
+
+# Singleton : None si le stockage colonnaire est désactivé
+_columnar_store = None
+
+def get_columnar_store(background: bool = True) -> Optional[ColumnarSalesStore]:
+    """
+    Retourne le stockage colonnaire partagé, chargé au premier appel (en
+    tâche de fond, ou immédiatement si background est faux) ; None si
+    COLUMNAR_STORE_BUDGET_MB vaut 0
+    """
+    global _columnar_store
+    if not PERFORMANCE_CONFIG['columnar_store_budget_mb']:
+        return None
+    if _columnar_store is None:
+        _columnar_store = ColumnarSalesStore()
+        if background:
+            _columnar_store.start_loading()
+        else:
+            _columnar_store.load()
+    return _columnar_store
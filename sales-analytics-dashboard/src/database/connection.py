@@ -0,0 +1,472 @@
+"""
+Module de gestion de connexion à la base de données
+"""
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+import pandas as pd
+from typing import Dict, Any, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from config.database import (
+    DATABASE_POOLS,
+    DATABASE_SHARDS,
+    DB_MAX_CONNECTIONS,
+    DEFAULT_DATABASE,
+    ENGINE_IDLE_TIMEOUT,
+)
+from src.database.scheduler import QueryScheduler
+from src.utils.metrics import LATENCY_BUCKETS, MetricFamily, get_metrics
+
+load_dotenv()
+
+# Nombre de processus serveur se partageant DB_MAX_CONNECTIONS
+_worker_count = 1
+
+# Lecture par morceaux compactés (budget mémoire de la requête en cours)
+_streaming_reads: ContextVar[bool] = ContextVar('streaming_reads', default=False)
+STREAMING_CHUNKSIZE = 50000
+
+# Attente d'une connexion (créneau de l'ordonnanceur compris)
+CHECKOUT_WAIT = get_metrics().histogram(
+    'dashboard_db_checkout_wait_seconds',
+    "Attente d'une connexion au pool",
+    buckets=(0.001,) + LATENCY_BUCKETS
+)
+
+
+@contextmanager
+def streaming_reads(enabled: bool = True):
+    """
+    Lit les résultats des requêtes du bloc par morceaux
+
+    Chaque morceau est compacté (libellés en catégories) avant le suivant :
+    le pic mémoire de la lecture est environ 4 fois plus faible qu'en une fois.
+    """
+    token = _streaming_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _streaming_reads.reset(token)
+
+
+def _compact_concat(chunks) -> pd.DataFrame:
+    """Assemble des morceaux en convertissant les colonnes texte en catégories"""
+    from pandas.api.types import union_categoricals
+
+    parts = []
+    for chunk in chunks:
+        for column in chunk.select_dtypes('object').columns:
+            chunk[column] = chunk[column].astype('category')
+        parts.append(chunk)
+    if len(parts) <= 1:
+        return parts[0] if parts else pd.DataFrame()
+
+    columns = {}
+    for column in parts[0].columns:
+        if isinstance(parts[0][column].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals([part[column] for part in parts])
+        else:
+            columns[column] = pd.concat([part[column] for part in parts], ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def worker_engine_count(
+    pools: Optional[Dict[str, Dict[str, Any]]] = None,
+    shards: Optional[Dict[int, str]] = None
+) -> int:
+    """
+    Moteurs (pools) qu'un processus serveur peut ouvrir
+
+    La base par défaut, chaque base logique ayant sa propre URL (DB_URL_*)
+    et chaque URL distincte de shard régional (DB_SHARDS).
+    """
+    pools = DATABASE_POOLS if pools is None else pools
+    shards = DATABASE_SHARDS if shards is None else shards
+    databases = {
+        database for database, config in pools.items()
+        if database == DEFAULT_DATABASE or config.get('url')
+    }
+    return max(1, len(databases) + len(set(shards.values())))
+
+
+def worker_pool_size(
+    pool_size: int,
+    max_overflow: int,
+    workers: Optional[int] = None,
+    max_connections: Optional[int] = None,
+    engines: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Tailles de pool d'un processus serveur
+
+    Le budget d'un worker (max_connections / workers) est réparti entre tous
+    les moteurs qu'il peut ouvrir (worker_engine_count) : pool_size +
+    max_overflow est plafonné à max_connections / (workers * engines), pour
+    que le total des pools de tous les workers reste sous la limite du
+    serveur BD. Chaque pool garde au moins une connexion.
+
+    Returns:
+        Tuple (pool_size, max_overflow)
+    """
+    workers = workers or _worker_count
+    engines = engines or worker_engine_count()
+    max_connections = DB_MAX_CONNECTIONS if max_connections is None else max_connections
+    budget = max(1, max_connections // (workers * engines))
+    pool_size = min(pool_size, budget)
+    return pool_size, min(max_overflow, budget - pool_size)
+
+
+class DatabaseConnection:
+    """Gestionnaire de connexion à la base de données"""
+    
+    def __init__(
+        self,
+        connection_string: Optional[str] = None,
+        pool_size: int = 5,
+        max_overflow: int = 10
+    ):
+        """
+        Args:
+            connection_string: URL SQLAlchemy de la BD (ex: shard régional) ;
+                               par défaut, construite depuis les variables
+                               d'environnement DB_*
+            pool_size: Connexions conservées dans le pool
+            max_overflow: Connexions supplémentaires autorisées en pointe
+                          (plafonnées par worker_pool_size)
+        """
+        self.engine = None
+        self.requested_pool = (pool_size, max_overflow)
+        self._init_pool()
+        self._connect(connection_string)
+
+    def _init_pool(self):
+        """Tailles du pool, statistiques et ordonnanceur du processus courant"""
+        self.pool_size, self.max_overflow = worker_pool_size(*self.requested_pool)
+
+        # Statistiques d'attente lors de l'emprunt d'une connexion au pool
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.last_used = time.monotonic()
+
+        # Créneaux par priorité devant le pool (interactive > prefetch > export)
+        self.scheduler = QueryScheduler(capacity=self.pool_size + self.max_overflow)
+
+    def reset_after_fork(self):
+        """
+        Recrée le pool dans un processus forké (worker gunicorn)
+
+        Les connexions héritées appartiennent au processus parent : elles sont
+        abandonnées sans être fermées, puis le moteur est recréé avec les
+        tailles de pool du worker.
+        """
+        url = self.engine.url
+        self.engine.dispose(close=False)
+        self._init_pool()
+        self._connect(url)
+    
+    @property
+    def dialect(self) -> str:
+        """Nom du dialecte SQL de la BD ('postgresql', 'sqlite', ...)"""
+        return self.engine.dialect.name
+    
+    def _connect(self, connection_string: Optional[str] = None):
+        """Établit la connexion à la BD"""
+        if connection_string is None:
+            db_type = os.getenv('DB_TYPE', 'postgresql')
+            db_user = os.getenv('DB_USER')
+            db_password = os.getenv('DB_PASSWORD')
+            db_host = os.getenv('DB_HOST', 'localhost')
+            db_port = os.getenv('DB_PORT', '5432')
+            db_name = os.getenv('DB_NAME')
+            
+            connection_string = (
+                f"{db_type}://{db_user}:{db_password}@"
+                f"{db_host}:{db_port}/{db_name}"
+            )
+        
+        self.engine = create_engine(
+            connection_string,
+            poolclass=QueuePool,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_pre_ping=True  # Vérifie la connexion avant utilisation
+        )
+    
+    @contextmanager
+    def connect(self):
+        """
+        Emprunte une connexion au pool en mesurant le temps d'attente
+        (créneau de l'ordonnanceur, ouverture ou vérification de la connexion)
+
+        Raises:
+            QueryRejected: Aucun créneau disponible pour la priorité courante
+        """
+        started = time.monotonic()
+        with self.scheduler.slot(), self.engine.connect() as connection:
+            waited = time.monotonic() - started
+            CHECKOUT_WAIT.observe(waited)
+            with self._stats_lock:
+                self.checkouts += 1
+                self.checkout_wait_total += waited
+                self.checkout_wait_max = max(self.checkout_wait_max, waited)
+                self.last_used = time.monotonic()
+            try:
+                yield connection
+            finally:
+                self.last_used = time.monotonic()
+    
+    def pool_status(self) -> Dict[str, Any]:
+        """État du pool et temps d'attente de checkout"""
+        pool = self.engine.pool
+        with self._stats_lock:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'checked_out': pool.checkedout(),
+                'idle': pool.checkedin(),
+                'checkouts': self.checkouts,
+                'checkout_wait_avg': (
+                    self.checkout_wait_total / self.checkouts if self.checkouts else 0.0
+                ),
+                'checkout_wait_max': self.checkout_wait_max,
+                'idle_seconds': time.monotonic() - self.last_used,
+                **self.scheduler.stats()
+            }
+    
+    def execute_query(
+        self, 
+        query: str, 
+        params: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Exécute une requête SQL et retourne un DataFrame
+        
+        Args:
+            query: Requête SQL à exécuter
+            params: Paramètres pour la requête préparée
+            
+        Returns:
+            DataFrame pandas avec les résultats (colonnes texte en catégories
+            dans un bloc streaming_reads)
+        """
+        if _streaming_reads.get():
+            return _compact_concat(
+                self.execute_query_chunked(query, params, chunksize=STREAMING_CHUNKSIZE)
+            )
+        try:
+            with self.connect() as connection:
+                result = pd.read_sql_query(
+                    text(query), 
+                    connection, 
+                    params=params
+                )
+                return result
+        except Exception as e:
+            print(f"Erreur lors de l'exécution de la requête: {e}")
+            raise
+    
+    def execute_query_chunked(
+        self, 
+        query: str, 
+        params: Optional[Dict[str, Any]] = None,
+        chunksize: int = 10000
+    ):
+        """
+        Exécute une requête et retourne les résultats par chunks
+        Utile pour les grandes quantités de données
+        """
+        try:
+            with self.connect() as connection:
+                for chunk in pd.read_sql_query(
+                    text(query), 
+                    connection, 
+                    params=params,
+                    chunksize=chunksize
+                ):
+                    yield chunk
+        except Exception as e:
+            print(f"Erreur lors de l'exécution de la requête: {e}")
+            raise
+    
+    def test_connection(self) -> bool:
+        """Teste la connexion à la BD"""
+        try:
+            with self.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            print(f"Échec du test de connexion: {e}")
+            return False
+    
+    def close(self):
+        """Ferme la connexion"""
+        if self.engine:
+            self.engine.dispose()
+
+
+class EngineRegistry:
+    """
+    Connexions par base logique, créées au premier accès
+
+    Chaque base a son propre pool (tailles lues dans DATABASE_POOLS) ; une
+    base sans URL propre partage la connexion de la base par défaut. Les
+    pools inactifs sont vidés pour libérer les connexions du serveur.
+    """
+
+    def __init__(
+        self,
+        pools: Optional[Dict[str, Dict[str, Any]]] = None,
+        idle_timeout: Optional[float] = None
+    ):
+        self.pools = pools if pools is not None else DATABASE_POOLS
+        self.idle_timeout = ENGINE_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self._connections: Dict[str, DatabaseConnection] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def resolve(self, database: Optional[str] = None) -> str:
+        """Base dont la connexion est utilisée pour une base logique"""
+        database = database or DEFAULT_DATABASE
+        if database not in self.pools:
+            raise ValueError(f"Base de données inconnue: {database}")
+        if database != DEFAULT_DATABASE and not self.pools[database].get('url'):
+            return DEFAULT_DATABASE
+        return database
+
+    def get(self, database: Optional[str] = None) -> DatabaseConnection:
+        """Retourne la connexion d'une base logique (créée au premier accès)"""
+        database = self.resolve(database)
+        with self._lock:
+            connection = self._connections.get(database)
+            if connection is None:
+                config = self.pools.get(database, {})
+                connection = DatabaseConnection(
+                    config.get('url'),
+                    pool_size=config.get('pool_size', 5),
+                    max_overflow=config.get('max_overflow', 10)
+                )
+                self._connections[database] = connection
+            return connection
+
+    def evict_idle(self) -> int:
+        """
+        Ferme les connexions des pools inactifs depuis idle_timeout secondes
+
+        Le moteur est conservé : la prochaine requête rouvre une connexion.
+
+        Returns:
+            Nombre de pools vidés
+        """
+        evicted = 0
+        with self._lock:
+            connections = list(self._connections.values())
+        for connection in connections:
+            status = connection.pool_status()
+            if (
+                status['checked_out'] == 0
+                and status['idle'] > 0
+                and status['idle_seconds'] >= self.idle_timeout
+            ):
+                connection.close()
+                evicted += 1
+        return evicted
+
+    def start_eviction(self, interval: Optional[float] = None) -> threading.Thread:
+        """Lance la libération périodique des pools inactifs"""
+        interval = interval or max(self.idle_timeout / 2, 1)
+
+        def run():
+            while not self._stop.wait(interval):
+                self.evict_idle()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """État des pools ouverts, par base"""
+        with self._lock:
+            connections = dict(self._connections)
+        return {
+            database: connection.pool_status()
+            for database, connection in connections.items()
+        }
+
+    def after_fork(self):
+        """Recrée les pools hérités du processus parent (worker forké)"""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        for connection in self._connections.values():
+            connection.reset_after_fork()
+
+    def close(self):
+        """Ferme toutes les connexions"""
+        self._stop.set()
+        with self._lock:
+            for connection in self._connections.values():
+                connection.close()
+
+
+# Registre unique des connexions par base
+_engine_registry = None
+
+def get_engine_registry() -> EngineRegistry:
+    """Retourne le registre des connexions"""
+    global _engine_registry
+    if _engine_registry is None:
+        _engine_registry = EngineRegistry()
+    return _engine_registry
+
+
+def get_db_connection(database: Optional[str] = None) -> DatabaseConnection:
+    """Retourne la connexion BD d'une base logique (base par défaut si omise)"""
+    return get_engine_registry().get(database)
+
+
+def _pool_metrics():
+    """Métriques des pools ouverts, par base"""
+    if _engine_registry is None:
+        return []
+    stats = _engine_registry.stats()
+    families = [
+        ('dashboard_db_pool_checked_out', "Connexions empruntées", 'gauge', 'checked_out'),
+        ('dashboard_db_pool_idle', "Connexions disponibles dans le pool", 'gauge', 'idle'),
+        ('dashboard_db_pool_checkouts_total', "Emprunts de connexion", 'counter', 'checkouts'),
+        ('dashboard_db_pool_checkout_wait_max_seconds', "Attente maximale d'une connexion", 'gauge', 'checkout_wait_max'),
+        ('dashboard_db_queries_waiting', "Requêtes en attente d'un créneau", 'gauge', 'waiting'),
+        ('dashboard_db_queries_rejected_total', "Requêtes refusées par l'ordonnanceur", 'counter', 'rejected')
+    ]
+    return [
+        MetricFamily(name, documentation, kind, [
+            ({'database': database}, status[field]) for database, status in stats.items()
+        ])
+        for name, documentation, kind, field in families
+    ]
+
+
+get_metrics().register_collector(_pool_metrics)
+
+
+def init_worker_connections(workers: int):
+    """
+    Prépare les connexions d'un worker forké
+
+    Les pools hérités du maître (bases logiques et shards) sont recréés ; le
+    total des pools du worker est plafonné à DB_MAX_CONNECTIONS / workers
+    (voir worker_pool_size).
+    """
+    from src.database import shards
+
+    global _worker_count
+    _worker_count = max(1, workers)
+    if _engine_registry is not None:
+        _engine_registry.after_fork()
+    if shards._sharded_database is not None:
+        shards._sharded_database.after_fork()
@@ -0,0 +1,322 @@
+"""
+Module de garde-fou sur le coût des requêtes du dashboard
+
+Avant d'exécuter une vue, le nombre de lignes et le coût estimés sont
+demandés au planificateur (EXPLAIN) ou, à défaut, déduits des cardinalités
+du cache de dimensions (périodes × membres de la granularité). Au-delà du
+budget de PERFORMANCE_CONFIG, la vue est dégradée (grain temporel plus
+grossier, puis granularité agrégée) ou soumise à la confirmation de
+l'utilisateur.
+
+Les estimations sont mises en cache par forme de requête (indicateur,
+granularité, grain temporel, filtres et nombre de périodes).
+
+Avec un budget mémoire par requête, la vue retenue est ensuite adaptée à
+la mémoire estimée : lecture par morceaux, puis N premiers membres, puis
+vue plus agrégée.
+"""
+import json
+from typing import Any, Callable, Iterator, NamedTuple, Optional, Tuple
+
+from config.settings import PERFORMANCE_CONFIG
+from src.database.cache import QueryCache
+from src.database.connection import DatabaseConnection, get_db_connection
+from src.database.date_blocks import to_date
+from src.database.dimensions import DimensionCache, get_dimension_cache
+from src.database.query_builder import QueryBuilder
+from src.database.views import ViewSelection
+from src.utils.metrics import get_metrics
+
+
+# Du grain le plus fin au plus grossier
+TIME_LADDER = ['jour', 'semaine', 'mois', 'annee']
+GRANULARITY_LADDER = ['produit', 'sous_categorie', 'categorie', 'entreprise']
+
+# Mémoire par ligne de résultat (mesurée avec tracemalloc, vue produit × jour) :
+# lecture en une fois ou par morceaux, data-store (DataFrame et JSON),
+# graphique ou tableau (désérialisation et rendu)
+FETCH_BYTES_PER_ROW = 600
+STREAMED_BYTES_PER_ROW = 150
+STORE_BYTES_PER_ROW = 200
+RENDER_BYTES_PER_ROW = 700
+
+# En deçà, une vue top N n'est plus lisible : vue plus agrégée
+MIN_TOP_N = 5
+
+MEMORY_PLANS = get_metrics().counter(
+    'dashboard_memory_plans_total',
+    "Vues adaptées au budget mémoire par requête",
+    ['plan']
+)
+
+
+class QueryEstimate(NamedTuple):
+    """Estimation du résultat d'une requête"""
+    rows: float
+    cost: Optional[float]
+    source: str  # 'explain' ou 'statistiques'
+
+
+class GuardDecision(NamedTuple):
+    """Vue à exécuter après contrôle du coût"""
+    action: str  # 'run', 'downgrade' ou 'confirm'
+    selection: ViewSelection
+    time_dimension: str
+    estimate: QueryEstimate
+    message: Optional[str] = None
+    top_n: Optional[int] = None  # membres conservés (budget mémoire)
+    streaming: bool = False      # lecture par morceaux (budget mémoire)
+
+
+def period_count(start: Any, end: Any, time_dimension: str) -> int:
+    """Nombre de périodes entre deux dates (1 si la plage est ouverte)"""
+    if not start or not end:
+        return 1
+    start, end = to_date(start), to_date(end)
+    if end < start:
+        return 0
+    if time_dimension == 'jour':
+        return (end - start).days + 1
+    if time_dimension == 'semaine':
+        return (end - start).days // 7 + 2
+    if time_dimension == 'annee':
+        return end.year - start.year + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def request_memory(fetched_rows: float, stored_rows: float, streaming: bool = False) -> float:
+    """Pic mémoire estimé (octets) du callback le plus gourmand : lecture ou rendu"""
+    fetch = fetched_rows * (STREAMED_BYTES_PER_ROW if streaming else FETCH_BYTES_PER_ROW)
+    return max(fetch + stored_rows * STORE_BYTES_PER_ROW, stored_rows * RENDER_BYTES_PER_ROW)
+
+
+def parse_explain(plan: Any) -> Tuple[float, float]:
+    """
+    Lignes et coût estimés du nœud racine d'un EXPLAIN (FORMAT JSON) PostgreSQL
+
+    Returns:
+        Tuple (lignes, coût total)
+    """
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]['Plan']
+    return float(root['Plan Rows']), float(root['Total Cost'])
+
+
+class CostGuard:
+    """Contrôle du coût estimé des vues avant exécution"""
+
+    def __init__(
+        self,
+        db: Optional[DatabaseConnection] = None,
+        dimensions: Optional[DimensionCache] = None,
+        max_rows: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        mode: Optional[str] = None,
+        cache: Optional[QueryCache] = None,
+        memory_budget_mb: Optional[float] = None
+    ):
+        """
+        Args:
+            db: Connexion BD pour EXPLAIN (base de la sélection par défaut)
+            dimensions: Cache de dimensions (cardinalités)
+            max_rows: Nombre maximal de lignes estimées
+            max_cost: Coût planificateur maximal (0 = sans limite)
+            mode: 'downgrade' (dégradation automatique), 'confirm'
+                  (confirmation de l'utilisateur) ou 'off'
+            cache: Cache des estimations par forme de requête
+            memory_budget_mb: Budget mémoire par requête (0 = sans limite)
+        """
+        self._db = db
+        self._dimensions = dimensions
+        self.max_rows = max_rows or PERFORMANCE_CONFIG['max_rows_per_query']
+        self.max_cost = PERFORMANCE_CONFIG['max_query_cost'] if max_cost is None else max_cost
+        self.mode = mode or PERFORMANCE_CONFIG['cost_guard_mode']
+        self.cache = cache if cache is not None else QueryCache(
+            default_timeout=PERFORMANCE_CONFIG['cost_estimate_timeout']
+        )
+        self.query_builder = QueryBuilder()
+        self.memory_budget = (
+            PERFORMANCE_CONFIG['request_memory_budget_mb'] if memory_budget_mb is None
+            else memory_budget_mb
+        ) * 1024 * 1024
+
+    @property
+    def dimensions(self) -> DimensionCache:
+        """Cache de dimensions partagé par défaut"""
+        if self._dimensions is None:
+            self._dimensions = get_dimension_cache()
+        return self._dimensions
+
+    def within_budget(self, estimate: QueryEstimate) -> bool:
+        """Indique si l'estimation respecte le budget"""
+        if estimate.rows > self.max_rows:
+            return False
+        return not (self.max_cost and estimate.cost is not None and estimate.cost > self.max_cost)
+
+    def check(
+        self,
+        selection: ViewSelection,
+        time_dimension: str = "mois",
+        confirmed: bool = False
+    ) -> GuardDecision:
+        """
+        Décide comment exécuter une vue
+
+        Args:
+            confirmed: Vue confirmée par l'utilisateur (seul le budget
+                       mémoire s'applique)
+
+        Returns:
+            GuardDecision : 'run' (dans le budget), 'downgrade' (vue dégradée
+            dans le budget) ou 'confirm' (à confirmer par l'utilisateur)
+        """
+        estimate = self.estimate(selection, time_dimension)
+        if confirmed or self.mode == 'off' or self.within_budget(estimate):
+            return self.fit_memory(GuardDecision('run', selection, time_dimension, estimate))
+
+        if self.mode == 'downgrade':
+            found = self._first_downgrade(selection, time_dimension, self.within_budget)
+            if found is not None:
+                candidate, candidate_time, candidate_estimate = found
+                return self.fit_memory(GuardDecision(
+                    'downgrade', candidate, candidate_time, candidate_estimate,
+                    f"Vue simplifiée ({candidate.granularity}, {candidate_time}) : "
+                    f"environ {estimate.rows:,.0f} lignes estimées pour la "
+                    f"sélection demandée (limite {self.max_rows:,})"
+                ))
+
+        return GuardDecision(
+            'confirm', selection, time_dimension, estimate,
+            f"Requête lourde : environ {estimate.rows:,.0f} lignes estimées "
+            f"(limite {self.max_rows:,}). Confirmer l'exécution ?"
+        )
+
+    def fit_memory(self, decision: GuardDecision) -> GuardDecision:
+        """
+        Adapte une vue au budget mémoire par requête
+
+        Dans l'ordre : lecture par morceaux, N premiers membres (les autres
+        regroupés), vue plus agrégée.
+        """
+        budget = self.memory_budget
+        rows = decision.estimate.rows
+        if not budget or request_memory(rows, rows) <= budget:
+            return decision
+        if request_memory(rows, rows, streaming=True) <= budget:
+            MEMORY_PLANS.inc(plan='streaming')
+            return decision._replace(streaming=True)
+
+        selection, time_dimension = decision.selection, decision.time_dimension
+        limit = f"budget mémoire de {budget / 1024 / 1024:,.0f} Mo"
+        if selection.granularity != 'entreprise':
+            periods = max(period_count(selection.start_date, selection.end_date, time_dimension), 1)
+            stored_rows = min(
+                (budget - rows * STREAMED_BYTES_PER_ROW) / STORE_BYTES_PER_ROW,
+                budget / RENDER_BYTES_PER_ROW
+            )
+            # Une série est réservée au regroupement « Autres »
+            top_n = int(stored_rows // periods) - 1
+            if top_n >= MIN_TOP_N:
+                MEMORY_PLANS.inc(plan='top_n')
+                return decision._replace(
+                    action='downgrade', top_n=top_n, streaming=True,
+                    message=f"Vue limitée aux {top_n} premiers membres ({limit}, "
+                            f"environ {rows:,.0f} lignes estimées)"
+                )
+
+        fits = lambda estimate: request_memory(estimate.rows, estimate.rows, True) <= budget
+        found = self._first_downgrade(selection, time_dimension, fits)
+        if found is None:
+            found = (
+                selection._replace(granularity=GRANULARITY_LADDER[-1]), TIME_LADDER[-1], None
+            )
+        candidate, candidate_time, candidate_estimate = found
+        candidate_estimate = candidate_estimate or self.estimate(candidate, candidate_time)
+        MEMORY_PLANS.inc(plan='coarser')
+        return GuardDecision(
+            'downgrade', candidate, candidate_time, candidate_estimate,
+            f"Vue simplifiée ({candidate.granularity}, {candidate_time}) : {limit}, "
+            f"environ {rows:,.0f} lignes estimées pour la vue demandée",
+            streaming=request_memory(candidate_estimate.rows, candidate_estimate.rows) > budget
+        )
+
+    def _first_downgrade(
+        self,
+        selection: ViewSelection,
+        time_dimension: str,
+        accept: Callable[[QueryEstimate], bool]
+    ) -> Optional[Tuple[ViewSelection, str, QueryEstimate]]:
+        """Première vue dégradée dont l'estimation est acceptée"""
+        for candidate, candidate_time in self._downgrades(selection, time_dimension):
+            candidate_estimate = self.estimate(candidate, candidate_time)
+            if accept(candidate_estimate):
+                return candidate, candidate_time, candidate_estimate
+        return None
+
+    def estimate(self, selection: ViewSelection, time_dimension: str = "mois") -> QueryEstimate:
+        """Estimation (mise en cache par forme de requête)"""
+        periods = period_count(selection.start_date, selection.end_date, time_dimension)
+        key = QueryCache.make_key(
+            'estimate',
+            selection._replace(start_date=None, end_date=None),
+            time_dimension,
+            periods
+        )
+        estimate = self.cache.get(key)
+        if estimate is None:
+            estimate = self._explain(selection, time_dimension)
+            if estimate is None:
+                estimate = self._from_statistics(selection, periods)
+            self.cache.set(key, estimate)
+        return estimate
+
+    def _explain(self, selection: ViewSelection, time_dimension: str) -> Optional[QueryEstimate]:
+        """Estimation du planificateur PostgreSQL (None si indisponible)"""
+        try:
+            db = self._db or get_db_connection(selection.database)
+            if db.dialect != 'postgresql':
+                return None
+            query, params = self.query_builder.build_query(
+                selection.indicator, selection.to_filters(),
+                selection.granularity, time_dimension
+            )
+            plan = db.execute_query(f"EXPLAIN (FORMAT JSON) {query}", params)
+            rows, cost = parse_explain(plan.iloc[0, 0])
+            return QueryEstimate(rows, cost, 'explain')
+        except Exception as e:
+            print(f"Estimation EXPLAIN indisponible: {e}")
+            return None
+
+    def _from_statistics(self, selection: ViewSelection, periods: int) -> QueryEstimate:
+        """Majorant du nombre de lignes : périodes × membres de la granularité"""
+        filters = selection.to_filters()
+        members = self.dimensions.member_count(selection.granularity, filters.get('categorie'))
+        return QueryEstimate(float(periods * members), None, 'statistiques')
+
+    @staticmethod
+    def _downgrades(
+        selection: ViewSelection,
+        time_dimension: str
+    ) -> Iterator[Tuple[ViewSelection, str]]:
+        """Vues dégradées, de la plus proche à la plus agrégée"""
+        granularity_index = (
+            GRANULARITY_LADDER.index(selection.granularity)
+            if selection.granularity in GRANULARITY_LADDER else len(GRANULARITY_LADDER) - 1
+        )
+        time_index = TIME_LADDER.index(time_dimension) if time_dimension in TIME_LADDER else 2
+        for granularity in GRANULARITY_LADDER[granularity_index:]:
+            for candidate_time in TIME_LADDER[time_index:]:
+                if (granularity, candidate_time) != (selection.granularity, time_dimension):
+                    yield selection._replace(granularity=granularity), candidate_time
+
+
+# Singleton partagé par les callbacks
+_cost_guard = None
+
+def get_cost_guard() -> CostGuard:
+    """Retourne le garde-fou partagé"""
+    global _cost_guard
+    if _cost_guard is None:
+        _cost_guard = CostGuard()
+    return _cost_guard
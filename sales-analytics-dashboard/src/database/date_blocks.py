@@ -0,0 +1,422 @@
+"""
+Module de découpage des plages de dates en blocs calendaires
+
+Une plage quelconque (ex: 15/03/2023 -> 10/02/2024) est découpée en mois
+entiers plus les jours partiels des extrémités. Chaque bloc est mis en cache
+séparément : décaler la plage d'un mois ne coûte plus qu'un mois de lecture.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from config.settings import CACHE_CONFIG
+from src.database.cache import QueryCache, get_query_cache
+from src.database.connection import DatabaseConnection, get_db_connection
+from src.database.dimensions import DimensionCache
+from src.database.incremental import IncrementalAggregate
+from src.database.query_builder import LATE_LABEL_KEYS, QueryBuilder
+from src.database.shards import ShardedDatabase
+from src.utils.memory import track_memory
+from src.utils.metrics import MEMORY_BUCKETS, get_metrics
+
+
+# Requêtes réellement envoyées à la BD (blocs absents du cache)
+QUERY_DURATION = get_metrics().histogram(
+    'dashboard_db_query_duration_seconds',
+    "Durée des requêtes exécutées sur la BD",
+    ['indicator', 'granularity']
+)
+QUERY_MEMORY = get_metrics().histogram(
+    'dashboard_db_query_memory_bytes',
+    "Mémoire consommée par la lecture des résultats de requêtes",
+    ['indicator', 'granularity'],
+    buckets=MEMORY_BUCKETS
+)
+
+# Grain des blocs selon la dimension temporelle de la requête.
+# Une période ne doit jamais être à cheval sur deux blocs ; les semaines
+# chevauchent les mois, elles ne sont donc pas découpées.
+BLOCK_GRAIN = {
+    'jour': 'month',
+    'mois': 'month',
+    'annee': 'year'
+}
+
+
+class DateBlock(NamedTuple):
+    """Bloc de dates contigu (bornes incluses)"""
+    start: date
+    end: date
+    complete: bool  # True si le bloc couvre un mois / une année entière
+    key: str        # Partition calendaire du bloc ('2024-03', '2024', ...)
+
+
+def to_date(value: Any) -> date:
+    """Convertit une date (str ISO, datetime, Timestamp) en date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _month_end(day: date) -> date:
+    """Dernier jour du mois de la date donnée"""
+    next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def split_date_range(
+    start: Any,
+    end: Any,
+    time_dimension: str = "mois"
+) -> List[DateBlock]:
+    """
+    Découpe une plage de dates en blocs alignés sur le calendrier
+
+    Args:
+        start: Date de début (incluse)
+        end: Date de fin (incluse)
+        time_dimension: Dimension temporelle (jour, semaine, mois, annee)
+
+    Returns:
+        Liste ordonnée des blocs couvrant exactement la plage
+    """
+    start, end = to_date(start), to_date(end)
+    if start > end:
+        return []
+
+    grain = BLOCK_GRAIN.get(time_dimension)
+    if grain is None:
+        return [DateBlock(start, end, False, f"{start}:{end}")]
+
+    blocks = []
+    cursor = start
+    while cursor <= end:
+        if grain == 'year':
+            block_start = date(cursor.year, 1, 1)
+            block_end = date(cursor.year, 12, 31)
+            key = f"{cursor.year:04d}"
+        else:
+            block_start = cursor.replace(day=1)
+            block_end = _month_end(cursor)
+            key = f"{cursor.year:04d}-{cursor.month:02d}"
+
+        stop = min(block_end, end)
+        blocks.append(DateBlock(
+            cursor,
+            stop,
+            cursor == block_start and stop == block_end,
+            key
+        ))
+        cursor = stop + timedelta(days=1)
+
+    return blocks
+
+
+def _contiguous_runs(blocks: List[DateBlock]) -> List[List[DateBlock]]:
+    """Regroupe les blocs consécutifs pour les lire en une seule requête"""
+    runs = []
+    for block in blocks:
+        if runs and runs[-1][-1].end + timedelta(days=1) == block.start:
+            runs[-1].append(block)
+        else:
+            runs.append([block])
+    return runs
+
+
+class BlockedQueryExecutor:
+    """Exécute les requêtes du QueryBuilder par blocs de dates mis en cache"""
+
+    def __init__(
+        self,
+        db: Optional[DatabaseConnection] = None,
+        query_builder: Optional[QueryBuilder] = None,
+        cache: Optional[QueryCache] = None,
+        dimensions: Optional[DimensionCache] = None,
+        shards: Optional[ShardedDatabase] = None,
+        database: Optional[str] = None,
+        incremental: Optional[bool] = None
+    ):
+        """
+        Args:
+            db: Connexion BD (singleton par défaut)
+            query_builder: Constructeur de requêtes (adapté au dialecte de la BD par défaut)
+            cache: Cache des blocs (singleton par défaut)
+            dimensions: Cache de dimensions ; s'il est fourni, les requêtes
+                        au niveau produit ne lisent que les identifiants et
+                        les libellés sont ajoutés depuis la mémoire
+            shards: Bases régionales ; si elles sont fournies, chaque requête
+                    est répartie sur les shards et les résultats fusionnés
+            database: Base logique interrogée (base par défaut si omise)
+            incremental: Résultats sur plage exacte maintenus par watermark
+                         (CACHE_CONFIG['incremental_refresh'] par défaut ;
+                         sans effet sur des shards)
+        """
+        self._db = db
+        self._query_builder = query_builder
+        self.cache = cache if cache is not None else get_query_cache()
+        self.dimensions = dimensions
+        self.shards = shards
+        self.database = database
+        self.incremental = (
+            CACHE_CONFIG['incremental_refresh'] if incremental is None else incremental
+        ) and shards is None
+
+    @property
+    def db(self) -> DatabaseConnection:
+        """Connexion BD, ouverte à la première requête"""
+        if self._db is None:
+            self._db = get_db_connection(self.database)
+        return self._db
+
+    @property
+    def query_builder(self) -> QueryBuilder:
+        """Constructeur de requêtes, adapté par défaut au dialecte de la BD"""
+        if self._query_builder is None:
+            self._query_builder = QueryBuilder.for_connection(self.db)
+        return self._query_builder
+
+    def execute(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois"
+    ) -> pd.DataFrame:
+        """
+        Exécute la requête en ne lisant que les blocs absents du cache
+
+        Args:
+            indicator_id: ID de l'indicateur à calculer
+            filters: Dictionnaire des filtres (date_debut / date_fin incluses)
+            granularity: Niveau de granularité
+            time_dimension: Dimension temporelle
+
+        Returns:
+            DataFrame identique à celui de la requête sur la plage complète
+        """
+        data = self._execute_blocks(indicator_id, filters, granularity, time_dimension)
+        if self.uses_late_labels(granularity):
+            data = self.dimensions.attach_product_labels(data)
+        return data
+
+    def is_cached(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois"
+    ) -> bool:
+        """Indique si le résultat est entièrement servi par le cache"""
+        date_debut = filters.get('date_debut')
+        date_fin = filters.get('date_fin')
+        blocks = split_date_range(date_debut, date_fin, time_dimension) if (
+            date_debut and date_fin and time_dimension in BLOCK_GRAIN
+        ) else []
+        if not blocks:
+            return self._query_key(indicator_id, filters, granularity, time_dimension) in self.cache
+
+        base_filters = {
+            name: value for name, value in filters.items()
+            if name not in ('date_debut', 'date_fin')
+        }
+        return all(
+            self._block_key(indicator_id, base_filters, granularity, time_dimension, block)
+            in self.cache
+            for block in blocks
+        )
+
+    def uses_late_labels(self, granularity: str) -> bool:
+        """Matérialisation tardive des libellés pour cette granularité"""
+        return self.dimensions is not None and granularity in LATE_LABEL_KEYS
+
+    def _execute_blocks(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str
+    ) -> pd.DataFrame:
+        """Assemble le résultat à partir des blocs en cache et des blocs lus"""
+        date_debut = filters.get('date_debut')
+        date_fin = filters.get('date_fin')
+
+        if not date_debut or not date_fin or time_dimension not in BLOCK_GRAIN:
+            # Plage ouverte ou semaines (à cheval sur les mois) : pas de
+            # découpage, cache sur la requête exacte
+            return self._execute_cached(
+                indicator_id, filters, granularity, time_dimension
+            )
+
+        blocks = split_date_range(date_debut, date_fin, time_dimension)
+        if not blocks:
+            return self._execute_cached(
+                indicator_id, filters, granularity, time_dimension
+            )
+
+        base_filters = {
+            name: value for name, value in filters.items()
+            if name not in ('date_debut', 'date_fin')
+        }
+
+        frames = {}
+        missing = []
+        for block in blocks:
+            cached = self.cache.get(self._block_key(
+                indicator_id, base_filters, granularity, time_dimension, block
+            ))
+            if cached is None:
+                missing.append(block)
+            else:
+                frames[block] = cached
+
+        for run in _contiguous_runs(missing):
+            frames.update(self._fetch_run(
+                indicator_id, base_filters, granularity, time_dimension, run
+            ))
+
+        return pd.concat([frames[block] for block in blocks], ignore_index=True)
+
+    def _fetch_run(
+        self,
+        indicator_id: str,
+        base_filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str,
+        run: List[DateBlock]
+    ) -> Dict[DateBlock, pd.DataFrame]:
+        """
+        Lit une suite de blocs consécutifs en une requête, puis répartit
+        les lignes par bloc et les met en cache
+        """
+        filters = dict(
+            base_filters,
+            date_debut=run[0].start.isoformat(),
+            date_fin=run[-1].end.isoformat()
+        )
+        data = self._run_query(indicator_id, filters, granularity, time_dimension)
+
+        if len(run) == 1:
+            partitions = {run[0].key: data}
+        else:
+            grain_format = '%Y' if BLOCK_GRAIN[time_dimension] == 'year' else '%Y-%m'
+            row_keys = pd.to_datetime(data['periode']).dt.strftime(grain_format)
+            partitions = {
+                block.key: data[row_keys == block.key].reset_index(drop=True)
+                for block in run
+            }
+
+        frames = {}
+        for block in run:
+            frame = partitions[block.key]
+            self.cache.set(
+                self._block_key(
+                    indicator_id, base_filters, granularity, time_dimension, block
+                ),
+                frame,
+                meta={
+                    'date_debut': block.start,
+                    'date_fin': block.end,
+                    'regions': base_filters.get('region')
+                }
+            )
+            frames[block] = frame
+        return frames
+
+    def _execute_cached(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str
+    ) -> pd.DataFrame:
+        """
+        Exécute la requête complète avec un cache sur la requête exacte
+
+        La plage couvrant plusieurs partitions, le résultat est maintenu par
+        watermark : un changement notifié le rafraîchit par delta (meta
+        'incremental') au lieu de le purger.
+        """
+        key = self._query_key(indicator_id, filters, granularity, time_dimension)
+        data = self.cache.get(key)
+        if data is None:
+            meta = {
+                'date_debut': filters.get('date_debut'),
+                'date_fin': filters.get('date_fin'),
+                'regions': filters.get('region')
+            }
+            if self.incremental:
+                aggregate = IncrementalAggregate(
+                    indicator_id, filters, granularity, time_dimension,
+                    db=self.db,
+                    query_builder=self.query_builder,
+                    fetch=lambda bounded: self._run_query(
+                        indicator_id, bounded, granularity, time_dimension
+                    )
+                )
+                aggregate.load()
+                data = aggregate.data
+                meta['incremental'] = aggregate
+            else:
+                data = self._run_query(indicator_id, filters, granularity, time_dimension)
+            self.cache.set(key, data, meta=meta)
+        return data.copy()
+
+    def _run_query(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str
+    ) -> pd.DataFrame:
+        """Exécute la requête sur la BD, ou sur les shards régionaux"""
+        late_labels = self.uses_late_labels(granularity)
+        metric_labels = {'indicator': indicator_id, 'granularity': granularity}
+        with QUERY_DURATION.time(**metric_labels), track_memory(QUERY_MEMORY, **metric_labels):
+            if self.shards is not None:
+                return self.shards.execute_aggregate(
+                    indicator_id, filters, granularity, time_dimension, late_labels
+                )
+            query, params = self.query_builder.build_query(
+                indicator_id, filters, granularity, time_dimension,
+                late_labels=late_labels
+            )
+            return self.db.execute_query(query, params)
+
+    def _query_key(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str
+    ) -> str:
+        """Clé de cache de la requête exacte (plages ouvertes)"""
+        query, params = self.query_builder.build_query(
+            indicator_id, filters, granularity, time_dimension,
+            late_labels=self.uses_late_labels(granularity)
+        )
+        return QueryCache.make_key('query', self.database, query, params)
+
+    def _block_key(
+        self,
+        indicator_id: str,
+        base_filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str,
+        block: DateBlock
+    ) -> str:
+        """Clé de cache d'un bloc (indépendante de la plage demandée)"""
+        return QueryCache.make_key(
+            'block',
+            self.database,
+            self.query_builder.base_table,
+            indicator_id,
+            granularity,
+            time_dimension,
+            self.uses_late_labels(granularity),
+            base_filters,
+            block.start.isoformat(),
+            block.end.isoformat()
+        )
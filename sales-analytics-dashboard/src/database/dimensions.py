@@ -0,0 +1,362 @@
+"""
+Module de cache des dimensions (catégories, sous-catégories, produits, régions)
+
+Les membres sont chargés une fois puis conservés en mémoire sous forme de
+tableaux encodés par dictionnaire : les listes déroulantes et les
+correspondances id -> libellé sont servies sans requête SELECT DISTINCT.
+Après chaque chargement de données notifié, les dimensions sont relues en
+entier (produits renommés ou reclassés).
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.database import DIMENSION_TABLES
+from src.database.connection import DatabaseConnection, get_db_connection
+from src.database.query_builder import QueryBuilder
+
+
+class DictionaryColumn:
+    """Colonne encodée par dictionnaire (codes int32 + libellés uniques)"""
+
+    def __init__(self):
+        self.dictionary = pd.Index([], dtype=object)
+        self.codes = np.empty(0, dtype=np.int32)
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """
+        Codes des valeurs, en complétant le dictionnaire si nécessaire
+        (les valeurs manquantes ont le code -1)
+        """
+        values = pd.Series(values).astype(object)
+        new_labels = pd.Index(values.dropna().unique()).difference(self.dictionary)
+        if len(new_labels):
+            self.dictionary = self.dictionary.append(new_labels.sort_values())
+        return self.dictionary.get_indexer(values).astype(np.int32)
+
+    def extend(self, values: pd.Series):
+        """Ajoute des valeurs en fin de colonne"""
+        self.codes = np.concatenate([self.codes, self.encode(values)])
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        """Libellés des lignes aux positions données"""
+        codes = self.codes[positions]
+        labels = self.dictionary.to_numpy()[np.maximum(codes, 0)]
+        return np.where(codes >= 0, labels, None)
+
+    def to_categorical(self, length: Optional[int] = None) -> pd.Categorical:
+        """Vue catégorielle pandas, sans recopie des libellés"""
+        return pd.Categorical.from_codes(
+            self.codes[:length], categories=self.dictionary
+        )
+
+
+class DimensionCache:
+    """Cache en mémoire des membres des dimensions du dashboard"""
+
+    def __init__(
+        self,
+        db: Optional[DatabaseConnection] = None,
+        query_builder: Optional[QueryBuilder] = None
+    ):
+        self._db = db
+        self._query_builder = query_builder
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        """Vide les dimensions"""
+        # Produits (triés par identifiant) et leur rattachement
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.product_names = DictionaryColumn()
+        self.subcategories = DictionaryColumn()
+        self.categories = DictionaryColumn()
+
+        # Régions (triées par identifiant)
+        self.region_ids = np.empty(0, dtype=np.int64)
+        self.region_names = DictionaryColumn()
+
+        self.loaded = False
+
+    @property
+    def db(self) -> DatabaseConnection:
+        """Connexion BD, ouverte à la première requête"""
+        if self._db is None:
+            self._db = get_db_connection()
+        return self._db
+
+    @property
+    def query_builder(self) -> QueryBuilder:
+        """Constructeur de requêtes, adapté par défaut au dialecte de la BD"""
+        if self._query_builder is None:
+            self._query_builder = QueryBuilder.for_connection(self.db)
+        return self._query_builder
+
+    def load(self):
+        """Chargement initial de toutes les dimensions"""
+        with self._lock:
+            self._reset()
+            self._load_products(since_id=None)
+            self._load_regions(since_id=None)
+            self.loaded = True
+
+    def reload(self) -> int:
+        """
+        Relecture complète des dimensions (libellés renommés, produits
+        reclassés)
+
+        Les membres sont lus dans un nouvel état, publié ensuite en une fois :
+        les lecteurs concurrents continuent d'utiliser l'ancien entre-temps.
+
+        Returns:
+            Nombre de membres chargés
+        """
+        fresh = DimensionCache(self.db, self.query_builder)
+        fresh.load()
+        with self._lock:
+            self.product_names = fresh.product_names
+            self.subcategories = fresh.subcategories
+            self.categories = fresh.categories
+            self.region_names = fresh.region_names
+            # Identifiants publiés en dernier (voir _load_products)
+            self.product_ids = fresh.product_ids
+            self.region_ids = fresh.region_ids
+            self.loaded = True
+        return len(fresh.product_ids) + len(fresh.region_ids)
+
+    def refresh(self) -> int:
+        """
+        Rafraîchissement incrémental : lit uniquement les nouveaux membres
+        (produits inconnus rencontrés lors de l'ajout des libellés) ; les
+        membres existants ne sont mis à jour que par reload()
+
+        Returns:
+            Nombre de membres ajoutés
+        """
+        if not self.loaded:
+            self.load()
+            return len(self.product_ids) + len(self.region_ids)
+
+        with self._lock:
+            added = self._load_products(
+                since_id=int(self.product_ids[-1]) if len(self.product_ids) else None
+            )
+            added += self._load_regions(
+                since_id=int(self.region_ids[-1]) if len(self.region_ids) else None
+            )
+        return added
+
+    def ensure_loaded(self):
+        """Charge les dimensions au premier accès"""
+        if not self.loaded:
+            self.load()
+
+    def attach(self, notifier):
+        """Relit les dimensions après chaque chargement de données notifié"""
+        notifier.subscribe(lambda event: self.reload())
+
+    def options(
+        self,
+        dimension: str,
+        all_label: Optional[str] = None,
+        parent: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Options pour un dcc.Dropdown
+
+        Args:
+            dimension: 'categorie', 'sous_categorie', 'produit' ou 'region'
+            all_label: Libellé de l'option 'all' ajoutée en tête (optionnel)
+            parent: Catégorie parente pour filtrer les sous-catégories
+
+        Returns:
+            Liste [{'label': ..., 'value': ...}]
+        """
+        self.ensure_loaded()
+        options = [{'label': all_label, 'value': 'all'}] if all_label else []
+
+        if dimension == 'categorie':
+            labels = self._used_labels(self.categories)
+            options += [{'label': label, 'value': label} for label in labels]
+        elif dimension == 'sous_categorie':
+            mask = slice(None)
+            if parent is not None:
+                mask = self.categories.codes == self.categories.dictionary.get_loc(parent)
+            labels = self._used_labels(self.subcategories, mask)
+            options += [{'label': label, 'value': label} for label in labels]
+        elif dimension == 'produit':
+            names = self.product_names.take(np.arange(len(self.product_ids)))
+            options += [
+                {'label': name, 'value': int(product_id)}
+                for product_id, name in zip(self.product_ids, names)
+            ]
+        elif dimension == 'region':
+            names = self.region_names.take(np.arange(len(self.region_ids)))
+            options += [
+                {'label': name, 'value': int(region_id)}
+                for region_id, name in zip(self.region_ids, names)
+            ]
+        else:
+            raise ValueError(f"Dimension inconnue: {dimension}")
+
+        return options
+
+    def labels(self, dimension: str, ids: Any) -> np.ndarray:
+        """
+        Libellés correspondant à des identifiants (produit ou région)
+
+        Les identifiants inconnus donnent None.
+        """
+        self.ensure_loaded()
+        if dimension == 'produit':
+            known_ids, names = self.product_ids, self.product_names
+        elif dimension == 'region':
+            known_ids, names = self.region_ids, self.region_names
+        else:
+            raise ValueError(f"Dimension inconnue: {dimension}")
+
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(known_ids):
+            return np.full(len(ids), None, dtype=object)
+        positions = np.minimum(np.searchsorted(known_ids, ids), len(known_ids) - 1)
+        found = known_ids[positions] == ids
+        return np.where(found, names.take(positions), None)
+
+    def label(self, dimension: str, member_id: Any) -> Optional[str]:
+        """Libellé d'un identifiant unique"""
+        return self.labels(dimension, [member_id])[0]
+
+    def member_count(self, granularity: str, categories: Optional[List[str]] = None) -> int:
+        """
+        Nombre de membres d'une granularité (lignes par période d'une vue)
+
+        Args:
+            granularity: 'entreprise', 'categorie', 'sous_categorie' ou 'produit'
+            categories: Catégories retenues par le filtre (toutes par défaut)
+        """
+        self.ensure_loaded()
+        if granularity == 'entreprise':
+            return 1
+
+        length = len(self.product_ids)
+        category_codes = self.categories.codes[:length]
+        subcategory_codes = self.subcategories.codes[:length]
+        if categories:
+            wanted = self.categories.dictionary.get_indexer(pd.Index(categories))
+            selected = np.isin(category_codes, wanted[wanted >= 0])
+            category_codes = category_codes[selected]
+            subcategory_codes = subcategory_codes[selected]
+
+        if granularity == 'categorie':
+            return len(np.unique(category_codes))
+        if granularity == 'sous_categorie':
+            return np.unique(np.stack([category_codes, subcategory_codes]), axis=1).shape[1]
+        return len(category_codes)
+
+    def product_frame(self) -> pd.DataFrame:
+        """
+        Table des produits avec libellés catégoriels
+        (produit_id, nom_produit, sous_categorie, categorie_principale)
+        """
+        self.ensure_loaded()
+        product_ids = self.product_ids
+        length = len(product_ids)
+        return pd.DataFrame({
+            'produit_id': product_ids,
+            'nom_produit': self.product_names.to_categorical(length),
+            'sous_categorie': self.subcategories.to_categorical(length),
+            'categorie_principale': self.categories.to_categorical(length)
+        })
+
+    def attach_product_labels(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ajoute les libellés produit à un résultat groupé par produit_id
+
+        Les colonnes categorie_principale, sous_categorie et nom_produit sont
+        reconstituées en colonnes catégorielles depuis la mémoire, dans l'ordre
+        des colonnes de la requête complète.
+        """
+        self.ensure_loaded()
+        positions, found = self._product_positions(data['produit_id'])
+        if not found.all():
+            # Produits apparus depuis le dernier chargement
+            self.refresh()
+            positions, found = self._product_positions(data['produit_id'])
+
+        labelled = {}
+        for name, column in (
+            ('categorie_principale', self.categories),
+            ('sous_categorie', self.subcategories),
+            ('nom_produit', self.product_names)
+        ):
+            codes = np.where(found, column.codes[positions], -1)
+            labelled[name] = pd.Categorical.from_codes(codes, categories=column.dictionary)
+
+        result = data.drop(columns='produit_id')
+        result['categorie_principale'] = labelled['categorie_principale']
+        result['sous_categorie'] = labelled['sous_categorie']
+        result['produit_id'] = data['produit_id']
+        result['nom_produit'] = labelled['nom_produit']
+        return result
+
+    def _product_positions(self, ids: Any) -> tuple:
+        """Positions des identifiants produit et masque des identifiants connus"""
+        ids = np.asarray(ids, dtype=np.int64)
+        product_ids = self.product_ids
+        if not len(product_ids):
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(product_ids, ids), len(product_ids) - 1)
+        return positions, product_ids[positions] == ids
+
+    def _used_labels(self, column: DictionaryColumn, mask: Any = slice(None)) -> List[str]:
+        codes = np.unique(column.codes[mask])
+        return sorted(column.dictionary[codes[codes >= 0]])
+
+    def _load_products(self, since_id: Optional[int]) -> int:
+        query, params = self.query_builder.build_dimension_query(
+            'produit', DIMENSION_TABLES['produit'], since_id
+        )
+        products = self.db.execute_query(query, params)
+        if products.empty:
+            return 0
+        products = products.drop_duplicates('produit_id').sort_values('produit_id')
+
+        # Les identifiants sont publiés en dernier : un lecteur concurrent ne
+        # voit jamais un produit sans ses libellés
+        self.product_names.extend(products['nom_produit'])
+        self.subcategories.extend(products['sous_categorie'])
+        self.categories.extend(products['categorie_principale'])
+        self.product_ids = np.concatenate([
+            self.product_ids, products['produit_id'].to_numpy(dtype=np.int64)
+        ])
+        return len(products)
+
+    def _load_regions(self, since_id: Optional[int]) -> int:
+        query, params = self.query_builder.build_dimension_query(
+            'region', DIMENSION_TABLES['region'], since_id
+        )
+        regions = self.db.execute_query(query, params).dropna(subset=['region_id'])
+        if regions.empty:
+            return 0
+        regions = regions.drop_duplicates('region_id').sort_values('region_id')
+        if 'nom_region' not in regions:
+            regions['nom_region'] = 'Région ' + regions['region_id'].astype(int).astype(str)
+
+        self.region_names.extend(regions['nom_region'])
+        self.region_ids = np.concatenate([
+            self.region_ids, regions['region_id'].to_numpy(dtype=np.int64)
+        ])
+        return len(regions)
+
+
+# Singleton partagé par les callbacks et le layout
+_dimension_cache = None
+
+def get_dimension_cache() -> DimensionCache:
+    """Retourne l'instance unique du cache de dimensions"""
+    global _dimension_cache
+    if _dimension_cache is None:
+        _dimension_cache = DimensionCache()
+    return _dimension_cache
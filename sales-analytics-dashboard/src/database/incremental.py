@@ -0,0 +1,333 @@
+"""
+Module de rafraîchissement incrémental des agrégats par watermark
+
+Les ventes sont essentiellement ajoutées : un agrégat conserve la date de
+vente maximale déjà intégrée (high-water mark). Au rafraîchissement, seul le
+delta postérieur au watermark est lu puis fusionné. Les corrections de
+périodes clôturées sont détectées par une empreinte mensuelle
+(nombre de lignes, somme des montants et des quantités).
+
+Les résultats sur plage exacte du BlockedQueryExecutor (semaines, plages
+ouvertes) sont maintenus ainsi : un changement notifié les rafraîchit au
+lieu de les purger (voir invalidation.CacheInvalidator).
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.database.connection import DatabaseConnection, get_db_connection
+from src.database.query_builder import QueryBuilder
+
+
+# Indicateurs dont les valeurs de deux plages disjointes s'additionnent.
+# nombre_transactions en fait partie : une transaction n'a qu'une date de vente.
+ADDITIVE_INDICATORS = {'ca_total', 'quantite_vendue', 'nombre_transactions'}
+
+
+def period_start(value: Any, time_dimension: str) -> pd.Timestamp:
+    """Début de la période (jour, semaine, mois, année) contenant la date"""
+    day = pd.Timestamp(value).normalize()
+    if time_dimension == 'jour':
+        return day
+    if time_dimension == 'semaine':
+        return day - pd.Timedelta(days=day.weekday())
+    if time_dimension == 'annee':
+        return day.replace(month=1, day=1)
+    return day.replace(day=1)
+
+
+def period_end(value: Any, time_dimension: str) -> pd.Timestamp:
+    """Dernier jour de la période contenant la date"""
+    start = period_start(value, time_dimension)
+    if time_dimension == 'jour':
+        return start
+    if time_dimension == 'semaine':
+        return start + pd.Timedelta(days=6)
+    if time_dimension == 'annee':
+        return start.replace(month=12, day=31)
+    return start + pd.offsets.MonthEnd(0)
+
+
+def sql_bound(value: Any) -> Any:
+    """
+    Borne de date liée en paramètre : texte ISO, comparable à date_vente
+    sous PostgreSQL comme sous SQLite (dates stockées en texte)
+    """
+    if isinstance(value, (datetime, pd.Timestamp)):
+        value = pd.Timestamp(value)
+        if value == value.normalize():
+            return value.date().isoformat()
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def fetch_partition_checksums(
+    db: DatabaseConnection,
+    query_builder: QueryBuilder,
+    filters: Dict[str, Any]
+) -> pd.DataFrame:
+    """Empreintes par partition mensuelle (partition_mois, nb_lignes, somme, quantite)"""
+    query, params = query_builder.build_partition_checksum_query(filters)
+    checksums = db.execute_query(query, params)
+    checksums['partition_mois'] = pd.to_datetime(checksums['partition_mois'])
+    return checksums
+
+
+def changed_partitions(
+    previous: pd.DataFrame,
+    current: pd.DataFrame,
+    filters: Dict[str, Any]
+) -> List[pd.Timestamp]:
+    """
+    Partitions mensuelles dont l'empreinte diffère (lignes ajoutées,
+    supprimées ou corrigées), comparées sur la période des filtres
+    """
+    if filters.get('date_debut'):
+        previous = previous[previous['partition_mois'] >= period_start(filters['date_debut'], 'mois')]
+    if filters.get('date_fin'):
+        previous = previous[previous['partition_mois'] <= pd.Timestamp(filters['date_fin'])]
+    compared = previous.merge(
+        current,
+        on='partition_mois',
+        how='outer',
+        suffixes=('_avant', '_apres')
+    )
+    changed = compared['nb_lignes_avant'] != compared['nb_lignes_apres']
+    for column in ('somme', 'quantite'):
+        changed |= ~compared[f'{column}_avant'].fillna(0).round(6).eq(
+            compared[f'{column}_apres'].fillna(0).round(6)
+        )
+    return sorted(pd.Timestamp(p) for p in compared.loc[changed, 'partition_mois'])
+
+
+def replace_checksums(
+    previous: pd.DataFrame,
+    current: pd.DataFrame,
+    filters: Dict[str, Any]
+) -> pd.DataFrame:
+    """Remplace les empreintes des partitions couvertes par les filtres"""
+    covered = pd.Series(True, index=previous.index)
+    if filters.get('date_debut'):
+        covered &= previous['partition_mois'] >= period_start(filters['date_debut'], 'mois')
+    if filters.get('date_fin'):
+        covered &= previous['partition_mois'] <= pd.Timestamp(filters['date_fin'])
+    kept = previous[~covered]
+    return pd.concat([kept, current], ignore_index=True).sort_values(
+        'partition_mois', ignore_index=True
+    )
+
+
+class IncrementalAggregate:
+    """Résultat de QueryBuilder.build_query maintenu par watermark"""
+
+    def __init__(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois",
+        db: Optional[DatabaseConnection] = None,
+        query_builder: Optional[QueryBuilder] = None,
+        fetch: Optional[Callable[[Dict[str, Any]], pd.DataFrame]] = None
+    ):
+        """
+        Args:
+            fetch: Lecture de l'agrégat pour des filtres donnés (par défaut
+                   build_query sur db) ; l'exécuteur par blocs y passe ses
+                   propres requêtes (libellés tardifs, métriques)
+        """
+        self.indicator_id = indicator_id
+        self.filters = dict(filters)
+        self.granularity = granularity
+        self.time_dimension = time_dimension
+        self._db = db
+        self._query_builder = query_builder
+        self._fetch_function = fetch
+
+        self.data: Optional[pd.DataFrame] = None
+        # Valeur brute de MAX(date_vente), liée telle quelle dans les requêtes
+        self.watermark: Optional[Any] = None
+        self.checksums: Optional[pd.DataFrame] = None
+
+    @property
+    def db(self) -> DatabaseConnection:
+        """Connexion BD, ouverte à la première requête"""
+        if self._db is None:
+            self._db = get_db_connection()
+        return self._db
+
+    @property
+    def query_builder(self) -> QueryBuilder:
+        """Constructeur de requêtes, adapté par défaut au dialecte de la BD"""
+        if self._query_builder is None:
+            self._query_builder = QueryBuilder.for_connection(self.db)
+        return self._query_builder
+
+    def load(self) -> pd.DataFrame:
+        """Calcul complet initial de l'agrégat, du watermark et des empreintes"""
+        self.watermark = self._fetch_watermark()
+        self.data = self._fetch(self._bounded_filters())
+        self.checksums = self._fetch_checksums(self._bounded_filters())
+        return self.to_frame()
+
+    def refresh(self, date_debut: Any = None, date_fin: Any = None) -> Dict[str, Any]:
+        """
+        Met à jour l'agrégat sans tout recalculer
+
+        Args:
+            date_debut: Début de la période modifiée (None = non bornée)
+            date_fin: Fin de la période modifiée (None = non bornée) ; seules
+                      les partitions de cette période sont comparées
+
+        Returns:
+            Résumé {'delta_rows', 'restated_partitions', 'watermark'}
+        """
+        if self.data is None:
+            self.load()
+            return {
+                'delta_rows': len(self.data),
+                'restated_partitions': [],
+                'watermark': self.watermark
+            }
+
+        # 1. Corrections des partitions déjà intégrées (bornées à l'ancien watermark)
+        previous = self.watermark
+        window = self._window(date_debut, date_fin)
+        restated = self._restated_partitions(window)
+        for partition in restated:
+            self._recompute_range(partition, period_end(partition, 'mois'))
+
+        # 2. Delta postérieur au watermark
+        delta_rows = 0
+        new_watermark = self._fetch_watermark()
+        if previous is None:
+            if new_watermark is not None:
+                delta_rows = len(self.load())
+            return {
+                'delta_rows': delta_rows,
+                'restated_partitions': restated,
+                'watermark': self.watermark
+            }
+        if new_watermark is not None and pd.Timestamp(new_watermark) > pd.Timestamp(previous):
+            self.watermark = new_watermark
+            if self.indicator_id in ADDITIVE_INDICATORS:
+                delta = self._fetch(dict(self._bounded_filters(), date_apres=sql_bound(previous)))
+                delta_rows = len(delta)
+                self._merge_additive(delta)
+            else:
+                # Indicateur non additif : on recalcule les périodes ouvertes
+                delta_rows = self._recompute_range(previous, new_watermark)
+
+        if restated or delta_rows:
+            # Empreintes des partitions relues et de celles qui ont reçu le delta
+            start = min([pd.Timestamp(previous)] + restated)
+            self._update_checksums(dict(
+                self._bounded_filters(),
+                date_debut=sql_bound(max(self._range_start(), period_start(start, 'mois')))
+            ))
+
+        return {
+            'delta_rows': delta_rows,
+            'restated_partitions': restated,
+            'watermark': self.watermark
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copie du résultat courant"""
+        return self.data.copy()
+
+    def _key_columns(self) -> List[str]:
+        return [col for col in self.data.columns if col != 'valeur']
+
+    def _range_start(self) -> pd.Timestamp:
+        """Début de la plage de l'agrégat (ou date minimale)"""
+        if self.filters.get('date_debut'):
+            return pd.Timestamp(self.filters['date_debut'])
+        return pd.Timestamp.min
+
+    def _bounded_filters(self) -> Dict[str, Any]:
+        """Filtres bornés au watermark pour un résultat reproductible"""
+        filters = dict(self.filters)
+        if self.watermark is not None and (
+            not filters.get('date_fin')
+            or pd.Timestamp(filters['date_fin']) > pd.Timestamp(self.watermark)
+        ):
+            filters['date_fin'] = sql_bound(self.watermark)
+        return filters
+
+    def _window(self, date_debut: Any, date_fin: Any) -> Dict[str, Any]:
+        """Filtres des partitions à comparer : période modifiée, par mois entiers"""
+        filters = self._bounded_filters()
+        if date_debut is not None:
+            start = max(self._range_start(), period_start(date_debut, 'mois'))
+            filters['date_debut'] = sql_bound(start)
+        if date_fin is not None:
+            end = period_end(date_fin, 'mois')
+            if not filters.get('date_fin') or end < pd.Timestamp(filters['date_fin']):
+                filters['date_fin'] = sql_bound(end)
+        return filters
+
+    def _fetch(self, filters: Dict[str, Any]) -> pd.DataFrame:
+        if self._fetch_function is not None:
+            return self._fetch_function(filters)
+        query, params = self.query_builder.build_query(
+            self.indicator_id, filters, self.granularity, self.time_dimension
+        )
+        return self.db.execute_query(query, params)
+
+    def _fetch_watermark(self) -> Optional[Any]:
+        query, params = self.query_builder.build_watermark_query(self.filters)
+        value = self.db.execute_query(query, params)['watermark'].iloc[0]
+        return None if pd.isna(value) else value
+
+    def _fetch_checksums(self, filters: Dict[str, Any]) -> pd.DataFrame:
+        if self.watermark is None:
+            return pd.DataFrame(columns=['partition_mois', 'nb_lignes', 'somme', 'quantite'])
+        return fetch_partition_checksums(self.db, self.query_builder, filters)
+
+    def _update_checksums(self, filters: Dict[str, Any]):
+        """Remplace les empreintes des partitions couvertes par les filtres"""
+        self.checksums = replace_checksums(
+            self.checksums, self._fetch_checksums(filters), filters
+        )
+
+    def _restated_partitions(self, window: Dict[str, Any]) -> List[pd.Timestamp]:
+        """Partitions mensuelles de la période dont l'empreinte a changé"""
+        if self.watermark is None:
+            return []
+        return changed_partitions(self.checksums, self._fetch_checksums(window), window)
+
+    def _recompute_range(self, start: Any, end: Any) -> int:
+        """
+        Relit toutes les périodes touchant [start, end] et remplace
+        les lignes correspondantes
+        """
+        first = period_start(start, self.time_dimension)
+        last = period_end(end, self.time_dimension)
+
+        filters = self._bounded_filters()
+        fetch_filters = dict(filters, date_debut=sql_bound(max(first, self._range_start())))
+        if not filters.get('date_fin') or pd.Timestamp(filters['date_fin']) > last:
+            fetch_filters['date_fin'] = sql_bound(last)
+
+        fresh = self._fetch(fetch_filters)
+        periods = pd.to_datetime(self.data['periode'])
+        keep = (periods < first) | (periods > last)
+        self.data = self._sorted(pd.concat([self.data[keep], fresh], ignore_index=True))
+        return len(fresh)
+
+    def _merge_additive(self, delta: pd.DataFrame):
+        """Fusionne le delta en additionnant les valeurs par clé"""
+        if delta.empty:
+            return
+        keys = self._key_columns()
+        merged = pd.concat([self.data, delta], ignore_index=True)
+        summed = merged.groupby(keys, dropna=False, as_index=False, sort=False)['valeur'].sum()
+        self.data = self._sorted(summed[self.data.columns])
+
+    def _sorted(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Reproduit l'ordre de la requête (ORDER BY periode, granularité)"""
+        return data.sort_values(self._key_columns(), kind='stable').reset_index(drop=True)
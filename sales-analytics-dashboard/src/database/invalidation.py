@@ -0,0 +1,359 @@
+"""
+Module d'invalidation du cache sur changement des données
+
+Plutôt que d'attendre l'expiration des entrées (CACHE_DEFAULT_TIMEOUT), le
+cache est purgé dès qu'un chargement modifie sales.ventes, et seulement pour
+les entrées dont la période ou la région recoupe le changement.
+
+Sources de notifications :
+    - InProcessNotifier : publication directe dans le processus (tests, ETL local)
+    - PostgresListenNotifier : LISTEN/NOTIFY PostgreSQL
+    - ChangeTablePoller : lecture périodique d'une table de changements
+"""
+import json
+import re
+import select
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from config.settings import CACHE_CONFIG
+from src.database.cache import QueryCache, get_query_cache
+from src.database.connection import DatabaseConnection, get_db_connection
+from src.database.date_blocks import to_date
+
+
+class ChangeEvent(NamedTuple):
+    """Périmètre d'un changement des données (None = non borné)"""
+    date_debut: Optional[date] = None
+    date_fin: Optional[date] = None
+    regions: Optional[List[Any]] = None
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "ChangeEvent":
+        """
+        Construit un événement depuis une charge JSON
+        {"date_debut": "2024-01-01", "date_fin": "2024-01-31", "regions": [1, 2]}
+        """
+        data = json.loads(payload) if payload else {}
+        regions = data.get('regions')
+        if regions is not None and not isinstance(regions, list):
+            regions = [regions]
+        return cls(
+            to_date(data['date_debut']) if data.get('date_debut') else None,
+            to_date(data['date_fin']) if data.get('date_fin') else None,
+            regions
+        )
+
+    def overlaps(self, meta: Dict[str, Any]) -> bool:
+        """Indique si une entrée de cache (métadonnées) est touchée"""
+        entry_start = meta.get('date_debut')
+        entry_end = meta.get('date_fin')
+
+        if self.date_debut and entry_end and to_date(entry_end) < self.date_debut:
+            return False
+        if self.date_fin and entry_start and to_date(entry_start) > self.date_fin:
+            return False
+
+        entry_regions = meta.get('regions')
+        if self.regions and entry_regions:
+            changed = {str(region) for region in self.regions}
+            if not changed.intersection(str(region) for region in entry_regions):
+                return False
+
+        return True
+
+
+class ChangeNotifier:
+    """Source de notifications de changement (base commune)"""
+
+    # Suit les changements de la base elle-même (et non les seuls chargements
+    # publiés dans le processus) : autorise un TTL long du cache
+    external = False
+
+    def __init__(self):
+        self._subscribers: List[Callable[[ChangeEvent], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None]):
+        """Abonne une fonction aux événements de changement"""
+        self._subscribers.append(callback)
+
+    def publish(self, event: ChangeEvent):
+        """Diffuse un événement à tous les abonnés"""
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Erreur lors du traitement d'un changement: {e}")
+
+    def start(self):
+        """Démarre l'écoute en tâche de fond"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Arrête l'écoute"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        """Boucle d'écoute (à définir par les sources externes)"""
+
+
+class InProcessNotifier(ChangeNotifier):
+    """
+    Notifications publiées directement dans le processus
+
+    Sert de substitut aux sources PostgreSQL pour les tests et pour les
+    chargements exécutés dans le même processus que le dashboard.
+    """
+
+    def notify(
+        self,
+        date_debut: Any = None,
+        date_fin: Any = None,
+        regions: Optional[List[Any]] = None
+    ):
+        """Publie un changement sur la période / les régions données"""
+        self.publish(ChangeEvent(
+            to_date(date_debut) if date_debut else None,
+            to_date(date_fin) if date_fin else None,
+            regions
+        ))
+
+
+class PostgresListenNotifier(ChangeNotifier):
+    """
+    Écoute d'un canal PostgreSQL LISTEN/NOTIFY
+
+    Le chargement (ou un trigger) publie le périmètre modifié, par exemple :
+        SELECT pg_notify('ventes_changes',
+            '{"date_debut": "2024-06-01", "date_fin": "2024-06-30", "regions": [3]}');
+
+    En cas de perte de la connexion, l'écoute reprend après un délai
+    croissant (reconnect_delay doublé jusqu'à max_reconnect_delay). Les
+    notifications émises pendant la coupure étant perdues, une purge complète
+    est publiée à la reconnexion.
+    """
+
+    external = True
+
+    def __init__(
+        self,
+        db: Optional[DatabaseConnection] = None,
+        channel: Optional[str] = None,
+        poll_interval: Optional[int] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0
+    ):
+        super().__init__()
+        self.channel = channel or CACHE_CONFIG['notify_channel']
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', self.channel):
+            raise ValueError(f"Nom de canal invalide: {self.channel}")
+        self.poll_interval = poll_interval or CACHE_CONFIG['poll_interval']
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnections = 0
+        self._listening = False
+        self._db = db
+
+    def _run(self):
+        delay = self.reconnect_delay
+        sessions = 0
+        while not self._stop.is_set():
+            self._listening = False
+            try:
+                self._listen(reconnected=sessions > 0)
+            except Exception as e:
+                print(f"Erreur d'écoute du canal {self.channel}: {e}")
+            if self._listening:
+                # La connexion avait été établie : le délai repart du minimum
+                sessions += 1
+                delay = self.reconnect_delay
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _listen(self, reconnected: bool = False):
+        """Session d'écoute sur une connexion, jusqu'à l'arrêt ou une erreur"""
+        db = self._db or get_db_connection()
+        connection = db.engine.raw_connection()
+        try:
+            driver_connection = connection.driver_connection
+            driver_connection.autocommit = True
+            cursor = driver_connection.cursor()
+            cursor.execute(f"LISTEN {self.channel}")
+            self._listening = True
+            if reconnected:
+                # Notifications perdues pendant la coupure : purge complète
+                self.reconnections += 1
+                self.publish(ChangeEvent())
+
+            while not self._stop.is_set():
+                ready, _, _ = select.select([driver_connection], [], [], self.poll_interval)
+                if not ready:
+                    continue
+                driver_connection.poll()
+                while driver_connection.notifies:
+                    notification = driver_connection.notifies.pop(0)
+                    try:
+                        event = ChangeEvent.from_payload(notification.payload)
+                    except (ValueError, KeyError) as e:
+                        print(f"Notification illisible ({e}), purge complète")
+                        event = ChangeEvent()
+                    self.publish(event)
+        finally:
+            connection.close()
+
+
+class ChangeTablePoller(ChangeNotifier):
+    """
+    Lecture périodique d'une table de changements alimentée par le chargement
+
+    Table attendue (id croissant) :
+        CREATE TABLE sales.ventes_changes (
+            id BIGSERIAL PRIMARY KEY,
+            date_debut DATE,
+            date_fin DATE,
+            region_id INTEGER
+        );
+    """
+
+    external = True
+
+    def __init__(
+        self,
+        db: Optional[DatabaseConnection] = None,
+        table: str = "sales.ventes_changes",
+        poll_interval: Optional[int] = None
+    ):
+        super().__init__()
+        self.table = table
+        self.poll_interval = poll_interval or CACHE_CONFIG['poll_interval']
+        self.last_id = None
+        self._db = db
+
+    def poll(self) -> int:
+        """
+        Lit les changements postérieurs au dernier identifiant traité
+
+        Returns:
+            Nombre de changements publiés
+        """
+        db = self._db or get_db_connection()
+        if self.last_id is None:
+            # Premier passage : on part de l'état courant de la table
+            current = db.execute_query(f"SELECT MAX(id) as last_id FROM {self.table}")
+            value = current['last_id'].iloc[0]
+            self.last_id = 0 if pd.isna(value) else int(value)
+            return 0
+
+        changes = db.execute_query(
+            f"""
+            SELECT id, date_debut, date_fin, region_id
+            FROM {self.table}
+            WHERE id > :last_id
+            ORDER BY id
+            """,
+            {'last_id': self.last_id}
+        )
+        for row in changes.itertuples(index=False):
+            self.publish(ChangeEvent(
+                to_date(row.date_debut) if pd.notna(row.date_debut) else None,
+                to_date(row.date_fin) if pd.notna(row.date_fin) else None,
+                [row.region_id] if pd.notna(row.region_id) else None
+            ))
+            self.last_id = int(row.id)
+        return len(changes)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Erreur de lecture des changements: {e}")
+            self._stop.wait(self.poll_interval)
+
+
+class CacheInvalidator:
+    """
+    Purge les entrées du cache touchées par les changements notifiés
+
+    Les entrées maintenues par watermark (meta 'incremental', voir
+    incremental.IncrementalAggregate) sont rafraîchies par delta ; elles ne
+    sont purgées qu'en cas d'échec du rafraîchissement.
+    """
+
+    def __init__(
+        self,
+        notifier: ChangeNotifier,
+        cache: Optional[QueryCache] = None
+    ):
+        self.notifier = notifier
+        self.cache = cache if cache is not None else get_query_cache()
+        self.evicted = 0
+        self.refreshed = 0
+        notifier.subscribe(self.on_change)
+
+    def on_change(self, event: ChangeEvent) -> int:
+        """
+        Traite les entrées recoupant le changement
+
+        Returns:
+            Nombre d'entrées purgées
+        """
+        evicted = 0
+        for key, meta in self.cache.matching(event.overlaps):
+            aggregate = meta.get('incremental')
+            if aggregate is not None:
+                try:
+                    aggregate.refresh(event.date_debut, event.date_fin)
+                    if self.cache.replace(key, aggregate.data):
+                        self.refreshed += 1
+                    continue
+                except Exception as e:
+                    print(f"Rafraîchissement incrémental impossible, purge de l'entrée: {e}")
+            self.cache.delete(key)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+
+def create_notifier(db: Optional[DatabaseConnection] = None) -> ChangeNotifier:
+    """Crée la source de notifications définie par CACHE_NOTIFIER"""
+    notifier_type = CACHE_CONFIG['notifier']
+    if notifier_type == 'listen':
+        return PostgresListenNotifier(db)
+    if notifier_type == 'poll':
+        return ChangeTablePoller(db)
+    if notifier_type == 'local':
+        return InProcessNotifier()
+    raise ValueError(f"Type de notification inconnu: {notifier_type}")
+
+
+def install_cache_invalidation(
+    notifier: Optional[ChangeNotifier] = None,
+    cache: Optional[QueryCache] = None
+) -> CacheInvalidator:
+    """
+    Branche l'invalidation sur changement devant le cache
+
+    Lorsque la source suit les changements de la base (listen, poll), les
+    données sont purgées dès qu'elles changent et la durée de vie par défaut
+    du cache passe à CACHE_INVALIDATED_TIMEOUT. Avec la source locale, seuls
+    les chargements du processus sont notifiés : le TTL court est conservé.
+    """
+    notifier = notifier or create_notifier()
+    invalidator = CacheInvalidator(notifier, cache)
+    if notifier.external:
+        invalidator.cache.default_timeout = CACHE_CONFIG['invalidated_timeout']
+    notifier.start()
+    return invalidator
@@ -0,0 +1,574 @@
+"""
+Module de construction dynamique de requêtes SQL
+"""
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+
+
+# Clés entières utilisées à la place des libellés (late_labels=True)
+LATE_LABEL_KEYS = {
+    'produit': ['produit_id']
+}
+
+# Agrégats partiels fusionnables entre shards (somme des sommes et des comptages)
+PARTIAL_MEASURES = {
+    'ca_total': ['SUM(montant_vente) as somme'],
+    'quantite_vendue': ['SUM(quantite) as somme'],
+    'nombre_transactions': ['COUNT(DISTINCT transaction_id) as nombre'],
+    'panier_moyen': ['SUM(montant_vente) as somme', 'COUNT(montant_vente) as nombre'],
+}
+
+# Agrégats d'échantillon : somme, somme des carrés et effectif (estimation
+# de la valeur et de sa marge d'erreur)
+SAMPLE_MEASURES = {
+    'ca_total': [
+        'SUM(montant_vente) as somme',
+        'SUM(montant_vente * montant_vente) as somme_carres',
+        'COUNT(montant_vente) as nombre'
+    ],
+    'quantite_vendue': [
+        'SUM(quantite) as somme',
+        'SUM(quantite * quantite) as somme_carres',
+        'COUNT(quantite) as nombre'
+    ],
+    'nombre_transactions': [
+        'COUNT(DISTINCT transaction_id) as somme',
+        'COUNT(DISTINCT transaction_id) as somme_carres',
+        'COUNT(DISTINCT transaction_id) as nombre'
+    ],
+}
+SAMPLE_MEASURES['panier_moyen'] = SAMPLE_MEASURES['ca_total']
+
+# Expressions de la dimension temporelle par dialecte SQL
+TIME_EXPRESSIONS = {
+    'postgresql': {
+        'jour': "DATE(date_vente)",
+        'semaine': "DATE_TRUNC('week', date_vente)",
+        'mois': "DATE_TRUNC('month', date_vente)",
+        'annee': "DATE_TRUNC('year', date_vente)"
+    },
+    'sqlite': {
+        'jour': "DATE(date_vente)",
+        'semaine': "DATE(date_vente, '-6 days', 'weekday 1')",
+        'mois': "DATE(date_vente, 'start of month')",
+        'annee': "DATE(date_vente, 'start of year')"
+    }
+}
+
+
+class QueryBuilder:
+    """Constructeur de requêtes SQL dynamiques"""
+    
+    def __init__(self, schema: Optional[str] = "sales", dialect: str = "postgresql"):
+        """
+        Args:
+            schema: Schéma de la table de faits (None : table sans schéma, ex. SQLite)
+            dialect: Dialecte SQL ('postgresql' ou 'sqlite')
+        """
+        if dialect not in TIME_EXPRESSIONS:
+            raise ValueError(f"Dialecte SQL non supporté: {dialect}")
+        self.schema = schema
+        self.dialect = dialect
+        self.base_table = f"{schema}.ventes" if schema else "ventes"
+
+    @classmethod
+    def for_connection(cls, db, schema: Optional[str] = "sales") -> 'QueryBuilder':
+        """
+        Constructeur adapté au dialecte d'une connexion
+
+        SQLite n'a pas de schéma : la table de faits y est lue sans préfixe.
+        """
+        dialect = db.dialect
+        return cls(schema=None if dialect == 'sqlite' else schema, dialect=dialect)
+        
+    def build_query(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois",
+        late_labels: bool = False
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit une requête SQL dynamique
+        
+        Args:
+            indicator_id: ID de l'indicateur à calculer
+            filters: Dictionnaire des filtres {type: valeurs}
+            granularity: Niveau de granularité (entreprise, categorie, produit)
+            time_dimension: Dimension temporelle (jour, semaine, mois, annee)
+            late_labels: Grouper uniquement par clés entières ; les libellés
+                         sont ajoutés après lecture (cache de dimensions)
+            
+        Returns:
+            Tuple (query_string, params_dict)
+        """
+        # Mapping des indicateurs vers les colonnes
+        indicator_mapping = {
+            'ca_total': 'SUM(montant_vente) as valeur',
+            'quantite_vendue': 'SUM(quantite) as valeur',
+            'nombre_transactions': 'COUNT(DISTINCT transaction_id) as valeur',
+            'panier_moyen': 'AVG(montant_vente) as valeur',
+        }
+        
+        # Construction de la clause SELECT
+        select_parts = [indicator_mapping.get(indicator_id, 'SUM(montant_vente) as valeur')]
+        group_by_parts = []
+        
+        # Ajout de la dimension temporelle
+        time_expr = self.time_expression(time_dimension)
+        select_parts.append(f"{time_expr} as periode")
+        group_by_parts.append(time_expr)
+        
+        # Ajout des dimensions de granularité
+        granularity_columns = self.granularity_columns(granularity, late_labels)
+        for col in granularity_columns:
+            select_parts.append(col)
+            group_by_parts.append(col)
+        
+        # Construction de la clause WHERE
+        where_clauses, params = self._build_where_clauses(filters)
+
+        # Assemblage de la requête
+        query = f"""
+        SELECT
+            {', '.join(select_parts)}
+        FROM {self.base_table}
+        """
+        
+        if where_clauses:
+            query += f"\nWHERE {' AND '.join(where_clauses)}"
+        
+        if group_by_parts:
+            query += f"\nGROUP BY {', '.join(group_by_parts)}"
+        
+        query += "\nORDER BY periode"
+        
+        if granularity_columns:
+            query += ", " + ", ".join(granularity_columns)
+        
+        return query, params
+    
+    def build_partial_query(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois",
+        late_labels: bool = False,
+        distinct_pairs: bool = False
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit la requête d'agrégats partiels exécutée sur chaque shard
+
+        Les colonnes de regroupement sont celles de build_query ; la valeur
+        est remplacée par des agrégats fusionnables (somme, nombre).
+
+        Args:
+            indicator_id: ID de l'indicateur à calculer
+            filters: Dictionnaire des filtres
+            granularity: Niveau de granularité
+            time_dimension: Dimension temporelle
+            late_labels: Grouper uniquement par clés entières
+            distinct_pairs: Pour nombre_transactions, renvoyer les couples
+                            (groupe, transaction_id) au lieu d'un comptage,
+                            lorsque des transactions peuvent être réparties
+                            sur plusieurs shards
+
+        Returns:
+            Tuple (query_string, params_dict)
+        """
+        time_expr = self.time_expression(time_dimension)
+        granularity_columns = self.granularity_columns(granularity, late_labels)
+        group_by_parts = [time_expr] + granularity_columns
+
+        if distinct_pairs and indicator_id == 'nombre_transactions':
+            measures = ['transaction_id']
+            group_by_parts.append('transaction_id')
+        else:
+            measures = PARTIAL_MEASURES.get(indicator_id, PARTIAL_MEASURES['ca_total'])
+
+        where_clauses, params = self._build_where_clauses(filters)
+
+        query = f"""
+        SELECT
+            {', '.join([f"{time_expr} as periode"] + granularity_columns + measures)}
+        FROM {self.base_table}
+        """
+
+        if where_clauses:
+            query += f"\nWHERE {' AND '.join(where_clauses)}"
+
+        query += f"\nGROUP BY {', '.join(group_by_parts)}"
+
+        return query, params
+
+    def build_sample_query(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois",
+        percent: float = 1.0,
+        late_labels: bool = False,
+        seed: int = 42
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit la requête d'aperçu sur un échantillon de la table de faits
+
+        PostgreSQL lit un pourcentage des pages (TABLESAMPLE SYSTEM) ; SQLite,
+        sans TABLESAMPLE, tire les lignes au hasard.
+
+        Args:
+            indicator_id: ID de l'indicateur à calculer
+            filters: Dictionnaire des filtres
+            granularity: Niveau de granularité
+            time_dimension: Dimension temporelle
+            percent: Pourcentage de la table échantillonné
+            late_labels: Grouper uniquement par clés entières
+            seed: Graine de l'échantillon (aperçus reproductibles)
+
+        Returns:
+            Tuple (query_string, params_dict) ; colonnes periode, granularité,
+            somme, somme_carres et nombre
+        """
+        time_expr = self.time_expression(time_dimension)
+        granularity_columns = self.granularity_columns(granularity, late_labels)
+        measures = SAMPLE_MEASURES.get(indicator_id, SAMPLE_MEASURES['ca_total'])
+
+        where_clauses, params = self._build_where_clauses(filters)
+        if self.dialect == 'sqlite':
+            source = self.base_table
+            where_clauses.append("ABS(RANDOM()) % 1000000 < :sample_threshold")
+            params['sample_threshold'] = int(percent * 10000)
+        else:
+            source = (
+                f"{self.base_table} TABLESAMPLE SYSTEM (:sample_percent) "
+                f"REPEATABLE (:sample_seed)"
+            )
+            params['sample_percent'] = percent
+            params['sample_seed'] = seed
+
+        query = f"""
+        SELECT
+            {', '.join([f"{time_expr} as periode"] + granularity_columns + measures)}
+        FROM {source}
+        """
+
+        if where_clauses:
+            query += f"\nWHERE {' AND '.join(where_clauses)}"
+
+        query += f"\nGROUP BY {', '.join([time_expr] + granularity_columns)}"
+        query += "\nORDER BY periode"
+
+        if granularity_columns:
+            query += ", " + ", ".join(granularity_columns)
+
+        return query, params
+
+    def time_expression(self, time_dimension: str) -> str:
+        """Expression SQL de la période (début de jour, semaine, mois ou année)"""
+        expressions = TIME_EXPRESSIONS[self.dialect]
+        return expressions.get(time_dimension, expressions['mois'])
+
+    @staticmethod
+    def granularity_columns(granularity: str, late_labels: bool = False) -> List[str]:
+        """Colonnes de regroupement d'une granularité"""
+        granularity_mapping = {
+            'entreprise': [],
+            'categorie': ['categorie_principale'],
+            'sous_categorie': ['categorie_principale', 'sous_categorie'],
+            'produit': ['categorie_principale', 'sous_categorie', 'produit_id', 'nom_produit']
+        }
+        if late_labels and granularity in LATE_LABEL_KEYS:
+            return list(LATE_LABEL_KEYS[granularity])
+        return list(granularity_mapping.get(granularity, []))
+
+    def build_hierarchy_query(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        hierarchy_levels: List[str],
+        time_periods: List[str]
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit une requête pour un tableau hiérarchique
+        
+        Args:
+            indicator_id: ID de l'indicateur
+            filters: Dictionnaire des filtres
+            hierarchy_levels: Liste des niveaux ['categorie', 'sous_categorie', 'produit']
+            time_periods: Liste des périodes à afficher
+            
+        Returns:
+            Tuple (query_string, params_dict)
+        """
+        indicator_mapping = {
+            'ca_total': 'SUM(montant_vente)',
+            'quantite_vendue': 'SUM(quantite)',
+            'nombre_transactions': 'COUNT(DISTINCT transaction_id)',
+        }
+        
+        indicator_expr = indicator_mapping.get(indicator_id, 'SUM(montant_vente)')
+        
+        # Construction des colonnes de hiérarchie
+        hierarchy_cols = ', '.join(hierarchy_levels)
+        
+        # Construction des périodes
+        # Utilise FILTER pour PostgreSQL ou CASE pour MySQL
+        period_columns = []
+        for period in time_periods:
+            col = f"""
+            {indicator_expr} FILTER (
+                WHERE DATE_TRUNC('month', date_vente) = '{period}'::timestamp
+            ) as "{period}"
+            """
+            period_columns.append(col)
+        
+        # Construction WHERE
+        where_clauses = []
+        params = {}
+        
+        if 'region' in filters and filters['region']:
+            where_clauses.append("region_id = ANY(:regions)")
+            params['regions'] = filters['region']
+        
+        if 'date_debut' in filters:
+            where_clauses.append("date_vente >= :date_debut")
+            params['date_debut'] = filters['date_debut']
+        
+        if 'date_fin' in filters:
+            where_clauses.append("date_vente <= :date_fin")
+            params['date_fin'] = filters['date_fin']
+        
+        # Assemblage
+        query = f"""
+        SELECT 
+            {hierarchy_cols},
+            {', '.join(period_columns)}
+        FROM {self.base_table}
+        """
+        
+        if where_clauses:
+            query += f"\nWHERE {' AND '.join(where_clauses)}"
+        
+        query += f"\nGROUP BY {hierarchy_cols}"
+        query += f"\nORDER BY {hierarchy_cols}"
+        
+        return query, params
+    
+    def build_comparison_query(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        compare_dimension: str = "annee"
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit une requête pour comparer des périodes
+        Exemple: Comparer 2023 vs 2024
+        """
+        indicator_mapping = {
+            'ca_total': 'SUM(montant_vente) as valeur',
+            'quantite_vendue': 'SUM(quantite) as valeur',
+        }
+        
+        indicator_expr = indicator_mapping.get(indicator_id, 'SUM(montant_vente) as valeur')
+        
+        compare_mapping = {
+            'annee': "EXTRACT(YEAR FROM date_vente)",
+            'mois': "TO_CHAR(date_vente, 'YYYY-MM')",
+            'trimestre': "TO_CHAR(date_vente, 'YYYY-Q')"
+        }
+        
+        compare_expr = compare_mapping.get(compare_dimension, "EXTRACT(YEAR FROM date_vente)")
+        
+        query = f"""
+        SELECT 
+            {compare_expr} as periode,
+            {indicator_expr}
+        FROM {self.base_table}
+        WHERE date_vente BETWEEN :date_debut AND :date_fin
+        GROUP BY {compare_expr}
+        ORDER BY periode
+        """
+        
+        params = {
+            'date_debut': filters.get('date_debut'),
+            'date_fin': filters.get('date_fin')
+        }
+
+        return query, params
+
+    def build_watermark_query(
+        self,
+        filters: Dict[str, Any]
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit la requête du high-water mark (date de vente maximale)
+        sur le périmètre des filtres
+        """
+        where_clauses, params = self._build_where_clauses(filters)
+
+        query = f"""
+        SELECT
+            MAX(date_vente) as watermark
+        FROM {self.base_table}
+        """
+
+        if where_clauses:
+            query += f"\nWHERE {' AND '.join(where_clauses)}"
+
+        return query, params
+
+    def build_partition_checksum_query(
+        self,
+        filters: Dict[str, Any]
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit la requête d'empreinte par partition mensuelle
+        (nombre de lignes, somme des montants et des quantités)
+
+        Permet de détecter les corrections de périodes déjà clôturées.
+        """
+        where_clauses, params = self._build_where_clauses(filters)
+        partition_expr = self.time_expression('mois')
+
+        query = f"""
+        SELECT
+            {partition_expr} as partition_mois,
+            COUNT(*) as nb_lignes,
+            SUM(montant_vente) as somme,
+            SUM(quantite) as quantite
+        FROM {self.base_table}
+        """
+
+        if where_clauses:
+            query += f"\nWHERE {' AND '.join(where_clauses)}"
+
+        query += f"\nGROUP BY {partition_expr}"
+        query += "\nORDER BY partition_mois"
+
+        return query, params
+
+    def build_dimension_query(
+        self,
+        dimension: str,
+        table: Optional[str] = None,
+        since_id: Optional[int] = None
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit la requête de chargement des membres d'une dimension
+
+        Args:
+            dimension: 'produit' (avec sous-catégorie et catégorie) ou 'region'
+            table: Table de dimension ; à défaut, une seule passe DISTINCT
+                   sur la table de faits
+            since_id: Ne lire que les membres d'identifiant supérieur
+                      (rafraîchissement incrémental)
+
+        Returns:
+            Tuple (query_string, params_dict)
+        """
+        if dimension == 'produit':
+            id_column = 'produit_id'
+            columns = ['produit_id', 'nom_produit', 'sous_categorie', 'categorie_principale']
+        elif dimension == 'region':
+            id_column = 'region_id'
+            columns = ['region_id', 'nom_region'] if table else ['region_id']
+        else:
+            raise ValueError(f"Dimension inconnue: {dimension}")
+
+        query = f"""
+        SELECT DISTINCT
+            {', '.join(columns)}
+        FROM {table or self.base_table}
+        """
+
+        params = {}
+        if since_id is not None:
+            query += f"\nWHERE {id_column} > :since_id"
+            params['since_id'] = since_id
+
+        query += f"\nORDER BY {id_column}"
+
+        return query, params
+
+    def build_extract_query(
+        self,
+        filters: Dict[str, Any]
+    ) -> tuple[str, Dict[str, Any]]:
+        """
+        Construit la requête d'extraction ligne à ligne de la table de faits
+        (chargement du stockage colonnaire en mémoire)
+        """
+        where_clauses, params = self._build_where_clauses(filters)
+
+        query = f"""
+        SELECT
+            date_vente, categorie_principale, sous_categorie, produit_id,
+            nom_produit, region_id, montant_vente, quantite, transaction_id
+        FROM {self.base_table}
+        """
+
+        if where_clauses:
+            query += f"\nWHERE {' AND '.join(where_clauses)}"
+
+        query += "\nORDER BY date_vente"
+
+        return query, params
+
+    def _build_where_clauses(
+        self,
+        filters: Dict[str, Any]
+    ) -> tuple[List[str], Dict[str, Any]]:
+        """
+        Construit les clauses WHERE communes à partir des filtres
+        """
+        where_clauses = []
+        params = {}
+
+        if filters.get('region'):
+            where_clauses.append(
+                self._in_clause('region_id', 'regions', filters['region'], params)
+            )
+
+        if filters.get('categorie'):
+            where_clauses.append(
+                self._in_clause('categorie_principale', 'categories', filters['categorie'], params)
+            )
+
+        if filters.get('date_debut'):
+            where_clauses.append("date_vente >= :date_debut")
+            params['date_debut'] = filters['date_debut']
+
+        if filters.get('date_apres'):
+            # Borne exclusive, utilisée pour lire le delta après un watermark
+            where_clauses.append("date_vente > :date_apres")
+            params['date_apres'] = filters['date_apres']
+
+        if filters.get('date_fin'):
+            where_clauses.append("date_vente <= :date_fin")
+            params['date_fin'] = filters['date_fin']
+
+        return where_clauses, params
+
+    def _in_clause(
+        self,
+        column: str,
+        name: str,
+        values: List[Any],
+        params: Dict[str, Any]
+    ) -> str:
+        """
+        Condition d'appartenance à une liste de valeurs
+
+        PostgreSQL reçoit un tableau (ANY) ; SQLite, sans type tableau, un
+        paramètre par valeur.
+        """
+        if self.dialect == 'sqlite':
+            names = [f"{name}_{position}" for position in range(len(values))]
+            params.update(zip(names, values))
+            return f"{column} IN ({', '.join(':' + param for param in names)})"
+
+        params[name] = values
+        return f"{column} = ANY(:{name})"
@@ -0,0 +1,110 @@
+"""
+Module d'aperçu approximatif des vues (résultats progressifs)
+
+Pour les requêtes absentes du cache, un aperçu est calculé sur un
+échantillon de la table de faits (QueryBuilder.build_sample_query) et
+affiché immédiatement, avec une marge d'erreur à 95 %, en attendant le
+résultat exact.
+
+Estimateurs, pour une fraction d'échantillonnage q :
+- sommes et comptages : total de l'échantillon / q,
+  variance (1 - q) / q² × somme des carrés
+- panier_moyen : moyenne de l'échantillon, variance s² / n
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config.database import DEFAULT_DATABASE
+from config.settings import PERFORMANCE_CONFIG
+from src.database.columnar_store import get_columnar_store
+from src.database.date_blocks import BlockedQueryExecutor
+from src.database.views import ViewSelection, get_view_executor
+
+
+# Quantile de la loi normale pour un intervalle de confiance à 95 %
+Z_95 = 1.96
+
+
+def estimate_from_sample(
+    sample: pd.DataFrame,
+    indicator_id: str,
+    fraction: float
+) -> pd.DataFrame:
+    """
+    Estime les valeurs de la vue complète à partir des agrégats d'échantillon
+
+    Args:
+        sample: Résultat de build_sample_query (periode, granularité,
+                somme, somme_carres, nombre)
+        indicator_id: ID de l'indicateur
+        fraction: Fraction de la table échantillonnée (0 < q <= 1)
+
+    Returns:
+        DataFrame (valeur, marge, periode, colonnes de granularité) ; la
+        marge est la demi-largeur de l'intervalle de confiance à 95 %
+    """
+    key_columns = [
+        column for column in sample.columns
+        if column not in ('somme', 'somme_carres', 'nombre')
+    ]
+    somme = sample['somme'].astype(float)
+    somme_carres = sample['somme_carres'].astype(float)
+    nombre = sample['nombre'].astype(float)
+
+    if indicator_id == 'panier_moyen':
+        valeur = somme / nombre
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (somme_carres - nombre * valeur ** 2) / (nombre - 1)
+            marge = Z_95 * np.sqrt(variance.clip(lower=0) / nombre)
+    else:
+        valeur = somme / fraction
+        marge = Z_95 * np.sqrt((1 - fraction) / fraction ** 2 * somme_carres)
+
+    result = sample[key_columns].copy()
+    result.insert(0, 'valeur', valeur)
+    result.insert(1, 'marge', marge.fillna(0))
+    return result
+
+
+def load_preview(
+    selection: ViewSelection,
+    time_dimension: str = "mois",
+    executor: Optional[BlockedQueryExecutor] = None,
+    percent: Optional[float] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Aperçu approximatif d'une vue
+
+    Returns:
+        DataFrame (valeur, marge, periode, colonnes de granularité), ou None
+        si le résultat exact est immédiat (cache, stockage colonnaire) ou si
+        la vue est répartie sur des shards
+    """
+    percent = percent or PERFORMANCE_CONFIG['preview_sample_percent']
+    filters = selection.to_filters()
+
+    if selection.database == DEFAULT_DATABASE and executor is None:
+        store = get_columnar_store()
+        if store is not None and store.available:
+            return None
+
+    executor = executor or get_view_executor(selection.database)
+    if executor.shards is not None or executor.is_cached(
+        selection.indicator, filters, selection.granularity, time_dimension
+    ):
+        return None
+
+    late_labels = executor.uses_late_labels(selection.granularity)
+    query, params = executor.query_builder.build_sample_query(
+        selection.indicator, filters, selection.granularity, time_dimension,
+        percent=percent,
+        late_labels=late_labels
+    )
+    sample = executor.db.execute_query(query, params)
+
+    preview = estimate_from_sample(sample, selection.indicator, percent / 100)
+    if late_labels:
+        preview = executor.dimensions.attach_product_labels(preview)
+    return preview
@@ -0,0 +1,234 @@
+"""
+Module d'ordonnancement des requêtes devant le pool de connexions
+
+Chaque requête emprunte un créneau avant d'obtenir une connexion :
+- trois classes de priorité (interactive > prefetch > export), chacune avec
+  sa propre limite de requêtes simultanées, pour que les requêtes de fond
+  n'occupent jamais tout le pool ;
+- une file d'attente bornée : au-delà, ou après le délai d'attente, la
+  requête est refusée immédiatement (QueryRejected) ;
+- équité entre utilisateurs : à priorité égale, le créneau libéré va à
+  l'utilisateur qui a le moins de requêtes en cours, puis le moins servi
+  récemment (compteur divisé par deux à chaque demi-vie).
+
+La priorité et l'utilisateur sont portés par le contexte d'exécution
+(query_context), sans modifier la signature des appels à la BD.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from config.settings import PERFORMANCE_CONFIG
+
+
+# Classes de priorité, de la plus prioritaire à la moins prioritaire
+PRIORITIES = ['interactive', 'prefetch', 'export']
+
+_current_priority: ContextVar[str] = ContextVar('query_priority', default='interactive')
+_current_user: ContextVar[Optional[str]] = ContextVar('query_user', default=None)
+
+
+class QueryRejected(Exception):
+    """Requête refusée : file d'attente pleine ou délai d'attente dépassé"""
+
+
+@contextmanager
+def query_context(priority: Optional[str] = None, user: Optional[str] = None):
+    """
+    Définit la priorité et l'utilisateur des requêtes exécutées dans le bloc
+
+    Exemple:
+        with query_context('prefetch'):
+            load_view(selection)
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"Priorité inconnue: {priority}")
+    tokens = []
+    if priority is not None:
+        tokens.append((_current_priority, _current_priority.set(priority)))
+    if user is not None:
+        tokens.append((_current_user, _current_user.set(user)))
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+
+class _Ticket:
+    """Demande de créneau en attente"""
+
+    __slots__ = ('priority', 'user', 'order', 'granted')
+
+    def __init__(self, priority: str, user: Optional[str], order: int):
+        self.priority = priority
+        self.user = user
+        self.order = order
+        self.granted = False
+
+
+class QueryScheduler:
+    """Contrôle d'admission et ordonnancement par priorité des requêtes"""
+
+    def __init__(
+        self,
+        capacity: int,
+        limits: Optional[Dict[str, int]] = None,
+        queue_size: Optional[int] = None,
+        wait_timeout: Optional[float] = None,
+        fairness_halflife: Optional[float] = None
+    ):
+        """
+        Args:
+            capacity: Requêtes simultanées au total (taille maximale du pool)
+            limits: Requêtes simultanées par priorité (plafonnées à capacity)
+            queue_size: Nombre maximal de requêtes en attente
+            wait_timeout: Attente maximale d'un créneau (secondes)
+            fairness_halflife: Intervalle de division par deux des requêtes
+                               servies par utilisateur (secondes)
+        """
+        limits = limits or {
+            'interactive': PERFORMANCE_CONFIG['scheduler_interactive_slots'] or capacity,
+            'prefetch': PERFORMANCE_CONFIG['scheduler_prefetch_slots'],
+            'export': PERFORMANCE_CONFIG['scheduler_export_slots']
+        }
+        self.capacity = capacity
+        self.limits = {
+            priority: max(1, min(limits.get(priority, capacity), capacity))
+            for priority in PRIORITIES
+        }
+        self.queue_size = (
+            PERFORMANCE_CONFIG['scheduler_queue_size'] if queue_size is None
+            else queue_size
+        )
+        self.wait_timeout = (
+            PERFORMANCE_CONFIG['scheduler_wait_timeout'] if wait_timeout is None
+            else wait_timeout
+        )
+        self.fairness_halflife = (
+            PERFORMANCE_CONFIG['scheduler_fairness_halflife'] if fairness_halflife is None
+            else fairness_halflife
+        )
+
+        self._condition = threading.Condition()
+        self._waiting: List[_Ticket] = []
+        self._running = {priority: 0 for priority in PRIORITIES}
+        self._running_by_user: Dict[Optional[str], int] = {}
+        # Requêtes servies récemment, par utilisateur (adresse du client)
+        self._served_by_user: Dict[Optional[str], int] = {}
+        self._next_decay = time.monotonic() + self.fairness_halflife
+        self._order = itertools.count()
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, user: Optional[str] = None):
+        """
+        Réserve un créneau pour la durée du bloc
+
+        Args:
+            priority: Classe de priorité (celle du contexte par défaut)
+            user: Utilisateur à l'origine de la requête (celui du contexte par défaut)
+
+        Raises:
+            QueryRejected: File pleine ou délai d'attente dépassé
+        """
+        ticket = self._acquire(
+            priority or _current_priority.get(),
+            user if user is not None else _current_user.get()
+        )
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def stats(self) -> Dict[str, int]:
+        """Requêtes en cours par priorité, en attente et refusées"""
+        with self._condition:
+            stats = {f"running_{priority}": count for priority, count in self._running.items()}
+            stats['waiting'] = len(self._waiting)
+            stats['rejected'] = self.rejected
+            stats['tracked_users'] = len(self._served_by_user)
+            return stats
+
+    def _acquire(self, priority: str, user: Optional[str]) -> _Ticket:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Priorité inconnue: {priority}")
+
+        with self._condition:
+            ticket = _Ticket(priority, user, next(self._order))
+            self._waiting.append(ticket)
+            self._dispatch()
+
+            if not ticket.granted and len(self._waiting) > self.queue_size:
+                # Refus immédiat plutôt qu'une attente qui dépasserait le délai
+                self._waiting.remove(ticket)
+                self.rejected += 1
+                raise QueryRejected(
+                    f"File d'attente pleine ({self.queue_size} requêtes), requête {priority} refusée"
+                )
+
+            deadline = time.monotonic() + self.wait_timeout
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self.rejected += 1
+                    raise QueryRejected(
+                        f"Aucune connexion disponible après {self.wait_timeout}s, "
+                        f"requête {priority} refusée"
+                    )
+                self._condition.wait(remaining)
+            return ticket
+
+    def _release(self, ticket: _Ticket):
+        with self._condition:
+            self._running[ticket.priority] -= 1
+            self._running_by_user[ticket.user] -= 1
+            if not self._running_by_user[ticket.user]:
+                del self._running_by_user[ticket.user]
+            self._dispatch()
+
+    def _decay_served(self):
+        """
+        Divise par deux les requêtes servies à chaque demi-vie écoulée et
+        oublie les utilisateurs revenus à zéro (verrou détenu)
+        """
+        now = time.monotonic()
+        if now < self._next_decay:
+            return
+        halvings = 1 + int((now - self._next_decay) // self.fairness_halflife)
+        self._next_decay = now + self.fairness_halflife
+        self._served_by_user = {
+            user: count >> halvings
+            for user, count in self._served_by_user.items()
+            if count >> halvings
+        }
+
+    def _dispatch(self):
+        """Attribue les créneaux libres aux demandes en attente (verrou détenu)"""
+        self._decay_served()
+        granted = False
+        while self._waiting and sum(self._running.values()) < self.capacity:
+            eligible = [
+                ticket for ticket in self._waiting
+                if self._running[ticket.priority] < self.limits[ticket.priority]
+            ]
+            if not eligible:
+                break
+            ticket = min(eligible, key=lambda ticket: (
+                PRIORITIES.index(ticket.priority),
+                self._running_by_user.get(ticket.user, 0),
+                self._served_by_user.get(ticket.user, 0),
+                ticket.order
+            ))
+            self._waiting.remove(ticket)
+            ticket.granted = True
+            self._running[ticket.priority] += 1
+            self._running_by_user[ticket.user] = self._running_by_user.get(ticket.user, 0) + 1
+            self._served_by_user[ticket.user] = self._served_by_user.get(ticket.user, 0) + 1
+            granted = True
+        if granted:
+            self._condition.notify_all()
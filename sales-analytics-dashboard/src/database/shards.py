@@ -0,0 +1,219 @@
+"""
+Module d'interrogation des bases régionales (shards par region_id)
+
+Chaque shard reçoit la même requête d'agrégats partiels
+(QueryBuilder.build_partial_query), exécutée en parallèle ; les résultats
+partiels sont fusionnés pour reproduire build_query sur l'ensemble des régions :
+
+- ca_total, quantite_vendue : somme des sommes
+- panier_moyen : somme des montants / nombre de ventes (moyenne pondérée)
+- nombre_transactions : somme des comptages distincts lorsque chaque
+  transaction appartient à une seule région, sinon fusion en deux phases
+  des couples (groupe, transaction_id)
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from config.database import DATABASE_SHARDS
+from config.settings import PERFORMANCE_CONFIG
+from src.database.connection import DatabaseConnection
+from src.database.query_builder import QueryBuilder
+
+
+class Shard(NamedTuple):
+    """Base régionale et régions qu'elle contient"""
+    regions: Tuple[int, ...]
+    db: DatabaseConnection
+    query_builder: QueryBuilder
+
+
+def merge_partials(
+    partials: List[pd.DataFrame],
+    indicator_id: str,
+    key_columns: List[str],
+    distinct_pairs: bool = False
+) -> pd.DataFrame:
+    """
+    Fusionne les agrégats partiels des shards
+
+    Args:
+        partials: Résultats de build_partial_query, un par shard
+        indicator_id: ID de l'indicateur
+        key_columns: Colonnes de regroupement (periode puis granularité)
+        distinct_pairs: Les partiels contiennent des couples
+                        (groupe, transaction_id) à dédoublonner
+
+    Returns:
+        DataFrame au format de build_query (valeur, periode, granularité)
+    """
+    partials = [partial for partial in partials if not partial.empty]
+    if not partials:
+        return pd.DataFrame(columns=['valeur'] + key_columns)
+
+    data = pd.concat(partials, ignore_index=True)
+    groups = data.groupby(key_columns, dropna=False, sort=False, observed=True)
+
+    if distinct_pairs:
+        valeur = groups['transaction_id'].nunique()
+    else:
+        measures = [column for column in ('somme', 'nombre') if column in data]
+        sums = groups[measures].sum(min_count=1)
+        if indicator_id == 'panier_moyen':
+            valeur = sums['somme'] / sums['nombre']
+        elif indicator_id == 'nombre_transactions':
+            valeur = sums['nombre']
+        else:
+            valeur = sums['somme']
+
+    result = valeur.rename('valeur').reset_index()
+    result = result.sort_values(key_columns, na_position='last', kind='stable')
+    return result[['valeur'] + key_columns].reset_index(drop=True)
+
+
+class ShardedDatabase:
+    """Ensemble de bases régionales interrogées en parallèle"""
+
+    def __init__(
+        self,
+        shards: Dict[int, Union[str, DatabaseConnection]],
+        schema: str = "sales",
+        workers: Optional[int] = None,
+        disjoint_transactions: Optional[bool] = None
+    ):
+        """
+        Args:
+            shards: {region_id: URL SQLAlchemy ou DatabaseConnection} ; les
+                    régions d'une même URL partagent une connexion
+            schema: Schéma de la table de faits (ignoré pour SQLite)
+            workers: Nombre maximal de shards interrogés simultanément
+            disjoint_transactions: Chaque transaction appartient à une seule
+                                   région (comptages distincts additifs)
+        """
+        connections = {}
+        regions = {}
+        for region_id, target in shards.items():
+            key = target if isinstance(target, str) else id(target)
+            if key not in connections:
+                connections[key] = (
+                    DatabaseConnection(target) if isinstance(target, str) else target
+                )
+            regions.setdefault(key, []).append(int(region_id))
+
+        self.shards = [
+            Shard(
+                regions=tuple(sorted(regions[key])),
+                db=db,
+                query_builder=QueryBuilder.for_connection(db, schema)
+            )
+            for key, db in connections.items()
+        ]
+        self.workers = workers or PERFORMANCE_CONFIG['shard_workers']
+        self.disjoint_transactions = (
+            PERFORMANCE_CONFIG['shard_disjoint_transactions']
+            if disjoint_transactions is None else disjoint_transactions
+        )
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, min(self.workers, len(self.shards))),
+            thread_name_prefix='shard'
+        )
+
+    def after_fork(self):
+        """
+        Recrée les pools des shards et les threads d'interrogation hérités
+        du processus parent (worker forké)
+        """
+        for shard in self.shards:
+            shard.db.reset_after_fork()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, min(self.workers, len(self.shards))),
+            thread_name_prefix='shard'
+        )
+
+    def shards_for(self, filters: Dict[str, Any]) -> List[Shard]:
+        """Shards concernés par le filtre de régions (tous par défaut)"""
+        if not filters.get('region'):
+            return list(self.shards)
+        wanted = {int(region_id) for region_id in filters['region']}
+        return [shard for shard in self.shards if wanted.intersection(shard.regions)]
+
+    def execute_aggregate(
+        self,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str = "mois",
+        late_labels: bool = False
+    ) -> pd.DataFrame:
+        """
+        Équivalent de build_query + execute_query sur l'ensemble des shards
+
+        Args:
+            indicator_id: ID de l'indicateur à calculer
+            filters: Dictionnaire des filtres
+            granularity: Niveau de granularité
+            time_dimension: Dimension temporelle
+            late_labels: Grouper uniquement par clés entières
+
+        Returns:
+            DataFrame (valeur, periode, colonnes de granularité)
+        """
+        distinct_pairs = (
+            indicator_id == 'nombre_transactions' and not self.disjoint_transactions
+        )
+        # Chaque shard hérite de la priorité et de l'utilisateur de l'appelant
+        futures = [
+            self._pool.submit(
+                contextvars.copy_context().run,
+                self._fetch_partial, shard, indicator_id, filters,
+                granularity, time_dimension, late_labels, distinct_pairs
+            )
+            for shard in self.shards_for(filters)
+        ]
+        partials = [future.result() for future in futures]
+
+        key_columns = ['periode'] + QueryBuilder.granularity_columns(granularity, late_labels)
+        return merge_partials(partials, indicator_id, key_columns, distinct_pairs)
+
+    def close(self):
+        """Ferme les connexions aux shards"""
+        self._pool.shutdown()
+        for shard in self.shards:
+            shard.db.close()
+
+    def _fetch_partial(
+        self,
+        shard: Shard,
+        indicator_id: str,
+        filters: Dict[str, Any],
+        granularity: str,
+        time_dimension: str,
+        late_labels: bool,
+        distinct_pairs: bool
+    ) -> pd.DataFrame:
+        query, params = shard.query_builder.build_partial_query(
+            indicator_id, filters, granularity, time_dimension,
+            late_labels=late_labels,
+            distinct_pairs=distinct_pairs
+        )
+        try:
+            partial = shard.db.execute_query(query, params)
+        except Exception as e:
+            print(f"Erreur sur le shard des régions {shard.regions}: {e}")
+            raise
+        # Les dialectes renvoient la période en date, texte ou timestamp
+        partial['periode'] = pd.to_datetime(partial['periode'])
+        return partial
+
+
+# Singleton partagé (None si aucun shard n'est configuré)
+_sharded_database = None
+
+def get_sharded_database() -> Optional[ShardedDatabase]:
+    """Retourne l'ensemble des shards régionaux configurés"""
+    global _sharded_database
+    if _sharded_database is None and DATABASE_SHARDS:
+        _sharded_database = ShardedDatabase(DATABASE_SHARDS)
+    return _sharded_database
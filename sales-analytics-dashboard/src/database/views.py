@@ -0,0 +1,220 @@
+"""
+Module de chargement des vues du dashboard (sélection des filtres -> données)
+"""
+import threading
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from config.database import DEFAULT_DATABASE
+from config.settings import PERFORMANCE_CONFIG
+from src.database.cache import QueryCache
+from src.database.columnar_store import get_columnar_store
+from src.database.date_blocks import BlockedQueryExecutor, to_date
+from src.database.dimensions import get_dimension_cache
+from src.database.shards import get_sharded_database
+from src.utils.metrics import get_metrics
+
+
+# Colonne de segmentation des graphiques selon la granularité
+STACK_COLUMNS = {
+    'entreprise': None,
+    'categorie': 'categorie_principale',
+    'sous_categorie': 'sous_categorie',
+    'produit': 'nom_produit'
+}
+
+# Chargement des vues (cache, BD ou stockage colonnaire)
+VIEW_DURATION = get_metrics().histogram(
+    'dashboard_view_duration_seconds',
+    "Durée de chargement des vues",
+    ['indicator', 'granularity', 'source']
+)
+
+# Indicateurs dont la valeur d'un groupe de membres est la somme des membres
+# (regroupement « Autres » d'une vue top N ; sinon, les autres sont omis)
+MEMBER_ADDITIVE_INDICATORS = {'ca_total', 'quantite_vendue'}
+OTHERS_LABEL = 'Autres'
+
+# Format des périodes du data-store selon la dimension temporelle
+PERIOD_FORMATS = {
+    'jour': '%Y-%m-%d',
+    'semaine': '%Y-%m-%d',
+    'mois': '%Y-%m',
+    'annee': '%Y'
+}
+
+
+class ViewSelection(NamedTuple):
+    """Sélection de l'utilisateur dans les filtres du dashboard"""
+    indicator: str
+    category: str
+    granularity: str
+    region: str
+    start_date: Any
+    end_date: Any
+    database: str = DEFAULT_DATABASE
+
+    def to_filters(self) -> Dict[str, Any]:
+        """Convertit la sélection en filtres pour le QueryBuilder"""
+        filters = {}
+        if self.region and self.region != 'all':
+            filters['region'] = [self.region]
+        if self.category and self.category != 'all':
+            filters['categorie'] = [self.category]
+        if self.start_date:
+            filters['date_debut'] = to_date(self.start_date).isoformat()
+        if self.end_date:
+            filters['date_fin'] = to_date(self.end_date).isoformat()
+        return filters
+
+    def combination(self) -> Tuple[str, str, str, str]:
+        """Combinaison de filtres hors période"""
+        return (self.indicator, self.category, self.granularity, self.region)
+
+
+class QueryLog:
+    """Journal en mémoire des combinaisons de filtres demandées"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, selection: ViewSelection):
+        """Enregistre une demande de vue"""
+        with self._lock:
+            self._counts[selection.combination()] += 1
+
+    def most_common(self, k: int) -> List[Tuple[str, str, str, str]]:
+        """Retourne les k combinaisons les plus fréquentes"""
+        with self._lock:
+            return [combination for combination, _ in self._counts.most_common(k)]
+
+
+# Singletons partagés entre les callbacks
+_view_executors = {}
+_query_log = None
+
+def get_view_executor(database: str = DEFAULT_DATABASE) -> BlockedQueryExecutor:
+    """Retourne l'exécuteur de requêtes partagé par les vues d'une base"""
+    if database not in _view_executors:
+        default = database == DEFAULT_DATABASE
+        # Dimensions et shards régionaux décrivent la base par défaut
+        _view_executors[database] = BlockedQueryExecutor(
+            dimensions=(
+                get_dimension_cache()
+                if default and PERFORMANCE_CONFIG['late_labels'] else None
+            ),
+            shards=get_sharded_database() if default else None,
+            database=database
+        )
+    return _view_executors[database]
+
+
+def get_query_log() -> QueryLog:
+    """Retourne le journal des requêtes partagé"""
+    global _query_log
+    if _query_log is None:
+        _query_log = QueryLog()
+    return _query_log
+
+
+def load_view(
+    selection: ViewSelection,
+    executor: Optional[BlockedQueryExecutor] = None,
+    time_dimension: str = "mois"
+) -> pd.DataFrame:
+    """
+    Charge les données d'une vue
+
+    Les vues sont calculées en mémoire par le stockage colonnaire lorsqu'il
+    est activé et chargé, sinon via l'exécuteur par blocs mis en cache.
+
+    Args:
+        selection: Sélection des filtres
+        executor: Exécuteur de requêtes (partagé par défaut)
+        time_dimension: Dimension temporelle
+
+    Returns:
+        DataFrame (periode, valeur, colonnes de granularité)
+    """
+    default = selection.database == DEFAULT_DATABASE
+    store = get_columnar_store() if executor is None and default else None
+    if store is not None and store.available:
+        with VIEW_DURATION.time(
+            indicator=selection.indicator, granularity=selection.granularity, source='colonnaire'
+        ):
+            return store.query(
+                selection.indicator,
+                selection.to_filters(),
+                selection.granularity,
+                time_dimension
+            )
+
+    executor = executor or get_view_executor(selection.database)
+    with VIEW_DURATION.time(
+        indicator=selection.indicator, granularity=selection.granularity, source='requetes'
+    ):
+        return executor.execute(
+            selection.indicator,
+            selection.to_filters(),
+            selection.granularity,
+            time_dimension
+        )
+
+
+def to_store_frame(
+    data: pd.DataFrame,
+    granularity: str,
+    time_dimension: str = "mois",
+    top_n: Optional[int] = None,
+    indicator: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Met le résultat de la requête au format du data-store
+    (periode 'YYYY-MM', 'YYYY' ou 'YYYY-MM-DD', categorie, valeur, et marge
+    pour un aperçu approximatif)
+
+    Args:
+        top_n: Ne garder que les N membres de plus forte valeur totale
+               (budget mémoire) ; les autres sont regroupés dans « Autres »
+               pour un indicateur additif, omis sinon
+        indicator: Indicateur de la vue (regroupement des autres membres)
+    """
+    stack_column = STACK_COLUMNS.get(granularity)
+    period_format = PERIOD_FORMATS.get(time_dimension, '%Y-%m')
+    frame = pd.DataFrame({
+        'periode': pd.to_datetime(data['periode']).dt.strftime(period_format),
+        'categorie': data[stack_column] if stack_column else 'Total',
+        'valeur': data['valeur']
+    })
+    if 'marge' in data:
+        frame['marge'] = data['marge']
+    if top_n and stack_column and frame['categorie'].nunique() > top_n:
+        frame = _keep_top_members(frame, top_n, indicator in MEMBER_ADDITIVE_INDICATORS)
+    return frame
+
+
+def _keep_top_members(frame: pd.DataFrame, top_n: int, group_others: bool) -> pd.DataFrame:
+    """Garde les top_n membres et regroupe (ou omet) les autres"""
+    top = frame.groupby('categorie', observed=True)['valeur'].sum().nlargest(top_n).index
+    kept = frame['categorie'].isin(top)
+    if not group_others:
+        return frame[kept].reset_index(drop=True)
+
+    others = frame[~kept].groupby('periode', sort=False)
+    grouped = pd.DataFrame({'valeur': others['valeur'].sum()})
+    if 'marge' in frame:
+        # Marges d'erreur supposées indépendantes
+        grouped['marge'] = others['marge'].apply(lambda marge: (marge ** 2).sum() ** 0.5)
+    grouped = grouped.reset_index()
+    grouped['categorie'] = OTHERS_LABEL
+
+    result = pd.concat([frame[kept].astype({'categorie': object}), grouped], ignore_index=True)
+    return result[frame.columns].sort_values('periode', kind='stable').reset_index(drop=True)
+
+
+def view_key(selection: ViewSelection, time_dimension: str = "mois") -> str:
+    """Identifiant d'une sélection et de son pas de temps (associe un aperçu au résultat exact)"""
+    return QueryCache.make_key('view', selection, time_dimension)
@@ -0,0 +1,194 @@
+"""
+Module de préchauffage du cache et de préchargement des vues probables
+
+- Au démarrage et après chaque chargement de données : calcul de la vue par
+  défaut et des combinaisons de filtres les plus demandées.
+- Pendant l'inactivité de chaque utilisateur : préchargement de l'étape
+  suivante évidente (granularité immédiatement plus fine).
+"""
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from config.database import DEFAULT_DATABASE
+from config.settings import CACHE_CONFIG
+from src.database.date_blocks import BlockedQueryExecutor
+from src.database.invalidation import ChangeNotifier
+from src.database.scheduler import query_context
+from src.database.views import (
+    QueryLog,
+    ViewSelection,
+    get_query_log,
+    get_view_executor,
+    load_view,
+)
+
+
+# Granularité suivante lors d'un drill-down
+NEXT_GRANULARITY = {
+    'entreprise': 'categorie',
+    'categorie': 'sous_categorie',
+    'sous_categorie': 'produit'
+}
+
+
+def default_selection(today: Optional[date] = None) -> ViewSelection:
+    """Vue affichée à l'ouverture du dashboard (12 derniers mois)"""
+    today = today or date.today()
+    return ViewSelection(
+        indicator='ca_total',
+        category='all',
+        granularity='entreprise',
+        region='all',
+        start_date=today - timedelta(days=365),
+        end_date=today
+    )
+
+
+class CacheWarmer:
+    """Planificateur de préchauffage et de préchargement du cache"""
+
+    def __init__(
+        self,
+        executor: Optional[BlockedQueryExecutor] = None,
+        query_log: Optional[QueryLog] = None,
+        top_k: Optional[int] = None,
+        prefetch_delay: Optional[float] = None
+    ):
+        self.executor = executor or get_view_executor()
+        self.query_log = query_log if query_log is not None else get_query_log()
+        self.top_k = CACHE_CONFIG['warmup_top_k'] if top_k is None else top_k
+        self.prefetch_delay = (
+            CACHE_CONFIG['prefetch_delay'] if prefetch_delay is None
+            else prefetch_delay
+        )
+        # Préchargement en attente, par utilisateur (adresse du client)
+        self._prefetch_timers: Dict[Optional[str], threading.Timer] = {}
+        self._lock = threading.Lock()
+        # Préchauffage : un seul thread à la fois, relancé une fois s'il a été
+        # redemandé entre-temps (rafales de notifications regroupées)
+        self._warm_thread: Optional[threading.Thread] = None
+        self._warm_requested = False
+        self.warm_runs = 0
+
+    def selections_to_warm(self) -> List[ViewSelection]:
+        """Vue par défaut puis combinaisons fréquentes, sur la période par défaut"""
+        default = default_selection()
+        selections = [default]
+        for indicator, category, granularity, region in self.query_log.most_common(self.top_k):
+            selection = default._replace(
+                indicator=indicator,
+                category=category,
+                granularity=granularity,
+                region=region
+            )
+            if selection not in selections:
+                selections.append(selection)
+        return selections
+
+    def warm(self) -> int:
+        """
+        Calcule les vues à préchauffer
+
+        Returns:
+            Nombre de vues préchauffées avec succès
+        """
+        warmed = 0
+        for selection in self.selections_to_warm():
+            try:
+                with query_context('prefetch'):
+                    load_view(selection, self.executor)
+                warmed += 1
+            except Exception as e:
+                print(f"Échec du préchauffage de {selection.combination()}: {e}")
+        return warmed
+
+    def start(self) -> threading.Thread:
+        """
+        Demande un préchauffage en tâche de fond
+
+        Si un préchauffage est déjà en cours, la demande est regroupée avec
+        les suivantes : le thread en cours le relance une seule fois à sa fin.
+
+        Returns:
+            Thread de préchauffage
+        """
+        with self._lock:
+            self._warm_requested = True
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self._warm_loop, daemon=True)
+                self._warm_thread.start()
+            return self._warm_thread
+
+    def _warm_loop(self):
+        while True:
+            with self._lock:
+                if not self._warm_requested:
+                    self._warm_thread = None
+                    return
+                self._warm_requested = False
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"Erreur lors du préchauffage: {e}")
+            self.warm_runs += 1
+
+    def attach(self, notifier: ChangeNotifier):
+        """Relance le préchauffage après chaque chargement de données notifié"""
+        notifier.subscribe(lambda event: self.start())
+
+    def schedule_prefetch(self, selection: ViewSelection, user: Optional[str] = None):
+        """
+        Programme le préchargement de la granularité suivante après un délai
+        d'inactivité de l'utilisateur
+
+        Une nouvelle demande du même utilisateur annule son préchargement en
+        attente ; celles des autres utilisateurs n'y touchent pas.
+
+        Args:
+            selection: Vue demandée
+            user: Utilisateur (adresse du client, comme pour query_context)
+        """
+        next_granularity = NEXT_GRANULARITY.get(selection.granularity)
+        with self._lock:
+            pending = self._prefetch_timers.pop(user, None)
+            if pending is not None:
+                pending.cancel()
+            if next_granularity is None:
+                return
+            timer = threading.Timer(
+                self.prefetch_delay,
+                self._prefetch_idle,
+                args=(user, selection._replace(granularity=next_granularity))
+            )
+            timer.daemon = True
+            self._prefetch_timers[user] = timer
+            timer.start()
+
+    def _prefetch_idle(self, user: Optional[str], selection: ViewSelection):
+        with self._lock:
+            if self._prefetch_timers.get(user) is threading.current_thread():
+                del self._prefetch_timers[user]
+        self._prefetch(selection)
+
+    def _prefetch(self, selection: ViewSelection):
+        executor = (
+            self.executor if selection.database == DEFAULT_DATABASE
+            else get_view_executor(selection.database)
+        )
+        try:
+            with query_context('prefetch'):
+                load_view(selection, executor)
+        except Exception as e:
+            print(f"Échec du préchargement de {selection.combination()}: {e}")
+
+
+# Singleton partagé par l'application et ses callbacks
+_cache_warmer = None
+
+def get_cache_warmer() -> CacheWarmer:
+    """Retourne le planificateur de préchauffage partagé"""
+    global _cache_warmer
+    if _cache_warmer is None:
+        _cache_warmer = CacheWarmer()
+    return _cache_warmer
@@ -0,0 +1,97 @@
+"""
+Mesure du temps d'import de l'application (python -X importtime)
+
+Usage:
+    python -m src.utils.import_time [module] [--top N] [--budget-ms MS]
+
+Affiche le temps total d'import du module, la répartition par paquet de
+premier niveau et les imports les plus coûteux ; code de sortie 1 si le
+budget (PERFORMANCE_CONFIG['import_time_budget_ms']) est dépassé.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+
+from config.settings import PERFORMANCE_CONFIG
+
+
+# Ligne "import time: self [us] | cumulative | imported package"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class ImportEntry(NamedTuple):
+    """Import d'un module (temps en millisecondes)"""
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def measure(module: str = "app", python: Optional[str] = None) -> List[ImportEntry]:
+    """
+    Importe un module dans un interpréteur neuf avec -X importtime
+
+    Returns:
+        Imports dans l'ordre de fin de chargement (le module demandé en dernier)
+    """
+    completed = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        print(completed.stderr)
+        raise RuntimeError(f"Import de {module} impossible")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append(ImportEntry(
+                name, int(self_us) / 1000, int(cumulative_us) / 1000, (len(indent) - 1) // 2
+            ))
+    return entries
+
+
+def total_ms(entries: List[ImportEntry], module: str = "app") -> float:
+    """Temps cumulé d'import du module demandé"""
+    return next(entry.cumulative_ms for entry in reversed(entries) if entry.module == module)
+
+
+def by_package(entries: List[ImportEntry]) -> Dict[str, float]:
+    """Temps propre cumulé par paquet de premier niveau, du plus coûteux au moins coûteux"""
+    totals = defaultdict(float)
+    for entry in entries:
+        totals[entry.module.split('.')[0]] += entry.self_ms
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("module", nargs="?", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--budget-ms", type=float, default=PERFORMANCE_CONFIG['import_time_budget_ms']
+    )
+    args = parser.parse_args(argv)
+
+    entries = measure(args.module)
+    total = total_ms(entries, args.module)
+
+    print(f"Import de {args.module}: {total:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print("\nPar paquet (temps propre):")
+    for package, elapsed in list(by_package(entries).items())[:args.top]:
+        print(f"  {package:<40} {elapsed:8.1f} ms")
+    print("\nImports les plus longs (temps cumulé):")
+    for entry in sorted(entries, key=lambda entry: entry.cumulative_ms, reverse=True)[:args.top]:
+        print(f"  {entry.module:<40} {entry.cumulative_ms:8.1f} ms")
+
+    return 0 if total <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,539 @@
+"""
+Test de charge des callbacks Dash (utilisateurs simultanés)
+
+Usage:
+    python -m src.utils.load_test [--url URL] [--users 1,4,16] [--duration S]
+                                  [--think S] [--rows N] [--json FICHIER]
+
+Sans --url, l'application est importée dans ce processus et interroge une
+base SQLite de remplacement (--database, générée au premier lancement).
+Avec --url, les requêtes sont envoyées à un serveur lancé à part, par exemple
+sur la même base :
+    DB_NAME=ventes DB_URL_ENTREPRISE=sqlite:///data/loadtest/ventes.db python app.py
+
+Chaque utilisateur virtuel se comporte comme le navigateur : chargement de la
+page, puis actions tirées au hasard (indicateur, catégorie, granularité,
+glissement des dates, onglet). Une action déclenche les callbacks qui en
+dépendent, en cascade, dans l'ordre du moteur de rendu Dash ; les callbacks
+prêts en même temps sont envoyés l'un après l'autre (le navigateur les envoie
+en parallèle : à nombre d'utilisateurs égal, la charge réelle est un peu
+plus forte).
+
+Pour chaque niveau de concurrence : débit, latences (p50, p95, p99) des
+requêtes et des actions, taux d'erreur ; code de sortie 1 si le taux
+d'erreur dépasse --max-error-rate.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+
+UPDATE_PATH = '/_dash-update-component'
+
+# Actions des utilisateurs virtuels et leur fréquence relative
+ACTION_WEIGHTS = {
+    'indicateur': 3,
+    'categorie': 2,
+    'granularite': 3,
+    'dates': 3,
+    'onglet': 2
+}
+
+Key = Tuple[str, str]
+
+
+class Callback(NamedTuple):
+    """Callback serveur décrit par /_dash-dependencies"""
+    output: str
+    outputs: List[Key]
+    inputs: List[Key]
+    state: List[Key]
+    prevent_initial_call: bool
+
+    @property
+    def label(self) -> str:
+        """Nom affiché : première sortie du callback"""
+        return '.'.join(self.outputs[0])
+
+    @property
+    def multi(self) -> bool:
+        return self.output.startswith('..')
+
+
+class Sample(NamedTuple):
+    """Requête de callback ou action d'un utilisateur"""
+    name: str
+    seconds: float
+    ok: bool
+
+
+def _split_output(output: str) -> List[Key]:
+    """'..a.x...b.y..' -> [('a', 'x'), ('b', 'y')] ; suffixe @hash retiré"""
+    parts = output[2:-2].split('...') if output.startswith('..') else [output]
+    keys = []
+    for part in parts:
+        component_id, prop = part.rsplit('.', 1)
+        keys.append((component_id, prop.split('@')[0]))
+    return keys
+
+
+def parse_dependencies(dependencies: List[Dict[str, Any]]) -> List[Callback]:
+    """Callbacks serveur de l'application (les callbacks navigateur sont ignorés)"""
+    return [
+        Callback(
+            output=entry['output'],
+            outputs=_split_output(entry['output']),
+            inputs=[(item['id'], item['property']) for item in entry['inputs']],
+            state=[(item['id'], item['property']) for item in entry['state']],
+            prevent_initial_call=bool(entry.get('prevent_initial_call'))
+        )
+        for entry in dependencies
+        if not entry.get('clientside_function')
+    ]
+
+
+def _components(node: Any) -> Iterator[Dict[str, Any]]:
+    """Composants d'une mise en page sérialisée (parcours en profondeur)"""
+    if isinstance(node, list):
+        for child in node:
+            yield from _components(child)
+    elif isinstance(node, dict) and 'props' in node:
+        yield node
+        for value in node['props'].values():
+            yield from _components(value)
+
+
+def layout_state(layout: Dict[str, Any]) -> Tuple[Dict[Key, Any], List[str]]:
+    """
+    Propriétés initiales des composants identifiés et identifiants des onglets
+
+    Returns:
+        Tuple (état {(id, propriété): valeur}, tab_id des onglets)
+    """
+    state = {}
+    tabs = []
+    for component in _components(layout):
+        props = component['props']
+        if component.get('type') == 'Tab' and props.get('tab_id'):
+            tabs.append(props['tab_id'])
+        if isinstance(props.get('id'), str):
+            for prop, value in props.items():
+                if prop not in ('id', 'children'):
+                    state[(props['id'], prop)] = value
+    return state, tabs
+
+
+def layout_ids(layout: Dict[str, Any]) -> Set[str]:
+    """Identifiants des composants d'une mise en page sérialisée"""
+    return {
+        component['props']['id'] for component in _components(layout)
+        if isinstance(component['props'].get('id'), str)
+    }
+
+
+def replayable_callbacks(callbacks: List[Callback], ids: Set[str]) -> List[Callback]:
+    """
+    Callbacks que le navigateur peut déclencher sur cette mise en page
+
+    Un callback dont aucune entrée n'est dans la mise en page n'est jamais
+    déclenché par le navigateur : il est ignoré. Un callback dont une partie
+    seulement des entrées manque (ex: filtre de VIEW_INPUTS retiré de la
+    mise en page) ne l'est pas davantage ; rejouer ses requêtes avec des
+    valeurs inventées ne mesurerait pas le trafic réel.
+
+    Raises:
+        ValueError: Entrées de callback absentes de la mise en page
+    """
+    replayable, missing = [], {}
+    for callback in callbacks:
+        absent = [key for key in callback.inputs if key[0] not in ids]
+        if not absent:
+            replayable.append(callback)
+        elif len(absent) < len(callback.inputs):
+            missing[callback.label] = absent
+    if missing:
+        details = '; '.join(
+            f"{label}: {', '.join('.'.join(key) for key in keys)}" for label, keys in missing.items()
+        )
+        raise ValueError(f"Entrées absentes de la mise en page: {details}")
+    return replayable
+
+
+def load_app_model(transport) -> Tuple[List[Callback], Dict[Key, Any], List[str]]:
+    """
+    Callbacks rejouables, état initial et onglets de l'application servie,
+    tels que le navigateur les reçoit
+
+    Raises:
+        ValueError: Entrées de callback absentes de la mise en page
+    """
+    layout = transport.get('/_dash-layout')
+    callbacks = replayable_callbacks(
+        parse_dependencies(transport.get('/_dash-dependencies')), layout_ids(layout)
+    )
+    state, tabs = layout_state(layout)
+    return callbacks, state, tabs
+
+
+# ============================================
+# TRANSPORTS
+# ============================================
+
+class InProcessTransport:
+    """Requêtes vers le serveur Flask de l'application, sans réseau"""
+
+    def __init__(self, server, remote_addr: str = '127.0.0.1'):
+        self._client = server.test_client()
+        # Une adresse par utilisateur : l'ordonnanceur répartit par client
+        self._environ = {'REMOTE_ADDR': remote_addr}
+
+    def get(self, path: str) -> Any:
+        return self._client.get(path, environ_base=self._environ).get_json()
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        response = self._client.post(path, json=payload, environ_base=self._environ)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTransport:
+    """Requêtes HTTP vers un serveur lancé à part"""
+
+    def __init__(self, url: str, timeout: float = 60):
+        import requests
+
+        self._url = url.rstrip('/')
+        self._session = requests.Session()
+        self._timeout = timeout
+
+    def get(self, path: str) -> Any:
+        response = self._session.get(self._url + path, timeout=self._timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        response = self._session.post(self._url + path, json=payload, timeout=self._timeout)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+
+# ============================================
+# UTILISATEURS VIRTUELS
+# ============================================
+
+class VirtualUser:
+    """Navigateur simulé : état des composants et cascade des callbacks"""
+
+    def __init__(
+        self,
+        transport,
+        callbacks: List[Callback],
+        state: Dict[Key, Any],
+        tabs: List[str],
+        rng: Optional[random.Random] = None
+    ):
+        self.transport = transport
+        self.callbacks = callbacks
+        self.state = dict(state)
+        self.tabs = tabs
+        self.rng = rng or random.Random()
+        self.samples: List[Sample] = []
+        self.actions: List[Sample] = []
+
+    def load(self) -> bool:
+        """Chargement de la page : callbacks initiaux, dans l'ordre des dépendances"""
+        return self._run_action('chargement', [
+            callback for callback in self.callbacks if not callback.prevent_initial_call
+        ], set(self.state))
+
+    def act(self, action: Optional[str] = None) -> bool:
+        """Exécute une action (tirée au hasard si omise) et sa cascade de callbacks"""
+        action = action or self.rng.choices(
+            list(ACTION_WEIGHTS), weights=list(ACTION_WEIGHTS.values())
+        )[0]
+        changes = getattr(self, f'_change_{action}')()
+        if not changes:
+            return True
+        self.state.update(changes)
+        return self._run_action(action, self._triggered(set(changes)), set(changes))
+
+    def _triggered(self, changed: Set[Key]) -> List[Callback]:
+        return [callback for callback in self.callbacks if changed & set(callback.inputs)]
+
+    def _run_action(self, name: str, pending: List[Callback], changed: Set[Key]) -> bool:
+        started = time.perf_counter()
+        ok = True
+        pending = list(pending)
+        while pending:
+            # Un callback attend les callbacks en attente qui produisent ses entrées
+            produced = {key for callback in pending for key in callback.outputs}
+            ready = next(
+                (
+                    callback for callback in pending
+                    if not (set(callback.inputs) & (produced - set(callback.outputs)))
+                ),
+                pending[0]
+            )
+            pending.remove(ready)
+            updated = self._fire(ready, changed)
+            ok = ok and updated is not None
+            for callback in self._triggered(updated or set()):
+                if callback not in pending:
+                    pending.append(callback)
+            changed = changed | (updated or set())
+        self.actions.append(Sample(name, time.perf_counter() - started, ok))
+        return ok
+
+    def _fire(self, callback: Callback, changed: Set[Key]) -> Optional[Set[Key]]:
+        """
+        Envoie une requête de callback et applique sa réponse
+
+        Returns:
+            Propriétés mises à jour, ou None en cas d'erreur
+        """
+        def values(keys):
+            return [{'id': i, 'property': p, 'value': self.state.get((i, p))} for i, p in keys]
+
+        outputs = [{'id': i, 'property': p} for i, p in callback.outputs]
+        payload = {
+            'output': callback.output,
+            'outputs': outputs if callback.multi else outputs[0],
+            'inputs': values(callback.inputs),
+            'state': values(callback.state),
+            'changedPropIds': [f"{i}.{p}" for i, p in callback.inputs if (i, p) in changed]
+        }
+        started = time.perf_counter()
+        try:
+            status, body = self.transport.post(UPDATE_PATH, payload)
+        except Exception as e:
+            print(f"Requête {callback.label} en échec: {e}")
+            status, body = None, None
+        ok = status in (200, 204)
+        self.samples.append(Sample(callback.label, time.perf_counter() - started, ok))
+        if not ok:
+            return None
+
+        updated = set()
+        for component_id, props in ((body or {}).get('response') or {}).items():
+            for prop, value in props.items():
+                self.state[(component_id, prop)] = value
+                updated.add((component_id, prop))
+        return updated
+
+    def _options(self, component_id: str) -> List[Any]:
+        options = self.state.get((component_id, 'options')) or []
+        return [option['value'] if isinstance(option, dict) else option for option in options]
+
+    def _pick_other(self, component_id: str) -> Dict[Key, Any]:
+        current = self.state.get((component_id, 'value'))
+        choices = [value for value in self._options(component_id) if value != current]
+        return {(component_id, 'value'): self.rng.choice(choices)} if choices else {}
+
+    def _change_indicateur(self) -> Dict[Key, Any]:
+        return self._pick_other('main-indicator-dropdown')
+
+    def _change_categorie(self) -> Dict[Key, Any]:
+        return self._pick_other('category-dropdown')
+
+    def _change_granularite(self) -> Dict[Key, Any]:
+        """Descend d'un niveau (retour au niveau le plus agrégé après le plus fin)"""
+        levels = self._options('granularity-dropdown')
+        if not levels:
+            return {}
+        current = self.state.get(('granularity-dropdown', 'value'))
+        position = levels.index(current) + 1 if current in levels else 0
+        return {('granularity-dropdown', 'value'): levels[position % len(levels)]}
+
+    def _change_dates(self) -> Dict[Key, Any]:
+        """Fait glisser la période de 1 à 3 mois, vers le passé ou le futur"""
+        import pandas as pd
+
+        offset = pd.DateOffset(months=self.rng.choice([-3, -2, -1, 1, 2, 3]))
+        return {
+            key: (pd.Timestamp(self.state[key]) + offset).strftime('%Y-%m-%d')
+            for key in (('date-picker', 'start_date'), ('date-picker', 'end_date'))
+            if self.state.get(key)
+        }
+
+    def _change_onglet(self) -> Dict[Key, Any]:
+        current = self.state.get(('tabs', 'active_tab'))
+        choices = [tab for tab in self.tabs if tab != current]
+        return {('tabs', 'active_tab'): self.rng.choice(choices)} if choices else {}
+
+
+# ============================================
+# SCÉNARIO ET RAPPORT
+# ============================================
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile (rang le plus proche) d'une liste de valeurs"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, float]:
+    """Débit, latences (ms) et taux d'erreur d'un ensemble de mesures"""
+    seconds = [sample.seconds for sample in samples]
+    errors = sum(not sample.ok for sample in samples)
+    return {
+        'count': len(samples),
+        'per_second': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(seconds, 50) * 1000,
+        'p95_ms': percentile(seconds, 95) * 1000,
+        'p99_ms': percentile(seconds, 99) * 1000,
+        'error_rate': errors / len(samples) if samples else 0.0
+    }
+
+
+def run_level(
+    make_transport: Callable[[int], Any],
+    users: int,
+    duration: float,
+    think: float = 0.5,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Fait tourner des utilisateurs simultanés pendant une durée donnée
+
+    Args:
+        make_transport: Transport d'un utilisateur, selon son numéro
+        users: Nombre d'utilisateurs simultanés
+        duration: Durée de la mesure (secondes), chargement de page compris
+        think: Temps de réflexion moyen entre deux actions (secondes)
+        seed: Graine des tirages (actions, temps de réflexion)
+
+    Returns:
+        Synthèse des requêtes, des actions et par callback
+    """
+    callbacks, state, tabs = load_app_model(make_transport(0))
+    virtual_users = [
+        VirtualUser(make_transport(index), callbacks, state, tabs, random.Random(seed + index))
+        for index in range(users)
+    ]
+
+    deadline = time.perf_counter() + duration
+
+    def run(user: VirtualUser):
+        user.load()
+        while time.perf_counter() < deadline:
+            if think:
+                time.sleep(min(user.rng.expovariate(1 / think), max(0.0, deadline - time.perf_counter())))
+            if time.perf_counter() < deadline:
+                user.act()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(user,), daemon=True) for user in virtual_users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = [sample for user in virtual_users for sample in user.samples]
+    by_callback = defaultdict(list)
+    for sample in samples:
+        by_callback[sample.name].append(sample)
+    return {
+        'users': users,
+        'seconds': elapsed,
+        'requests': summarize(samples, elapsed),
+        'actions': summarize([action for user in virtual_users for action in user.actions], elapsed),
+        'callbacks': {name: summarize(values, elapsed) for name, values in sorted(by_callback.items())}
+    }
+
+
+def create_standin_database(path: str, rows: int = 200000, seed: int = 0):
+    """
+    Base SQLite de remplacement : table ventes synthétique des trois années
+    civiles se terminant par l'année en cours (la période par défaut de la
+    mise en page, les 12 derniers mois, contient des ventes)
+    """
+    from datetime import date
+
+    from src.utils.synthetic_data import SyntheticSpec, generate, write_sqlite
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    start = f"{date.today().year - 2}-01-01"
+    write_sqlite(generate(SyntheticSpec(rows=rows, seed=seed, start=start, years=3)), path)
+
+
+def in_process_transports(database: str, rows: int) -> Callable[[int], InProcessTransport]:
+    """
+    Importe l'application sur la base de remplacement
+
+    Les variables d'environnement sont lues à l'import de la configuration :
+    cette fonction doit être appelée avant tout import de app ou de config.database.
+    """
+    if not os.path.exists(database):
+        print(f"Génération de la base de remplacement ({rows:,} lignes): {database}")
+        create_standin_database(database, rows)
+    os.environ.setdefault('DB_NAME', 'ventes')
+    os.environ.setdefault('DB_URL_ENTREPRISE', f"sqlite:///{os.path.abspath(database)}")
+    os.environ.setdefault('DEBUG_MODE', 'False')
+
+    import app
+
+    server = app.app.server
+    return lambda index: InProcessTransport(server, f"10.0.{index // 256}.{index % 256}")
+
+
+def _print_level(result: Dict[str, Any]):
+    requests, actions = result['requests'], result['actions']
+    print(
+        f"{result['users']:>6} {requests['per_second']:>8.1f} {actions['per_second']:>8.2f} "
+        f"{requests['p50_ms']:>8.0f} {requests['p95_ms']:>8.0f} {requests['p99_ms']:>8.0f} "
+        f"{actions['p95_ms']:>10.0f} {requests['error_rate']:>8.1%}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help="Serveur à interroger (sinon, application dans le processus)")
+    parser.add_argument('--users', default='1,2,4,8,16', help="Niveaux de concurrence")
+    parser.add_argument('--duration', type=float, default=30, help="Durée par niveau (secondes)")
+    parser.add_argument('--think', type=float, default=0.5, help="Réflexion moyenne (secondes)")
+    parser.add_argument('--database', default='data/loadtest/ventes.db')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--json', help="Fichier de résultats")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        make_transport = lambda index: HttpTransport(args.url)
+    else:
+        make_transport = in_process_transports(args.database, args.rows)
+
+    print(f"{'users':>6} {'req/s':>8} {'act/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'act p95':>10} {'erreurs':>8}")
+    results = []
+    for users in (int(value) for value in args.users.split(',')):
+        result = run_level(make_transport, users, args.duration, args.think, args.seed)
+        _print_level(result)
+        results.append(result)
+
+    print("\nPar callback (dernier niveau):")
+    for name, stats in results[-1]['callbacks'].items():
+        print(f"  {name:<28} {stats['count']:>6} req  p50 {stats['p50_ms']:>6.0f} ms  "
+              f"p95 {stats['p95_ms']:>6.0f} ms  erreurs {stats['error_rate']:.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    worst = max(result['requests']['error_rate'] for result in results)
+    return 0 if worst <= args.max_error_rate else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Module de mesure de la mémoire des callbacks et des requêtes
+
+Deux modes (PERFORMANCE_CONFIG['memory_tracking']) :
+- 'rss' : variation de la mémoire résidente du processus pendant l'appel
+  (lecture de /proc, coût négligeable) ;
+- 'tracemalloc' : pic des allocations Python pendant l'appel (plus précis,
+  mais ralentit toutes les allocations du processus).
+
+Les mesures sont celles du processus : avec plusieurs requêtes simultanées
+dans un worker, chacune se voit attribuer les allocations des autres (majorant).
+"""
+import functools
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from config.settings import PERFORMANCE_CONFIG
+from src.utils.metrics import MEMORY_BUCKETS, MetricFamily, get_metrics
+
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+CALLBACK_MEMORY = get_metrics().histogram(
+    'dashboard_callback_memory_bytes',
+    "Mémoire consommée par les callbacks Dash",
+    ['callback'],
+    buckets=MEMORY_BUCKETS
+)
+BUDGET_EXCEEDED = get_metrics().counter(
+    'dashboard_memory_budget_exceeded_total',
+    "Callbacks ayant dépassé le budget mémoire par requête",
+    ['callback']
+)
+
+
+def rss_bytes() -> int:
+    """Mémoire résidente du processus (pic depuis le démarrage hors Linux)"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryUsage:
+    """Mémoire mesurée pendant un bloc (octets, renseignée à la sortie)"""
+
+    def __init__(self, base: int = 0):
+        self.base = base
+        self.peak = base
+        self.bytes = 0
+
+
+class MemoryTracker:
+    """
+    Mesures de mémoire imbriquables (callback, puis requêtes du callback)
+
+    En mode 'tracemalloc', le pic du processus est remis à zéro à chaque
+    entrée ou sortie de mesure, après avoir été reporté sur toutes les
+    mesures en cours : un bloc imbriqué ne fausse pas le pic du bloc englobant.
+    """
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = mode or PERFORMANCE_CONFIG['memory_tracking']
+        self._active: List[MemoryUsage] = []
+        self._lock = threading.Lock()
+
+    def _checkpoint(self) -> int:
+        current, peak = tracemalloc.get_traced_memory()
+        for usage in self._active:
+            usage.peak = max(usage.peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextmanager
+    def track(self):
+        """Mesure la mémoire consommée par le bloc"""
+        if self.mode == 'off':
+            yield MemoryUsage()
+            return
+        if self.mode == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            with self._lock:
+                usage = MemoryUsage(self._checkpoint())
+                self._active.append(usage)
+            try:
+                yield usage
+            finally:
+                with self._lock:
+                    self._checkpoint()
+                    self._active.remove(usage)
+                usage.bytes = usage.peak - usage.base
+            return
+
+        usage = MemoryUsage(rss_bytes())
+        try:
+            yield usage
+        finally:
+            usage.bytes = max(rss_bytes() - usage.base, 0)
+
+
+# Suivi unique du processus
+_memory_tracker = None
+
+def get_memory_tracker() -> MemoryTracker:
+    """Retourne le suivi mémoire partagé"""
+    global _memory_tracker
+    if _memory_tracker is None:
+        _memory_tracker = MemoryTracker()
+    return _memory_tracker
+
+
+@contextmanager
+def track_memory(histogram, **labels):
+    """Mesure la mémoire du bloc et l'enregistre dans un histogramme"""
+    with get_memory_tracker().track() as usage:
+        yield usage
+    histogram.observe(usage.bytes, **labels)
+
+
+def tracked_memory(func: Callable) -> Callable:
+    """Décorateur : mémoire des appels d'un callback Dash, par nom de fonction"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with track_memory(CALLBACK_MEMORY, callback=func.__name__) as usage:
+            result = func(*args, **kwargs)
+        budget = PERFORMANCE_CONFIG['request_memory_budget_mb'] * 1024 * 1024
+        if budget and usage.bytes > budget:
+            BUDGET_EXCEEDED.inc(callback=func.__name__)
+            print(f"Budget mémoire dépassé par {func.__name__}: {usage.bytes / 1e6:,.0f} Mo")
+        return result
+
+    return wrapper
+
+
+def _process_metrics():
+    """Mémoire du processus"""
+    families = [MetricFamily(
+        'process_resident_memory_bytes', "Mémoire résidente du processus", 'gauge',
+        [({}, rss_bytes())]
+    )]
+    if tracemalloc.is_tracing():
+        current, _ = tracemalloc.get_traced_memory()
+        families.append(MetricFamily(
+            'dashboard_traced_memory_bytes', "Allocations Python suivies par tracemalloc", 'gauge',
+            [({}, current)]
+        ))
+    return families
+
+
+get_metrics().register_collector(_process_metrics)
@@ -0,0 +1,209 @@
+"""
+Module de profilage à la demande des callbacks Dash
+
+Une requête de callback est profilée :
+- si elle porte l'en-tête d'administration (PROFILING_CONFIG['header'])
+  ou le paramètre ?profile= avec le jeton PROFILING_TOKEN, dans l'URL de la
+  requête ou de la page qui l'émet (ouvrir /?profile=<jeton>) ;
+- ou tirée au hasard, au taux PROFILING_SAMPLE_RATE.
+
+Pour chaque requête profilée, PROFILING_CONFIG['folder'] reçoit :
+- <base>.folded : piles échantillonnées au format « folded » (flamegraph.pl,
+  speedscope), ou <base>.pstats en mode 'cprofile' (snakeviz, pstats) ;
+- <base>.json : durée totale et répartition par étape (fetch, transform,
+  render, serialize).
+
+Les étapes sont délimitées dans le code par stage('...') ; hors profilage,
+stage() se limite à la lecture d'une ContextVar.
+"""
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from config.settings import PROFILING_CONFIG
+
+
+_current_profile: ContextVar[Optional['RequestProfile']] = ContextVar('request_profile', default=None)
+
+
+class StackSampler:
+    """Profileur statistique : échantillonne la pile d'un thread à intervalle fixe"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Piles au format folded : 'a;b;c nombre_d_échantillons'"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Profil d'une requête de callback"""
+
+    def __init__(self, name: str, mode: Optional[str] = None, interval: Optional[float] = None):
+        """
+        Args:
+            name: Nom du callback profilé
+            mode: 'sampling' (statistique) ou 'cprofile' (déterministe)
+            interval: Intervalle d'échantillonnage (secondes)
+        """
+        self.name = name
+        self.mode = mode or PROFILING_CONFIG['mode']
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = StackSampler(
+                threading.get_ident(),
+                interval or PROFILING_CONFIG['interval_ms'] / 1000
+            )
+            self._profiler.start()
+
+    def stop(self):
+        """Arrête le profileur ; le temps hors étapes est attribué à 'serialize'"""
+        if self.mode == 'cprofile':
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+        self.elapsed = time.perf_counter() - self.started
+
+    def write(self, folder: Optional[str] = None) -> str:
+        """
+        Écrit le profil et la répartition par étape
+
+        Returns:
+            Chemin du fichier JSON de répartition
+        """
+        folder = folder or PROFILING_CONFIG['folder']
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.join(
+            folder,
+            f"{datetime.now():%Y%m%d-%H%M%S-%f}_{re.sub(r'[^A-Za-z0-9_-]', '_', self.name)}"
+        )
+
+        if self.mode == 'cprofile':
+            profile_path = base + '.pstats'
+            self._profiler.dump_stats(profile_path)
+        else:
+            profile_path = base + '.folded'
+            with open(profile_path, 'w', encoding='utf-8') as file:
+                file.write(self._profiler.folded())
+
+        with open(base + '.json', 'w', encoding='utf-8') as file:
+            json.dump({
+                'callback': self.name,
+                'mode': self.mode,
+                'total_seconds': self.elapsed,
+                'stages': self.breakdown(),
+                'profile': os.path.basename(profile_path)
+            }, file, indent=2)
+        return base + '.json'
+
+    def breakdown(self) -> Dict[str, float]:
+        """Durée par étape ; le reste de la requête (sérialisation de la réponse Dash) en 'serialize'"""
+        stages = dict(self.stages)
+        stages['serialize'] = stages.get('serialize', 0.0) + max(
+            self.elapsed - sum(self.stages.values()), 0.0
+        )
+        return stages
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Délimite une étape du traitement (fetch, transform, render, serialize)
+
+    Sans profil en cours, aucune mesure n'est faite.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.stages[name] += time.perf_counter() - started
+
+
+def profiling_requested(request) -> bool:
+    """Indique si une requête doit être profilée (jeton d'administration ou tirage)"""
+    token = PROFILING_CONFIG['token']
+    if token:
+        if request.headers.get(PROFILING_CONFIG['header']) == token:
+            return True
+        if request.args.get('profile') == token:
+            return True
+        page_query = parse_qs(urlparse(request.referrer or '').query)
+        if token in page_query.get('profile', []):
+            return True
+    rate = PROFILING_CONFIG['sample_rate']
+    return bool(rate) and random.random() < rate
+
+
+def install_profiling(server, callback_name: Callable[[], str]):
+    """
+    Branche le profilage sur les requêtes de callback d'un serveur Flask
+
+    Args:
+        server: Serveur Flask de l'application Dash
+        callback_name: Nom du callback de la requête courante
+    """
+    from flask import g, request
+
+    @server.before_request
+    def start_profile():
+        if request.path.endswith('/_dash-update-component') and profiling_requested(request):
+            profile = RequestProfile(callback_name())
+            g.profile_token = _current_profile.set(profile)
+
+    @server.teardown_request
+    def stop_profile(exception=None):
+        token = g.pop('profile_token', None)
+        if token is None:
+            return
+        profile = _current_profile.get()
+        _current_profile.reset(token)
+        profile.stop()
+        try:
+            print(f"Profil de {profile.name}: {profile.write()}")
+        except OSError as e:
+            print(f"Écriture du profil impossible: {e}")
@@ -0,0 +1,333 @@
+"""
+Générateur déterministe de données sales.ventes synthétiques
+
+Usage:
+    python -m src.utils.synthetic_data --rows 10M [--seed 0] [--out data/synthetic]
+                                       [--formats parquet,sqlite,copy]
+
+Les lignes sont produites par morceaux vectorisés (numpy), triées par date
+comme une table de faits alimentée au fil de l'eau :
+- produits tirés selon une loi de Zipf (quelques références font l'essentiel
+  des ventes) ;
+- saisonnalité annuelle (fêtes, soldes, creux d'août), hebdomadaire (samedi)
+  et croissance d'une année sur l'autre ;
+- régions pondérées, transactions de plusieurs lignes, coût d'achat par
+  sous-catégorie.
+
+Une même graine et une même spécification donnent les mêmes lignes, quel
+que soit le format de sortie :
+- Parquet (pyarrow) : ventes.parquet ;
+- SQLite : ventes.db, table ventes (requêtes du dashboard sans schéma) ;
+- PostgreSQL : ventes.csv et ventes.sql (création de sales.ventes et \\copy).
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Catalogue : catégorie -> sous-catégorie -> (prix minimal, prix maximal, coût / prix)
+CATALOGUE = {
+    'Électronique': {
+        'Téléphones': (120, 1200, 0.78),
+        'Ordinateurs': (350, 2500, 0.82),
+        'Audio': (15, 400, 0.65),
+        'Accessoires': (5, 80, 0.45)
+    },
+    'Vêtements': {
+        'Femme': (10, 180, 0.40),
+        'Homme': (10, 160, 0.42),
+        'Enfant': (6, 70, 0.45),
+        'Chaussures': (25, 200, 0.50)
+    },
+    'Alimentation': {
+        'Épicerie': (1, 15, 0.70),
+        'Boissons': (1, 30, 0.65),
+        'Frais': (1, 20, 0.75),
+        'Hygiène': (2, 25, 0.60)
+    },
+    'Maison': {
+        'Mobilier': (40, 1500, 0.55),
+        'Décoration': (5, 120, 0.45),
+        'Cuisine': (5, 300, 0.55),
+        'Jardin': (8, 600, 0.58)
+    }
+}
+
+# Quantité moyenne par ligne au-delà de la première unité
+EXTRA_UNITS = {'Électronique': 0.1, 'Vêtements': 0.5, 'Alimentation': 2.0, 'Maison': 0.3}
+
+# Régions et part des transactions
+REGIONS = {
+    1: ('Île-de-France', 0.28),
+    2: ('Auvergne-Rhône-Alpes', 0.17),
+    3: ('Nouvelle-Aquitaine', 0.13),
+    4: ('Occitanie', 0.13),
+    5: ('Hauts-de-France', 0.12),
+    6: ('Provence-Alpes-Côte d\'Azur', 0.11),
+    7: ('Bretagne', 0.06)
+}
+
+# Activité relative par mois (janvier = soldes, août = creux, fin d'année = fêtes)
+MONTH_SEASONALITY = np.array([1.05, 0.85, 0.95, 0.95, 1.0, 1.0, 1.05, 0.8, 0.95, 1.0, 1.2, 1.5])
+# Activité relative par jour de la semaine (lundi = 0)
+WEEKDAY_SEASONALITY = np.array([0.8, 0.85, 0.9, 0.95, 1.15, 1.45, 0.5])
+
+COLUMNS = [
+    'transaction_id', 'date_vente', 'region_id', 'produit_id', 'nom_produit',
+    'sous_categorie', 'categorie_principale', 'quantite', 'montant_vente', 'cout_achat'
+]
+
+
+class SyntheticSpec(NamedTuple):
+    """Paramètres d'un jeu de données (les mêmes paramètres donnent les mêmes lignes)"""
+    rows: int
+    seed: int = 0
+    start: str = '2021-01-01'
+    years: int = 3
+    products: int = 5000
+    zipf_exponent: float = 1.1
+    yearly_growth: float = 0.08
+    mean_lines: float = 2.5          # lignes par transaction
+    chunk_rows: int = 1_000_000
+
+
+def parse_rows(value: str) -> int:
+    """'1M', '250k', '1_000' -> nombre de lignes"""
+    value = value.strip().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1].lower(), 1)
+    return int(float(value[:-1] if multiplier > 1 else value) * multiplier)
+
+
+def product_catalogue(spec: SyntheticSpec) -> pd.DataFrame:
+    """
+    Produits (produit_id, libellés, prix et taux de coût), rangés par popularité
+
+    Le rang de popularité est indépendant de la catégorie : les références
+    les plus vendues sont réparties dans tout le catalogue.
+    """
+    rng = np.random.default_rng([spec.seed, 0])
+    subcategories = [
+        (category, subcategory, bounds)
+        for category, entries in CATALOGUE.items()
+        for subcategory, bounds in entries.items()
+    ]
+    picks = rng.integers(0, len(subcategories), spec.products)
+    low = np.array([subcategories[i][2][0] for i in picks], dtype=float)
+    high = np.array([subcategories[i][2][1] for i in picks], dtype=float)
+
+    products = pd.DataFrame({
+        'produit_id': rng.permutation(spec.products) + 1,
+        'categorie_principale': [subcategories[i][0] for i in picks],
+        'sous_categorie': [subcategories[i][1] for i in picks],
+        # Prix log-uniforme dans la fourchette de la sous-catégorie
+        'prix': np.exp(rng.uniform(np.log(low), np.log(high))).round(2),
+        'taux_cout': [subcategories[i][2][2] for i in picks] * rng.uniform(0.9, 1.1, spec.products)
+    })
+    products['nom_produit'] = (
+        products['sous_categorie'] + ' ' + products['produit_id'].astype(str).str.zfill(6)
+    )
+    return products
+
+
+def day_weights(spec: SyntheticSpec) -> pd.Series:
+    """Probabilité de chaque jour (saisonnalités et croissance)"""
+    start = pd.Timestamp(spec.start)
+    days = pd.date_range(start, start + pd.DateOffset(years=spec.years), inclusive='left')
+    growth = (1 + spec.yearly_growth) ** ((days - start).days.to_numpy() / 365.25)
+    weights = (
+        growth
+        * MONTH_SEASONALITY[days.month - 1]
+        * WEEKDAY_SEASONALITY[days.weekday]
+    )
+    return pd.Series(weights / weights.sum(), index=days)
+
+
+def generate(spec: SyntheticSpec) -> Iterator[pd.DataFrame]:
+    """
+    Produit les lignes de ventes par morceaux d'au plus spec.chunk_rows lignes
+
+    Chaque morceau couvre une tranche de jours consécutifs de même poids
+    (les lignes sortent triées par date) et a son propre générateur
+    aléatoire : un morceau ne dépend pas des précédents.
+    """
+    products = product_catalogue(spec)
+    popularity = 1 / np.arange(1, spec.products + 1) ** spec.zipf_exponent
+    popularity /= popularity.sum()
+    product_categories = products['categorie_principale'].to_numpy()
+    extra_units = products['categorie_principale'].map(EXTRA_UNITS).to_numpy()
+
+    weights = day_weights(spec)
+    days = weights.index.to_numpy()
+    cumulative = weights.cumsum().to_numpy()
+    region_ids = np.array(list(REGIONS))
+    region_shares = np.array([share for _, share in REGIONS.values()])
+    region_shares /= region_shares.sum()
+
+    chunks = -(-spec.rows // spec.chunk_rows)
+    # Tranche de jours de chaque morceau (bornes de poids cumulé i / chunks)
+    bounds = np.searchsorted(cumulative, np.arange(chunks + 1) / chunks)
+    bounds[-1] = len(days)
+    for index in range(chunks):
+        rng = np.random.default_rng([spec.seed, 1, index])
+        start_row = index * spec.chunk_rows
+        size = min(spec.chunk_rows, spec.rows - start_row)
+
+        # Transactions : nombre de lignes géométrique (moyenne spec.mean_lines)
+        lines = rng.geometric(1 / spec.mean_lines, size)
+        lines = lines[:np.searchsorted(np.cumsum(lines), size) + 1]
+        lines[-1] -= lines.sum() - size
+        transaction = np.repeat(np.arange(len(lines)), lines)
+
+        # Jours de la tranche du morceau, tirés selon leur poids, puis triés
+        low, high = bounds[index], max(bounds[index + 1], bounds[index] + 1)
+        slice_weights = weights.to_numpy()[low:high] / weights.to_numpy()[low:high].sum()
+        transaction_days = np.sort(rng.choice(days[low:high], len(lines), p=slice_weights))
+        transaction_regions = rng.choice(region_ids, len(lines), p=region_shares)
+
+        ranks = rng.choice(spec.products, size, p=popularity)
+        quantities = 1 + rng.poisson(extra_units[ranks])
+        # Promotions : 10 % des lignes à -20 %
+        prices = products['prix'].to_numpy()[ranks] * np.where(rng.random(size) < 0.1, 0.8, 1.0)
+        amounts = (quantities * prices).round(2)
+
+        yield pd.DataFrame({
+            # Identifiants uniques : au plus une transaction par ligne du morceau
+            'transaction_id': start_row + transaction + 1,
+            'date_vente': transaction_days[transaction],
+            'region_id': transaction_regions[transaction],
+            'produit_id': products['produit_id'].to_numpy()[ranks],
+            'nom_produit': products['nom_produit'].to_numpy()[ranks],
+            'sous_categorie': products['sous_categorie'].to_numpy()[ranks],
+            'categorie_principale': product_categories[ranks],
+            'quantite': quantities,
+            'montant_vente': amounts,
+            'cout_achat': (amounts * products['taux_cout'].to_numpy()[ranks]).round(2)
+        }, columns=COLUMNS)
+
+
+# ============================================
+# FORMATS DE SORTIE
+# ============================================
+
+def write_parquet(chunks: Iterator[pd.DataFrame], path: str) -> int:
+    """Écrit les morceaux dans un fichier Parquet (un groupe de lignes par morceau)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow est requis pour l'export Parquet (pip install pyarrow)")
+        raise
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_sqlite(chunks: Iterator[pd.DataFrame], path: str) -> int:
+    """Écrit les morceaux dans une table SQLite ventes (remplacée), indexée par date"""
+    if os.path.exists(path):
+        os.remove(path)
+    rows = 0
+    with sqlite3.connect(path) as connection:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute(
+            "CREATE TABLE ventes (transaction_id INTEGER, date_vente TEXT, region_id INTEGER, "
+            "produit_id INTEGER, nom_produit TEXT, sous_categorie TEXT, "
+            "categorie_principale TEXT, quantite INTEGER, montant_vente REAL, cout_achat REAL)"
+        )
+        for chunk in chunks:
+            chunk = chunk.assign(date_vente=chunk['date_vente'].dt.strftime('%Y-%m-%d'))
+            connection.executemany(
+                f"INSERT INTO ventes VALUES ({', '.join('?' * len(COLUMNS))})",
+                zip(*(chunk[column].tolist() for column in COLUMNS))
+            )
+            rows += len(chunk)
+        connection.execute("CREATE INDEX idx_ventes_date ON ventes (date_vente)")
+    return rows
+
+
+POSTGRES_DDL = """CREATE SCHEMA IF NOT EXISTS sales;
+DROP TABLE IF EXISTS sales.ventes;
+CREATE TABLE sales.ventes (
+    transaction_id BIGINT NOT NULL,
+    date_vente DATE NOT NULL,
+    region_id INTEGER NOT NULL,
+    produit_id INTEGER NOT NULL,
+    nom_produit TEXT NOT NULL,
+    sous_categorie TEXT NOT NULL,
+    categorie_principale TEXT NOT NULL,
+    quantite INTEGER NOT NULL,
+    montant_vente NUMERIC(12, 2) NOT NULL,
+    cout_achat NUMERIC(12, 2) NOT NULL
+);
+\\copy sales.ventes FROM '{csv}' WITH (FORMAT csv, HEADER true)
+CREATE INDEX ON sales.ventes USING brin (date_vente);
+ANALYZE sales.ventes;
+"""
+
+
+def write_copy(chunks: Iterator[pd.DataFrame], directory: str) -> int:
+    """
+    Écrit ventes.csv et ventes.sql, à charger avec :
+        psql -f ventes.sql (depuis le répertoire de sortie)
+    """
+    csv_path = os.path.join(directory, 'ventes.csv')
+    rows = 0
+    with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+        for chunk in chunks:
+            chunk.to_csv(file, index=False, header=rows == 0, date_format='%Y-%m-%d')
+            rows += len(chunk)
+    with open(os.path.join(directory, 'ventes.sql'), 'w', encoding='utf-8') as file:
+        file.write(POSTGRES_DDL.format(csv='ventes.csv'))
+    return rows
+
+
+WRITERS = {
+    'parquet': lambda chunks, directory: write_parquet(chunks, os.path.join(directory, 'ventes.parquet')),
+    'sqlite': lambda chunks, directory: write_sqlite(chunks, os.path.join(directory, 'ventes.db')),
+    'copy': write_copy
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', default='1M', help="Nombre de lignes (1M, 10M, 100M, 250k...)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', default=SyntheticSpec._field_defaults['start'])
+    parser.add_argument('--years', type=int, default=SyntheticSpec._field_defaults['years'])
+    parser.add_argument('--products', type=int, default=SyntheticSpec._field_defaults['products'])
+    parser.add_argument('--formats', default='parquet,sqlite,copy')
+    parser.add_argument('--out', default='data/synthetic')
+    args = parser.parse_args(argv)
+
+    spec = SyntheticSpec(
+        rows=parse_rows(args.rows), seed=args.seed, start=args.start,
+        years=args.years, products=args.products
+    )
+    os.makedirs(args.out, exist_ok=True)
+    for name in args.formats.split(','):
+        started = time.perf_counter()
+        rows = WRITERS[name](generate(spec), args.out)
+        print(f"{name}: {rows:,} lignes en {time.perf_counter() - started:.1f} s ({args.out})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
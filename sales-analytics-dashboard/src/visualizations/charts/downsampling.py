@@ -0,0 +1,190 @@
+"""
+Module de réduction des séries longues pour l'affichage
+
+Un graphique de quelques centaines de pixels ne peut pas montrer des
+milliers de périodes :
+- les barres sont regroupées à la semaine, au mois ou à l'année dès que le
+  nombre de périodes dépasse le budget de largeur (chart_max_bars) ; le
+  regroupement est fait par la requête, exact pour tous les indicateurs ;
+- les courbes superposées (objectifs, comparaisons) sont réduites à
+  chart_max_line_points points par LTTB (Largest Triangle Three Buckets,
+  forme visuelle de la courbe) ou min/max par intervalle (pics conservés) ;
+- un zoom (relayoutData) recharge la plage visible à la résolution la plus
+  fine qui tient dans le budget.
+"""
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import PERFORMANCE_CONFIG
+from src.database.cost_guard import TIME_LADDER, period_count
+from src.database.date_blocks import to_date
+from src.utils.metrics import get_metrics
+
+
+CHART_REDUCTIONS = get_metrics().counter(
+    'dashboard_chart_reductions_total',
+    "Séries réduites pour l'affichage du graphique",
+    ['kind']
+)
+
+TIME_LABELS = {'jour': 'jour', 'semaine': 'semaine', 'mois': 'mois', 'annee': 'année'}
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices des points retenus par LTTB (Largest Triangle Three Buckets)
+
+    Le premier et le dernier point sont conservés ; les autres sont répartis
+    en threshold - 2 intervalles, dans chacun desquels est retenu le point
+    formant le plus grand triangle avec le point retenu précédent et la
+    moyenne de l'intervalle suivant.
+
+    Args:
+        x: Abscisses croissantes
+        y: Ordonnées
+        threshold: Nombre de points conservés
+    """
+    size = len(y)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+
+    # Bornes des intervalles intérieurs (pas >= 1 : aucun intervalle vide)
+    edges = np.linspace(1, size - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            following = slice(edges[bucket + 1], edges[bucket + 2])
+            mean_x, mean_y = x[following].mean(), y[following].mean()
+        else:
+            mean_x, mean_y = x[-1], y[-1]
+        # Aire (au facteur 1/2 près) des triangles (précédent, candidat, moyenne suivante)
+        area = np.abs(
+            (x[previous] - mean_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (mean_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def min_max_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices du minimum et du maximum de chaque intervalle (au plus threshold
+    points, extrémités comprises) : les pics de la série sont conservés
+    """
+    size = len(y)
+    if threshold >= size or threshold < 4:
+        return np.arange(size)
+    values = np.nan_to_num(np.asarray(y, dtype=float))
+    edges = np.linspace(0, size, (threshold - 2) // 2 + 1).astype(int)
+    indices = [0, size - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        segment = values[start:stop]
+        indices += [start + int(np.argmin(segment)), start + int(np.argmax(segment))]
+    return np.unique(indices)
+
+
+def _numeric_axis(values: pd.Series) -> np.ndarray:
+    """Abscisses numériques (nombres, dates en secondes, sinon rangs)"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    try:
+        return pd.to_datetime(values).to_numpy(dtype='datetime64[s]').astype(float)
+    except (ValueError, TypeError):
+        return np.arange(len(values), dtype=float)
+
+
+def downsample(
+    data: pd.DataFrame,
+    x_column: str,
+    y_column: str,
+    max_points: Optional[int] = None,
+    method: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Réduit une courbe au nombre de points affichables
+
+    Args:
+        data: DataFrame de la courbe
+        x_column: Colonne des abscisses (nombres, dates ou périodes)
+        y_column: Colonne des valeurs
+        max_points: Points conservés (PERFORMANCE_CONFIG par défaut)
+        method: 'lttb' ou 'minmax' (PERFORMANCE_CONFIG par défaut)
+
+    Returns:
+        Lignes retenues, triées par abscisse (data si elle est assez courte)
+    """
+    max_points = max_points or PERFORMANCE_CONFIG['chart_max_line_points']
+    method = method or PERFORMANCE_CONFIG['line_downsampling']
+    if len(data) <= max_points:
+        return data
+
+    data = data.sort_values(x_column, kind='stable')
+    if method == 'minmax':
+        indices = min_max_indices(data[y_column].to_numpy(), max_points)
+    else:
+        indices = lttb_indices(_numeric_axis(data[x_column]), data[y_column].to_numpy(), max_points)
+    CHART_REDUCTIONS.inc(kind=method)
+    return data.iloc[indices]
+
+
+def display_time_dimension(
+    start: Any,
+    end: Any,
+    time_dimension: str,
+    max_bars: Optional[int] = None
+) -> str:
+    """
+    Grain temporel affiché : le plus fin, à partir de celui demandé, dont le
+    nombre de périodes tient dans le budget de largeur du graphique
+    """
+    max_bars = max_bars or PERFORMANCE_CONFIG['chart_max_bars']
+    if time_dimension not in TIME_LADDER:
+        return time_dimension
+    ladder = TIME_LADDER[TIME_LADDER.index(time_dimension):]
+    for candidate in ladder:
+        if period_count(start, end, candidate) <= max_bars:
+            return candidate
+    return ladder[-1]
+
+
+def regroup_message(requested: str, displayed: str, start: Any, end: Any) -> str:
+    """Message affiché lorsque les barres sont regroupées"""
+    periods = f"{period_count(start, end, requested):,}".replace(',', ' ')
+    return (
+        f"Affichage par {TIME_LABELS[displayed]} : {periods} périodes "
+        f"({TIME_LABELS[requested]}) dépassent la largeur du graphique. "
+        f"Zoomer pour afficher le détail."
+    )
+
+
+def zoom_range(relayout: Optional[Dict[str, Any]]) -> Optional[Tuple[date, date]]:
+    """
+    Plage de dates d'un zoom ou d'un déplacement de l'axe des abscisses
+
+    Returns:
+        (début, fin) incluses, ou None (autre événement, axe non temporel)
+    """
+    if not relayout:
+        return None
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        bounds = relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    elif isinstance(relayout.get('xaxis.range'), list):
+        bounds = tuple(relayout['xaxis.range'])
+    else:
+        return None
+    if not all(isinstance(bound, str) for bound in bounds):
+        return None
+    try:
+        start, end = (to_date(bound) for bound in bounds)
+    except ValueError:
+        return None
+    return (start, end) if start <= end else (end, start)
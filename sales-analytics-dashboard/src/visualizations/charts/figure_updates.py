@@ -0,0 +1,261 @@
+"""
+Module de mise à jour partielle du graphique principal
+
+Le graphique n'est reconstruit entièrement que si ses traces changent
+(catégories ou périodes). Sinon, seuls les tableaux y / text (et les marges
+d'erreur de l'aperçu) sont envoyés au navigateur sous forme de Patch Dash.
+
+Les options de présentation (empilé / groupé, totaux, légende) sont
+appliquées côté navigateur (assets/chart_options.js), sans aller-retour
+serveur : le serveur reprend simplement leur valeur lors d'une
+reconstruction complète.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+from dash import Patch
+from plotly.io.json import to_json_plotly
+
+from src.utils.metrics import MetricFamily, get_metrics
+
+
+TITLE = "Évolution de l'indicateur par période"
+
+# Trace des totaux par période (repérée par son meta côté navigateur)
+TOTAL_META = 'total'
+
+
+def _traces(data: pd.DataFrame) -> List[Tuple[str, pd.DataFrame]]:
+    """Données de chaque trace, dans l'ordre d'apparition des catégories"""
+    return [
+        (str(category), data[data['categorie'] == category])
+        for category in data['categorie'].unique()
+    ]
+
+
+def _totals(data: pd.DataFrame) -> pd.Series:
+    """Total de chaque période, dans l'ordre d'apparition des périodes"""
+    return data.groupby('periode', sort=False)['valeur'].sum()
+
+
+def _labels(values: Iterable[float]) -> List[str]:
+    return [f"{value:,.0f}" for value in values]
+
+
+def _error_bars(trace_data: pd.DataFrame, approximate: bool) -> Dict[str, Any]:
+    """Marge d'erreur à 95 % de l'aperçu (masquée pour le résultat exact)"""
+    if approximate and 'marge' in trace_data:
+        return {'type': 'data', 'array': trace_data['marge'].tolist(), 'visible': True}
+    return {'visible': False}
+
+
+def _title(approximate: bool) -> str:
+    return TITLE + (" (aperçu approximatif)" if approximate else "")
+
+
+def chart_shape(data: pd.DataFrame) -> List[Any]:
+    """
+    Structure du graphique : nom et abscisses de chaque trace
+
+    Deux jeux de données de même structure ne diffèrent que par les valeurs
+    et peuvent être appliqués par patch_figure.
+    """
+    shape = [[name, trace_data['periode'].astype(str).tolist()] for name, trace_data in _traces(data)]
+    shape.append([TOTAL_META, _totals(data).index.astype(str).tolist()])
+    return shape
+
+
+def empty_figure(message: str) -> go.Figure:
+    """Graphique vide portant un message"""
+    fig = go.Figure()
+    fig.add_annotation(text=message, showarrow=False)
+    return fig
+
+
+def build_figure(
+    data: pd.DataFrame,
+    approximate: bool = False,
+    barmode: str = 'stack',
+    options: Optional[Iterable[str]] = None
+) -> go.Figure:
+    """
+    Construit le graphique complet
+
+    Args:
+        data: DataFrame (periode, categorie, valeur[, marge])
+        approximate: Aperçu sur échantillon (marges d'erreur affichées)
+        barmode: 'stack' (empilé) ou 'group' (groupé)
+        options: Options d'affichage actives ('totals', 'legend')
+    """
+    options = set(options or [])
+    fig = go.Figure()
+
+    for name, trace_data in _traces(data):
+        fig.add_trace(go.Bar(
+            name=name,
+            x=trace_data['periode'],
+            y=trace_data['valeur'],
+            text=_labels(trace_data['valeur']),
+            textposition='inside',
+            error_y=_error_bars(trace_data, approximate)
+        ))
+
+    totals = _totals(data)
+    fig.add_trace(go.Scatter(
+        x=totals.index,
+        y=totals.values,
+        text=_labels(totals.values),
+        mode='text',
+        textposition='top center',
+        showlegend=False,
+        hoverinfo='skip',
+        meta=TOTAL_META,
+        visible='totals' in options and barmode == 'stack'
+    ))
+
+    fig.update_layout(
+        title=_title(approximate),
+        barmode=barmode,
+        showlegend='legend' in options,
+        xaxis_title="Période",
+        yaxis_title="Valeur",
+        hovermode='x unified',
+        height=500,
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+    return fig
+
+
+def patch_figure(data: pd.DataFrame, approximate: bool = False) -> Patch:
+    """
+    Mise à jour partielle d'un graphique de même structure (voir chart_shape) :
+    valeurs, libellés, marges d'erreur et titre uniquement
+    """
+    patch = Patch()
+    traces = _traces(data)
+    for index, (_, trace_data) in enumerate(traces):
+        patch['data'][index]['y'] = trace_data['valeur'].tolist()
+        patch['data'][index]['text'] = _labels(trace_data['valeur'])
+        patch['data'][index]['error_y'] = _error_bars(trace_data, approximate)
+
+    totals = _totals(data)
+    patch['data'][len(traces)]['y'] = totals.tolist()
+    patch['data'][len(traces)]['text'] = _labels(totals.values)
+    patch['layout']['title']['text'] = _title(approximate)
+    return patch
+
+
+def payload_size(value: Any) -> int:
+    """
+    Taille en octets de la sérialisation JSON envoyée au navigateur (encodage
+    de Dash ; value peut être un JSON déjà sérialisé)
+    """
+    if not isinstance(value, str):
+        value = to_json_plotly(value)
+    return len(value.encode('utf-8'))
+
+
+class PayloadStats:
+    """
+    Octets envoyés pour le graphique, comparés à un envoi complet
+
+    La taille du graphique complet équivalent à un patch n'est pas mesurée
+    en le reconstruisant (ce que le patch évite) : c'est celle du dernier
+    envoi complet de même structure, ou à défaut le patch augmenté de la
+    structure (noms et abscisses des traces).
+    """
+
+    # Structures dont la taille complète est retenue
+    MAX_SHAPES = 256
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._full_sizes = OrderedDict()
+        self.updates = {'patch': 0, 'full': 0}
+        self.bytes_sent = 0
+        self.bytes_full = 0
+
+    @staticmethod
+    def _shape_key(shape: Any) -> str:
+        return json.dumps(shape, separators=(',', ':'))
+
+    def estimate_full(self, shape: Any, sent: int) -> int:
+        """Taille estimée du graphique complet de structure shape"""
+        key = self._shape_key(shape)
+        with self._lock:
+            size = self._full_sizes.get(key)
+        if size is None:
+            size = sent + len(key.encode('utf-8'))
+        return size
+
+    def record(self, kind: str, sent: int, full: Optional[int] = None, shape: Any = None):
+        """
+        Enregistre une mise à jour du graphique
+
+        Args:
+            kind: 'patch' ou 'full'
+            sent: Octets effectivement envoyés
+            full: Octets du graphique complet équivalent (estimés depuis
+                shape si absent)
+            shape: Structure du graphique (chart_shape)
+        """
+        if full is None:
+            full = self.estimate_full(shape, sent) if kind == 'patch' else sent
+        with self._lock:
+            if kind == 'full' and shape is not None:
+                key = self._shape_key(shape)
+                self._full_sizes[key] = full
+                self._full_sizes.move_to_end(key)
+                while len(self._full_sizes) > self.MAX_SHAPES:
+                    self._full_sizes.popitem(last=False)
+            self.updates[kind] += 1
+            self.bytes_sent += sent
+            self.bytes_full += full
+
+    def summary(self) -> Dict[str, Any]:
+        """Mises à jour par type, octets envoyés et économisés"""
+        with self._lock:
+            saved = self.bytes_full - self.bytes_sent
+            return {
+                'patch_updates': self.updates['patch'],
+                'full_updates': self.updates['full'],
+                'bytes_sent': self.bytes_sent,
+                'bytes_saved': saved,
+                'saved_ratio': saved / self.bytes_full if self.bytes_full else 0.0
+            }
+
+
+# Statistiques partagées par les callbacks
+_payload_stats = None
+
+def get_payload_stats() -> PayloadStats:
+    """Retourne les statistiques d'envoi du graphique"""
+    global _payload_stats
+    if _payload_stats is None:
+        _payload_stats = PayloadStats()
+    return _payload_stats
+
+
+def _payload_metrics():
+    """Métriques des envois du graphique"""
+    summary = get_payload_stats().summary()
+    return [
+        MetricFamily('dashboard_chart_updates_total', "Mises à jour du graphique", 'counter', [
+            ({'kind': 'patch'}, summary['patch_updates']),
+            ({'kind': 'full'}, summary['full_updates'])
+        ]),
+        MetricFamily('dashboard_chart_bytes_sent_total', "Octets du graphique envoyés", 'counter', [
+            ({}, summary['bytes_sent'])
+        ]),
+        MetricFamily('dashboard_chart_bytes_saved_total', "Octets économisés par les patchs", 'counter', [
+            ({}, summary['bytes_saved'])
+        ])
+    ]
+
+
+get_metrics().register_collector(_payload_metrics)
@@ -0,0 +1,180 @@
+"""
+Module de cache des composants rendus (graphiques, tableaux)
+
+Mêmes données et mêmes options donnent toujours le même graphique ou le
+même tableau : sa forme JSON décodée (dictionnaires, listes) est conservée,
+adressée par son contenu (empreinte des données, nom du constructeur,
+options). Une vue déjà affichée ne repasse ni par la construction Plotly
+(validation de chaque trace) ni par l'encodage et le décodage JSON : seul
+reste l'encodage de la réponse par Dash. Aucune invalidation n'est
+nécessaire, des données modifiées ayant une autre empreinte.
+
+Les composants renvoyés sont partagés entre les requêtes : ils ne doivent
+pas être modifiés sur place.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+from config.settings import PERFORMANCE_CONFIG
+from src.database.cache import QueryCache
+from src.utils.metrics import MetricFamily, get_metrics
+from src.utils.profiling import stage
+
+
+class RenderCache:
+    """
+    Cache LRU des composants décodés, borné en taille (octets de leur
+    sérialisation JSON)
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = (
+            max_size if max_size is not None
+            else PERFORMANCE_CONFIG['render_cache_mb'] * 1024 * 1024
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, int]]:
+        """Retourne le composant associé à la clé et sa taille, ou None si absent"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, value: Any, size: int):
+        """
+        Enregistre un composant (ignoré s'il dépasse à lui seul le budget)
+
+        Args:
+            key: Clé du composant
+            value: Composant décodé
+            size: Taille de sa sérialisation JSON (octets)
+        """
+        if size > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _key, (_value, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Entrées, taille, succès, échecs et taux de succès des lectures"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Singleton partagé par les callbacks
+_render_cache = None
+
+def get_render_cache() -> RenderCache:
+    """Retourne l'instance unique du cache des composants rendus"""
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
+
+
+def data_hash(data: Any) -> str:
+    """
+    Empreinte du contenu des données
+
+    Args:
+        data: DataFrame, ou empreinte déjà calculée (ex: celle du data-store)
+    """
+    if isinstance(data, str):
+        return data
+    digest = hashlib.md5(usedforsecurity=False)
+    digest.update(json.dumps([str(column) for column in data.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _build_entry(build: Callable[[], Any]) -> Tuple[Any, int]:
+    """Construit le composant ; retourne sa forme JSON décodée et sa taille"""
+    value = build()
+    with stage('serialize'):
+        payload = to_json_plotly(value)
+        return json.loads(payload), len(payload.encode('utf-8'))
+
+
+def render_entry(builder: str, data: Any, build: Callable[[], Any], **options: Any) -> Tuple[Any, int]:
+    """
+    Composant construit par build, depuis le cache si possible
+
+    Args:
+        builder: Nom du constructeur (partie de la clé)
+        data: Données d'entrée (DataFrame ou empreinte, voir data_hash)
+        build: Construit le composant (figure, DataTable...) en cas d'absence
+        options: Options d'affichage, sérialisables en JSON (partie de la clé)
+
+    Returns:
+        Tuple (composant sous sa forme JSON décodée, taille de sa
+        sérialisation en octets, celle envoyée au navigateur)
+    """
+    cache = get_render_cache()
+    if not cache.max_size:
+        return _build_entry(build)
+
+    key = QueryCache.make_key('render', builder, data_hash(data), options)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _build_entry(build)
+        cache.set(key, *entry)
+    return entry
+
+
+def cached_render(builder: str, data: Any, build: Callable[[], Any], **options: Any) -> Any:
+    """
+    Composant sous sa forme JSON décodée (dictionnaires, listes), renvoyée
+    telle quelle par un callback : Dash l'envoie comme le composant d'origine
+    """
+    return render_entry(builder, data, build, **options)[0]
+
+
+def _render_cache_metrics():
+    """Métriques du cache des composants rendus"""
+    stats = get_render_cache().stats()
+    return [
+        MetricFamily('dashboard_render_cache_hits_total', "Composants servis par le cache", 'counter', [({}, stats['hits'])]),
+        MetricFamily('dashboard_render_cache_misses_total', "Composants construits", 'counter', [({}, stats['misses'])]),
+        MetricFamily('dashboard_render_cache_entries', "Entrées du cache des composants", 'gauge', [({}, stats['entries'])]),
+        MetricFamily('dashboard_render_cache_size', "Taille du cache des composants (octets JSON)", 'gauge', [({}, stats['size'])])
+    ]
+
+
+get_metrics().register_collector(_render_cache_metrics)
@@ -0,0 +1,491 @@
+"""
+Banc d'essai des étapes du dashboard, avec seuils de régression
+
+Usage:
+    python -m tests.benchmarks.suite [--quick] [--only MOTIF] [--repeat N]
+                                     [--output FICHIER] [--baseline FICHIER]
+                                     [--max-regression 0.5] [--threshold CAS=0.5]
+                                     [--update-baseline]
+
+Chaque cas mesure une étape sur des données synthétiques fixes (graine 0),
+à plusieurs tailles : courbes de montée en charge selon le nombre de lignes,
+de catégories ou de périodes.
+- query_builder.* : génération du SQL (QueryBuilder) ;
+- fetch : lecture d'une vue par DatabaseConnection (base SQLite générée
+  dans data/benchmarks/ au premier lancement) ;
+- hierarchical.prepare : HierarchicalTable._prepare_hierarchical_data ;
+- pivot : HierarchicalTable.create_pivot_table ;
+- stacked_bar : StackedBarChart.create_monthly_stacked_bar ;
+- serialize.* : encodage JSON des sorties de callbacks (graphique, tableau,
+  data-store), tel que Dash le fait.
+
+Les résultats (médiane, minimum et écart-type de chaque point, pente log-log
+de chaque courbe) sont écrits en JSON puis comparés à la référence versionnée
+(tests/benchmarks/baseline.json) : code de sortie 1 si la durée minimale
+d'un point (statistique la moins sensible à la charge de la machine)
+dépasse celle de la référence de plus de --max-regression. Des seuils par
+cas ou par point se déclarent dans la clé "thresholds" de la référence ou
+par --threshold. Avant comparaison, les durées de référence sont ramenées à
+la vitesse de la machine courante par une mesure d'étalonnage. Les
+répétitions des points sont entrelacées ; sur une machine partagée, un
+point varie encore de ±30 % d'une exécution à l'autre, d'où le seuil par
+défaut de 50 %.
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DATA_FOLDER = os.path.join('data', 'benchmarks')
+SEED = 0
+
+# Écart absolu en dessous duquel une variation n'est pas une régression (bruit)
+MIN_DELTA_SECONDS = 0.0005
+
+HIERARCHY = ['categorie_principale', 'sous_categorie', 'nom_produit']
+METRICS = ['montant_vente', 'quantite', 'cout_achat']
+
+
+class Case(NamedTuple):
+    """Cas de mesure : une étape selon une dimension de montée en charge"""
+    name: str
+    axis: str                                   # rows, categories ou periods
+    sizes: Sequence[int]
+    quick_sizes: Sequence[int]                  # points mesurés avec --quick
+    setup: Callable[[int], Callable[[], Any]]   # taille -> fonction mesurée
+    number: int = 1                             # appels par mesure (étapes courtes)
+
+    def key(self, size: int) -> str:
+        return f"{self.name}[{self.axis}={size}]"
+
+
+class Comparison(NamedTuple):
+    """Point mesuré comparé à la référence"""
+    key: str
+    expected: float     # durée de référence, à la vitesse de la machine courante
+    current: float
+    ratio: float
+    threshold: float
+    regressed: bool
+
+
+CASES: List[Case] = []
+
+
+def benchmark(
+    name: str,
+    axis: str,
+    sizes: Sequence[int],
+    quick_sizes: Optional[Sequence[int]] = None,
+    number: int = 1
+):
+    """Décorateur : enregistre la préparation d'un cas de mesure"""
+    def register(setup):
+        CASES.append(Case(name, axis, tuple(sizes), tuple(quick_sizes or sizes[:1]), setup, number))
+        return setup
+
+    return register
+
+
+# ============================================
+# JEUX DE DONNÉES
+# ============================================
+
+@lru_cache(maxsize=None)
+def sales_rows(rows: int, products: int = 200) -> pd.DataFrame:
+    """Lignes de ventes synthétiques (mêmes lignes à chaque exécution)"""
+    from src.utils.synthetic_data import SyntheticSpec, generate
+
+    spec = SyntheticSpec(rows=rows, seed=SEED, products=products)
+    return pd.concat(generate(spec), ignore_index=True)
+
+
+@lru_cache(maxsize=None)
+def view_frame(categories: int, periods: int) -> pd.DataFrame:
+    """Vue au format du data-store : une valeur par (jour, catégorie)"""
+    rng = np.random.default_rng([SEED, categories, periods])
+    days = pd.date_range('2021-01-01', periods=periods, freq='D').strftime('%Y-%m-%d')
+    labels = [f"Catégorie {index:04d}" for index in range(categories)]
+    return pd.DataFrame({
+        'periode': np.repeat(days, categories),
+        'categorie': np.tile(labels, periods),
+        'valeur': rng.gamma(2.0, 5000, periods * categories).round(2)
+    })
+
+
+def sqlite_database(rows: int) -> str:
+    """Base SQLite de ventes synthétiques, générée une fois par taille"""
+    from src.utils.synthetic_data import SyntheticSpec, generate, write_sqlite
+
+    path = os.path.join(DATA_FOLDER, f"ventes-{rows}-{SEED}.db")
+    if not os.path.exists(path):
+        os.makedirs(DATA_FOLDER, exist_ok=True)
+        # Fichier temporaire : une génération interrompue n'est pas réutilisée
+        write_sqlite(generate(SyntheticSpec(rows=rows, seed=SEED)), path + '.tmp')
+        os.replace(path + '.tmp', path)
+    return path
+
+
+# ============================================
+# CAS DE MESURE
+# ============================================
+
+@benchmark('query_builder.build_query', 'categories', [1, 10, 100], number=500)
+def _build_query(size: int):
+    from src.database.query_builder import QueryBuilder
+
+    builder = QueryBuilder(schema=None, dialect='sqlite')
+    filters = {
+        'categorie': [f"Catégorie {index}" for index in range(size)],
+        'region': [1, 2, 3],
+        'date_debut': '2023-01-01',
+        'date_fin': '2023-12-31'
+    }
+    return lambda: builder.build_query('ca_total', filters, 'produit', 'jour')
+
+
+@benchmark('query_builder.build_hierarchy_query', 'periods', [12, 36, 120], number=500)
+def _build_hierarchy_query(size: int):
+    from src.database.query_builder import QueryBuilder
+
+    builder = QueryBuilder()
+    periods = pd.date_range('2015-01-01', periods=size, freq='MS').strftime('%Y-%m-%d').tolist()
+    filters = {'region': [1, 2], 'date_debut': periods[0], 'date_fin': '2025-12-31'}
+    return lambda: builder.build_hierarchy_query(
+        'ca_total', filters, HIERARCHY[:2], periods
+    )
+
+
+@benchmark('fetch', 'rows', [20_000, 100_000, 500_000])
+def _fetch(size: int):
+    from src.database.connection import DatabaseConnection
+    from src.database.query_builder import QueryBuilder
+
+    db = DatabaseConnection(f"sqlite:///{sqlite_database(size)}")
+    query, params = QueryBuilder.for_connection(db).build_query(
+        'ca_total', {'date_debut': '2021-01-01', 'date_fin': '2023-12-31'},
+        'sous_categorie', 'jour'
+    )
+    return lambda: db.execute_query(query, params)
+
+
+@benchmark('hierarchical.prepare', 'rows', [10_000, 50_000, 200_000])
+def _prepare_rows(size: int):
+    from src.visualizations.tables.hierarchical_table import HierarchicalTable
+
+    table, data = HierarchicalTable(), sales_rows(size)
+    return lambda: table._prepare_hierarchical_data(data, HIERARCHY, METRICS)
+
+
+@benchmark('hierarchical.prepare', 'categories', [50, 200, 1000])
+def _prepare_categories(size: int):
+    from src.visualizations.tables.hierarchical_table import HierarchicalTable
+
+    table, data = HierarchicalTable(), sales_rows(50_000, products=size)
+    return lambda: table._prepare_hierarchical_data(data, HIERARCHY, METRICS)
+
+
+@benchmark('pivot', 'categories', [10, 100, 1000])
+def _pivot_categories(size: int):
+    from src.visualizations.tables.hierarchical_table import HierarchicalTable
+
+    table, data = HierarchicalTable(), view_frame(size, 36)
+    return lambda: table.create_pivot_table(data, ['categorie'], 'periode', 'valeur')
+
+
+@benchmark('pivot', 'periods', [36, 365, 1095])
+def _pivot_periods(size: int):
+    from src.visualizations.tables.hierarchical_table import HierarchicalTable
+
+    table, data = HierarchicalTable(), view_frame(10, size)
+    return lambda: table.create_pivot_table(data, ['categorie'], 'periode', 'valeur')
+
+
+@benchmark('stacked_bar', 'categories', [5, 20, 80])
+def _stacked_bar_categories(size: int):
+    from src.visualizations.charts.stacked_bar import StackedBarChart
+
+    chart, data = StackedBarChart(), view_frame(size, 36)
+    return lambda: chart.create_monthly_stacked_bar(data)
+
+
+@benchmark('stacked_bar', 'periods', [36, 365, 1095])
+def _stacked_bar_periods(size: int):
+    from src.visualizations.charts.stacked_bar import StackedBarChart
+
+    chart, data = StackedBarChart(), view_frame(5, size)
+    return lambda: chart.create_monthly_stacked_bar(data)
+
+
+@benchmark('serialize.figure', 'periods', [36, 365, 1095])
+def _serialize_figure(size: int):
+    from plotly.io.json import to_json_plotly
+    from src.visualizations.charts.stacked_bar import StackedBarChart
+
+    figure = StackedBarChart().create_monthly_stacked_bar(view_frame(5, size))
+    return lambda: to_json_plotly(figure)
+
+
+@benchmark('serialize.table', 'categories', [10, 100, 1000])
+def _serialize_table(size: int):
+    from plotly.io.json import to_json_plotly
+    from src.visualizations.tables.hierarchical_table import HierarchicalTable
+
+    table = HierarchicalTable().create_pivot_table(
+        view_frame(size, 36), ['categorie'], 'periode', 'valeur'
+    )
+    return lambda: to_json_plotly(table)
+
+
+@benchmark('serialize.store', 'periods', [36, 365, 1095])
+def _serialize_store(size: int):
+    data = view_frame(20, size)
+    return lambda: data.to_json(date_format='iso', orient='split')
+
+
+# ============================================
+# MESURE ET COMPARAISON
+# ============================================
+
+def _timed(func: Callable[[], Any], number: int = 1) -> float:
+    """Durée d'un appel (secondes), moyenne de `number` appels, ramasse-miettes suspendu comme avec timeit"""
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        return (time.perf_counter() - started) / number
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _summary(runs: List[float]) -> Dict[str, Any]:
+    return {
+        'median': statistics.median(runs),
+        'min': min(runs),
+        'stdev': statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        'runs': runs
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, number: int = 1) -> Dict[str, Any]:
+    """Un appel de préchauffage, puis `repeat` mesures consécutives"""
+    func()
+    return _summary([_timed(func, number) for _ in range(repeat)])
+
+
+def _calibration_work() -> Callable[[], Any]:
+    """Calcul fixe (tri numpy, boucle Python) : vitesse de la machine"""
+    values = np.random.default_rng(SEED).random(500_000)
+
+    def work():
+        np.sort(values)
+        sum(index * index for index in range(200_000))
+
+    return work
+
+
+def scaling_slope(sizes: Sequence[int], durations: Sequence[float]) -> float:
+    """Pente log-log d'une courbe (1 : linéaire, 2 : quadratique)"""
+    return float(np.polyfit(np.log(sizes), np.log(durations), 1)[0])
+
+
+def run_suite(
+    cases: Optional[Sequence[Case]] = None,
+    quick: bool = False,
+    repeat: int = 7,
+    only: Optional[Sequence[str]] = None,
+    progress: Optional[Callable[[str], None]] = print
+) -> Dict[str, Any]:
+    """
+    Mesure les cas et construit le rapport (format de baseline.json)
+
+    Args:
+        cases: Cas à mesurer (tous les cas enregistrés par défaut)
+        quick: Ne mesurer que les plus petits points de chaque courbe
+        repeat: Mesures par point
+        only: Motifs de noms de cas (fnmatch) à mesurer
+        progress: Affichage de la durée minimale de chaque point
+    """
+    points = [
+        (case, size)
+        for case in (CASES if cases is None else cases)
+        if not only or any(fnmatch.fnmatch(case.name, pattern) for pattern in only)
+        for size in (case.quick_sizes if quick else case.sizes)
+    ]
+    funcs = [case.setup(size) for case, size in points]
+    calibration = _calibration_work()
+    for func in funcs + [calibration]:
+        func()  # préchauffage (imports, caches, pools)
+
+    # Mesures entrelacées : les répétitions d'un point sont réparties sur
+    # toute l'exécution, une période de charge de la machine ne les touche
+    # pas toutes
+    runs = [[] for _ in points]
+    calibration_runs = []
+    for _ in range(repeat):
+        calibration_runs.append(_timed(calibration))
+        for index, ((case, _), func) in enumerate(zip(points, funcs)):
+            runs[index].append(_timed(func, case.number))
+
+    results, curves = {}, {}
+    for (case, size), point_runs in zip(points, runs):
+        stats = _summary(point_runs)
+        results[case.key(size)] = dict(case=case.name, axis=case.axis, size=size, **stats)
+        if progress:
+            progress(f"{case.key(size):<50} {stats['min'] * 1000:12.3f} ms")
+    for case in dict.fromkeys(case for case, _ in points):
+        curve = [
+            result for result in results.values()
+            if result['case'] == case.name and result['axis'] == case.axis
+        ]
+        if len(curve) > 1:
+            sizes = [result['size'] for result in curve]
+            durations = [result['min'] for result in curve]
+            curves[f"{case.name}/{case.axis}"] = {
+                'sizes': sizes,
+                'min': durations,
+                'slope': scaling_slope(sizes, durations)
+            }
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'quick': quick,
+        'repeat': repeat,
+        'calibration_seconds': min(calibration_runs),
+        'results': results,
+        'curves': curves
+    }
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_regression: float = 0.5,
+    thresholds: Optional[Dict[str, float]] = None,
+    min_delta: float = MIN_DELTA_SECONDS,
+    normalize: bool = True
+) -> List[Comparison]:
+    """
+    Compare les durées minimales d'un rapport à celles de la référence
+
+    Args:
+        max_regression: Hausse relative tolérée (0.5 : +50 %)
+        thresholds: Seuils par point (clé complète) ou par cas (nom)
+        min_delta: Hausse absolue (secondes) en dessous de laquelle un point
+                   n'est jamais en régression
+        normalize: Ramener la référence à la vitesse de la machine courante
+    """
+    thresholds = thresholds or {}
+    scale = 1.0
+    if normalize and report.get('calibration_seconds') and baseline.get('calibration_seconds'):
+        scale = report['calibration_seconds'] / baseline['calibration_seconds']
+
+    comparisons = []
+    for key, result in report['results'].items():
+        reference = baseline.get('results', {}).get(key)
+        if reference is None:
+            continue
+        threshold = thresholds.get(key, thresholds.get(result['case'], max_regression))
+        expected = reference['min'] * scale
+        ratio = result['min'] / expected if expected else float('inf')
+        comparisons.append(Comparison(
+            key, expected, result['min'], ratio, threshold,
+            ratio > 1 + threshold and result['min'] - expected > min_delta
+        ))
+    return comparisons
+
+
+def _parse_thresholds(values: Sequence[str]) -> Dict[str, float]:
+    """['pivot=0.5', ...] -> {'pivot': 0.5}"""
+    thresholds = {}
+    for value in values:
+        name, _, threshold = value.partition('=')
+        thresholds[name] = float(threshold)
+    return thresholds
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="Plus petits points de chaque courbe")
+    parser.add_argument('--only', action='append', default=[], help="Motif de noms de cas (ex: 'pivot*')")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--output', default=os.path.join(DATA_FOLDER, 'results.json'))
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--max-regression', type=float, default=0.5)
+    parser.add_argument('--threshold', action='append', default=[], help="Seuil d'un cas ou d'un point (CAS=0.5)")
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_SECONDS * 1000)
+    parser.add_argument('--no-normalize', action='store_true', help="Ne pas corriger par l'étalonnage")
+    parser.add_argument('--update-baseline', action='store_true', help="Remplacer la référence par ces mesures")
+    args = parser.parse_args(argv)
+
+    report = run_suite(quick=args.quick, repeat=args.repeat, only=args.only)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+
+    print("\nCourbes (pente log-log):")
+    for name, curve in report['curves'].items():
+        print(f"  {name:<48} {curve['slope']:6.2f}")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    if args.update_baseline:
+        # Les seuils déclarés dans la référence sont conservés
+        report['thresholds'] = (baseline or {}).get('thresholds', {})
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+            file.write('\n')
+        print(f"\nRéférence mise à jour: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"\nPas de référence ({args.baseline}) : comparaison ignorée")
+        return 0
+
+    comparisons = compare(
+        report, baseline,
+        max_regression=args.max_regression,
+        thresholds=dict(baseline.get('thresholds', {}), **_parse_thresholds(args.threshold)),
+        min_delta=args.min_delta_ms / 1000,
+        normalize=not args.no_normalize
+    )
+    print(f"\n{'point':<50} {'référence':>12} {'mesure':>12} {'ratio':>7}")
+    for comparison in comparisons:
+        print(
+            f"{comparison.key:<50} {comparison.expected * 1000:9.3f} ms "
+            f"{comparison.current * 1000:9.3f} ms {comparison.ratio:7.2f}"
+            + ("  RÉGRESSION" if comparison.regressed else "")
+        )
+
+    regressions = [comparison for comparison in comparisons if comparison.regressed]
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) au-delà du seuil")
+        return 1
+    print(f"\nAucune régression ({len(comparisons)} points comparés)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Tests du banc d'essai (mesure, comparaison à la référence, seuils)
+"""
+import json
+
+from tests.benchmarks import suite
+from tests.benchmarks.suite import BASELINE_PATH, CASES, Case, compare, main, run_suite
+
+
+def report(calibration=1.0, **durations):
+    return {
+        'calibration_seconds': calibration,
+        'results': {
+            key: {'case': key.split('[')[0], 'min': duration, 'median': duration}
+            for key, duration in durations.items()
+        }
+    }
+
+
+def regressed(comparisons):
+    return {comparison.key for comparison in comparisons if comparison.regressed}
+
+
+def test_regression_above_threshold():
+    baseline = report(**{'pivot[rows=1]': 0.010, 'fetch[rows=1]': 0.010})
+    current = report(**{'pivot[rows=1]': 0.014, 'fetch[rows=1]': 0.016, 'new[rows=1]': 1.0})
+    comparisons = compare(current, baseline, max_regression=0.5)
+    # Les points absents de la référence ne sont pas comparés
+    assert [comparison.key for comparison in comparisons] == ['pivot[rows=1]', 'fetch[rows=1]']
+    assert regressed(comparisons) == {'fetch[rows=1]'}
+
+
+def test_thresholds_by_case_and_by_point():
+    baseline = report(**{'pivot[rows=1]': 0.010, 'pivot[rows=2]': 0.010})
+    current = report(**{'pivot[rows=1]': 0.030, 'pivot[rows=2]': 0.030})
+    assert regressed(compare(current, baseline, thresholds={'pivot': 2.5})) == set()
+    assert regressed(compare(
+        current, baseline, thresholds={'pivot': 2.5, 'pivot[rows=2]': 0.5}
+    )) == {'pivot[rows=2]'}
+
+
+def test_small_absolute_changes_are_noise():
+    baseline = report(**{'query_builder[categories=1]': 0.00001})
+    current = report(**{'query_builder[categories=1]': 0.00003})
+    assert regressed(compare(current, baseline)) == set()
+    assert regressed(compare(current, baseline, min_delta=0)) == {'query_builder[categories=1]'}
+
+
+def test_baseline_is_scaled_to_machine_speed():
+    baseline = report(calibration=1.0, **{'pivot[rows=1]': 0.010})
+    current = report(calibration=2.0, **{'pivot[rows=1]': 0.025})
+    assert regressed(compare(current, baseline)) == set()
+    assert regressed(compare(current, baseline, normalize=False)) == {'pivot[rows=1]'}
+
+
+def test_scaling_curves():
+    def setup(size):
+        return lambda: sum(range(size * 1000))
+
+    result = run_suite([Case('somme', 'rows', (10, 100), (10,), setup)], repeat=3, progress=None)
+    assert set(result['results']) == {'somme[rows=10]', 'somme[rows=100]'}
+    assert len(result['results']['somme[rows=10]']['runs']) == 3
+    assert 0.5 < result['curves']['somme/rows']['slope'] < 1.5
+
+    quick = run_suite([Case('somme', 'rows', (10, 100), (10,), setup)], quick=True, repeat=1, progress=None)
+    assert set(quick['results']) == {'somme[rows=10]'} and quick['curves'] == {}
+
+
+def test_baseline_covers_every_case():
+    with open(BASELINE_PATH, encoding='utf-8') as file:
+        baseline = json.load(file)
+    points = {case.key(size) for case in CASES for size in case.sizes}
+    assert points == set(baseline['results'])
+    assert all(set(case.quick_sizes) <= set(case.sizes) for case in CASES)
+
+
+def test_quick_run_of_every_case(tmp_path, monkeypatch):
+    monkeypatch.setattr(suite, 'DATA_FOLDER', str(tmp_path))
+    result = run_suite(quick=True, repeat=1, progress=None)
+    assert len(result['results']) == len(CASES)
+    assert all(point['min'] > 0 for point in result['results'].values())
+
+
+def test_exit_code_on_regression(tmp_path, capsys):
+    baseline_path = tmp_path / 'baseline.json'
+    arguments = [
+        '--only', 'serialize.store', '--quick', '--repeat', '1', '--min-delta-ms', '0',
+        '--output', str(tmp_path / 'results.json'), '--baseline', str(baseline_path)
+    ]
+    assert main(arguments + ['--update-baseline']) == 0
+    stored = json.loads(baseline_path.read_text(encoding='utf-8'))
+    assert list(stored['results']) == ['serialize.store[periods=36]']
+
+    stored['results']['serialize.store[periods=36]']['min'] = 1e-9
+    stored['thresholds'] = {'pivot': 1.0}
+    baseline_path.write_text(json.dumps(stored), encoding='utf-8')
+    assert main(arguments) == 1
+    assert 'RÉGRESSION' in capsys.readouterr().out
+    assert main(arguments + ['--threshold', 'serialize.store=1e12']) == 0
+
+    # La mise à jour de la référence conserve les seuils déclarés
+    assert main(arguments + ['--update-baseline']) == 0
+    assert json.loads(baseline_path.read_text(encoding='utf-8'))['thresholds'] == {'pivot': 1.0}
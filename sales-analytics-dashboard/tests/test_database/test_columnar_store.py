@@ -0,0 +1,184 @@
+"""
+Tests du stockage colonnaire en mémoire (équivalence SQL et rafraîchissement)
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.columnar_store import ColumnarSalesStore
+from src.database.connection import DatabaseConnection
+from src.database.invalidation import InProcessNotifier
+from src.database.query_builder import QueryBuilder
+
+
+class RecordingConnection(DatabaseConnection):
+    """Connexion SQLite qui enregistre les paramètres des requêtes"""
+
+    def __init__(self, connection_string):
+        super().__init__(connection_string)
+        self.queries = []
+
+    def execute_query(self, query, params=None, *args, **kwargs):
+        self.queries.append(dict(params or {}))
+        return super().execute_query(query, params, *args, **kwargs)
+
+    def execute_query_chunked(self, query, params=None, *args, **kwargs):
+        self.queries.append(dict(params or {}))
+        return super().execute_query_chunked(query, params, *args, **kwargs)
+
+
+def _sales(start: str, days: int, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    produit_id = rng.integers(1, 8, n_rows)
+    return pd.DataFrame({
+        'date_vente': (
+            pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n_rows), unit='D')
+        ).strftime('%Y-%m-%d'),
+        'categorie_principale': np.where(produit_id < 4, 'Alimentaire', 'Textile'),
+        'sous_categorie': np.where(produit_id % 2 == 0, 'Pair', 'Impair'),
+        'produit_id': produit_id,
+        'nom_produit': [f"Produit {value}" for value in produit_id],
+        'region_id': rng.integers(1, 4, n_rows),
+        'montant_vente': rng.integers(100, 10000, n_rows) / 100,
+        'quantite': rng.integers(1, 5, n_rows),
+        'transaction_id': rng.integers(1, 2000, n_rows)
+    })
+
+
+@pytest.fixture(scope='module')
+def database_url(tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp('columnar') / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        _sales('2023-01-01', 500, 5000).to_sql('ventes', connection, index=False)
+    return f"sqlite:///{path}"
+
+
+@pytest.fixture(scope='module')
+def loaded_store(database_url) -> ColumnarSalesStore:
+    store = ColumnarSalesStore(
+        db=DatabaseConnection(database_url),
+        query_builder=QueryBuilder(schema=None, dialect='sqlite'),
+        budget_mb=64,
+        chunksize=700
+    )
+    assert store.load()
+    return store
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'ventes.db'
+    history = _sales('2023-01-01', 181, 3000)
+    history.loc[0, 'date_vente'] = '2023-06-30'
+    with sqlite3.connect(path) as connection:
+        history.to_sql('ventes', connection, index=False)
+    return path
+
+
+def _store(path):
+    store = ColumnarSalesStore(
+        db=RecordingConnection(f"sqlite:///{path}"),
+        query_builder=QueryBuilder(schema=None, dialect='sqlite'),
+        budget_mb=64
+    )
+    assert store.load()
+    return store
+
+
+def _sql(db, *args) -> pd.DataFrame:
+    query, params = QueryBuilder(schema=None, dialect='sqlite').build_query(*args)
+    return DatabaseConnection.execute_query(db, query, params)
+
+
+def _assert_same(result: pd.DataFrame, expected: pd.DataFrame):
+    """Même contenu, à l'ordre des lignes et aux types près"""
+    expected = expected.assign(periode=pd.to_datetime(expected['periode']))
+    keys = [col for col in expected.columns if col != 'valeur']
+    assert sorted(result.columns) == sorted(expected.columns)
+    result = result.astype({column: object for column in result.select_dtypes('category')})
+    pd.testing.assert_frame_equal(
+        result[expected.columns].sort_values(keys).reset_index(drop=True),
+        expected.sort_values(keys).reset_index(drop=True),
+        check_dtype=False
+    )
+
+
+@pytest.mark.parametrize('time_dimension', ['jour', 'semaine', 'mois', 'annee'])
+@pytest.mark.parametrize('granularity', ['entreprise', 'categorie', 'sous_categorie', 'produit'])
+@pytest.mark.parametrize('indicator_id', ['ca_total', 'quantite_vendue', 'nombre_transactions', 'panier_moyen'])
+def test_query_matches_sql(loaded_store, indicator_id, granularity, time_dimension):
+    filters = {'date_debut': '2023-02-11', 'date_fin': '2024-03-20', 'region': [1, 3]}
+    _assert_same(
+        loaded_store.query(indicator_id, filters, granularity, time_dimension),
+        _sql(loaded_store.db, indicator_id, filters, granularity, time_dimension)
+    )
+
+
+def test_category_filter_matches_sql(loaded_store):
+    filters = {'categorie': ['Textile'], 'date_fin': '2023-08-31'}
+    _assert_same(
+        loaded_store.query('ca_total', filters, 'produit', 'mois'),
+        _sql(loaded_store.db, 'ca_total', filters, 'produit', 'mois')
+    )
+
+
+def test_refresh_replaces_changed_months(path):
+    store = _store(path)
+    notifier = InProcessNotifier()
+    store.attach(notifier)
+    with sqlite3.connect(path) as connection:
+        # Correction d'une période passée et ventes tardives du jour du watermark
+        connection.execute("UPDATE ventes SET montant_vente = montant_vente + 5 WHERE date_vente = '2023-02-10'")
+    late = _sales('2023-06-30', 1, 20, seed=1)
+    new = _sales('2023-07-01', 45, 300, seed=2)
+    with sqlite3.connect(path) as connection:
+        pd.concat([late, new]).to_sql('ventes', connection, index=False, if_exists='append')
+
+    store.db.queries.clear()
+    notifier.notify()
+    # Dates liées en texte ISO ; seuls les mois modifiés sont relus
+    reads = [query for query in store.db.queries if 'date_debut' in query and 'date_fin' in query]
+    assert [(query['date_debut'], query['date_fin']) for query in reads] == [
+        ('2023-02-01', '2023-02-28'), ('2023-06-01', '2023-08-31')
+    ]
+    assert store.available and store.watermark == pd.Timestamp(new['date_vente'].max())
+
+    for indicator_id in ('ca_total', 'nombre_transactions'):
+        _assert_same(
+            store.query(indicator_id, {}, 'categorie', 'jour'),
+            _sql(store.db, indicator_id, {}, 'categorie', 'jour')
+        )
+
+
+def test_refresh_is_limited_to_notified_period(path):
+    store = _store(path)
+    with sqlite3.connect(path) as connection:
+        connection.execute("DELETE FROM ventes WHERE date_vente = '2023-03-03'")
+        connection.execute("DELETE FROM ventes WHERE date_vente = '2023-05-05'")
+
+    assert store.refresh('2023-05-01', '2023-05-31') > 0
+    # La correction de mars, hors de la période notifiée, n'est pas encore vue
+    assert store.query('ca_total', {'date_debut': '2023-03-03', 'date_fin': '2023-03-03'}, 'entreprise').shape[0] == 1
+    assert store.query('ca_total', {'date_debut': '2023-05-05', 'date_fin': '2023-05-05'}, 'entreprise').empty
+
+    assert store.refresh() > 0
+    _assert_same(store.query('ca_total', {}, 'produit', 'mois'), _sql(store.db, 'ca_total', {}, 'produit', 'mois'))
+    assert store.refresh() == 0
+
+
+def test_failed_refresh_falls_back_and_reloads(path):
+    store = _store(path)
+    with sqlite3.connect(path) as connection:
+        connection.execute("ALTER TABLE ventes RENAME TO ventes_old")
+    assert store.refresh() == 0
+    # Les vues repassent par les requêtes jusqu'au rechargement
+    assert not store.available
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("ALTER TABLE ventes_old RENAME TO ventes")
+    store.refresh()
+    store.start_loading().join(10)
+    assert store.available
+    _assert_same(store.query('ca_total', {}, 'categorie', 'mois'), _sql(store.db, 'ca_total', {}, 'categorie', 'mois'))
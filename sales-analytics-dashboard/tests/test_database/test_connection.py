@@ -0,0 +1,94 @@
+"""
+Tests du dimensionnement des pools par worker et de la reprise après fork
+"""
+import sqlite3
+
+import pytest
+
+from src.database import connection as connection_module
+from src.database.connection import DatabaseConnection, EngineRegistry, worker_pool_size
+
+
+def test_pool_is_capped_by_worker_share():
+    assert worker_pool_size(5, 10, workers=1, max_connections=90) == (5, 10)
+    assert worker_pool_size(5, 10, workers=9, max_connections=90) == (5, 5)
+    assert worker_pool_size(5, 10, workers=30, max_connections=90) == (3, 0)
+    assert worker_pool_size(5, 10, workers=200, max_connections=90) == (1, 0)
+
+
+@pytest.fixture
+def sqlite_url(tmp_path):
+    path = tmp_path / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE ventes (montant_vente REAL)")
+    return f"sqlite:///{path}"
+
+
+def test_after_fork_resizes_existing_pools(sqlite_url, monkeypatch):
+    registry = EngineRegistry(pools={'entreprise': {'url': sqlite_url, 'pool_size': 5, 'max_overflow': 10}})
+    db = registry.get()
+    assert db.test_connection()
+    engine = db.engine
+
+    monkeypatch.setattr(connection_module, '_worker_count', 30)
+    monkeypatch.setattr(connection_module, 'DB_MAX_CONNECTIONS', 90)
+    registry.after_fork()
+
+    # Même objet (références conservées par les caches), nouveau moteur
+    assert registry.get() is db
+    assert db.engine is not engine
+    assert (db.pool_size, db.max_overflow) == (3, 0)
+    assert db.scheduler.capacity == 3
+    assert db.test_connection()
+
+    # Les pools créés ensuite dans le worker sont aussi plafonnés
+    assert DatabaseConnection(sqlite_url).max_overflow == 0
+
+
+def test_default_query_builder_follows_connection_dialect(sqlite_url):
+    from src.database.date_blocks import BlockedQueryExecutor
+
+    executor = BlockedQueryExecutor(db=DatabaseConnection(sqlite_url))
+    assert executor.query_builder.dialect == 'sqlite'
+    assert executor.query_builder.base_table == 'ventes'
+
+
+def test_worker_pools_share_the_connection_budget(tmp_path, monkeypatch):
+    from src.database.shards import ShardedDatabase
+
+    urls = {}
+    for name in ('entreprise', 'region', 'ventes', 'nord', 'sud'):
+        path = tmp_path / f'{name}.db'
+        with sqlite3.connect(path) as connection:
+            connection.execute("CREATE TABLE ventes (montant_vente REAL)")
+        urls[name] = f"sqlite:///{path}"
+    pools = {
+        name: {'url': urls[name], 'pool_size': 5, 'max_overflow': 10}
+        for name in ('entreprise', 'region', 'ventes')
+    }
+    shards = {1: urls['nord'], 2: urls['nord'], 3: urls['sud']}
+    monkeypatch.setattr(connection_module, 'DATABASE_POOLS', pools)
+    monkeypatch.setattr(connection_module, 'DATABASE_SHARDS', shards)
+    monkeypatch.setattr(connection_module, 'DB_MAX_CONNECTIONS', 60)
+    # 3 bases logiques et 2 URL de shards
+    assert connection_module.worker_engine_count() == 5
+
+    registry = EngineRegistry(pools=pools)
+    sharded = ShardedDatabase(shards)
+    monkeypatch.setattr(connection_module, '_engine_registry', registry)
+    monkeypatch.setattr('src.database.shards._sharded_database', sharded)
+    for name in pools:
+        registry.get(name)
+
+    workers = 4
+    connection_module.init_worker_connections(workers)
+    try:
+        connections = list(registry.stats().values()) + [shard.db.pool_status() for shard in sharded.shards]
+        assert len(connections) == 5
+        # Total de tous les pools de tous les workers sous la limite du serveur
+        assert workers * sum(status['pool_size'] + status['max_overflow'] for status in connections) <= 60
+        assert all(shard.db.test_connection() for shard in sharded.shards)
+    finally:
+        monkeypatch.setattr(connection_module, '_worker_count', 1)
+        sharded.close()
+        registry.close()
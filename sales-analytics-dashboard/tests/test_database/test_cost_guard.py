@@ -0,0 +1,79 @@
+"""
+Tests du garde-fou de coût (estimations et dégradation des vues)
+"""
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.database.connection import DatabaseConnection
+from src.database.cost_guard import CostGuard, parse_explain, period_count
+from src.database.dimensions import DimensionCache
+from src.database.query_builder import QueryBuilder
+from src.database.views import ViewSelection
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory) -> DatabaseConnection:
+    # 2 catégories, 4 sous-catégories, 40 produits
+    products = pd.DataFrame({'produit_id': range(1, 41)})
+    products['categorie_principale'] = ['Alimentaire', 'Textile'] * 20
+    products['sous_categorie'] = [f"Sous-catégorie {i % 4}" for i in range(40)]
+    products['nom_produit'] = [f"Produit {i}" for i in products['produit_id']]
+    products['region_id'] = 1
+
+    path = tmp_path_factory.mktemp('cost_guard') / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        products.to_sql('ventes', connection, index=False)
+    return DatabaseConnection(f"sqlite:///{path}")
+
+
+@pytest.fixture
+def guard(db) -> CostGuard:
+    dimensions = DimensionCache(db, QueryBuilder(schema=None, dialect='sqlite'))
+    return CostGuard(db=db, dimensions=dimensions, max_rows=100, mode='downgrade')
+
+
+def _selection(granularity, category='all'):
+    return ViewSelection('ca_total', category, granularity, 'all', '2023-01-01', '2024-12-31')
+
+
+def test_period_count():
+    assert period_count('2023-01-15', '2024-12-01', 'mois') == 24
+    assert period_count('2023-01-01', '2024-12-31', 'annee') == 2
+    assert period_count('2023-01-01', '2023-01-31', 'jour') == 31
+    assert period_count(None, '2023-01-31', 'mois') == 1
+
+
+def test_parse_explain():
+    plan = json.dumps([{'Plan': {'Node Type': 'Aggregate', 'Plan Rows': 1200, 'Total Cost': 5321.5}}])
+    assert parse_explain(plan) == (1200.0, 5321.5)
+
+
+def test_small_view_runs_unchanged(guard):
+    decision = guard.check(_selection('categorie'))
+    assert decision.action == 'run'
+    assert decision.estimate == (48.0, None, 'statistiques')
+
+
+def test_heavy_view_is_downgraded_step_by_step(guard):
+    # 24 mois × 40 produits : le grain annuel suffit (2 × 40)
+    decision = guard.check(_selection('produit'))
+    assert decision.action == 'downgrade'
+    assert (decision.selection.granularity, decision.time_dimension) == ('produit', 'annee')
+
+    # 730 jours × 4 sous-catégories : passage au mois (24 × 4)
+    decision = guard.check(_selection('sous_categorie'), 'jour')
+    assert (decision.selection.granularity, decision.time_dimension) == ('sous_categorie', 'mois')
+
+
+def test_category_filter_reduces_estimate(guard):
+    assert guard.estimate(_selection('produit', 'Textile')).rows == 24 * 20
+
+
+def test_confirm_mode_asks_before_running(guard):
+    guard.mode = 'confirm'
+    decision = guard.check(_selection('produit'))
+    assert decision.action == 'confirm'
+    assert decision.selection.granularity == 'produit'
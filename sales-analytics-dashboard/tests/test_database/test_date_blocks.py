@@ -0,0 +1,161 @@
+"""
+Tests du découpage des plages de dates en blocs et de leur mise en cache
+"""
+import sqlite3
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.cache import QueryCache
+from src.database.connection import DatabaseConnection
+from src.database.date_blocks import BlockedQueryExecutor, _contiguous_runs, split_date_range
+from src.database.query_builder import QueryBuilder
+
+
+class CountingConnection(DatabaseConnection):
+    """Connexion SQLite qui enregistre les requêtes envoyées"""
+
+    def __init__(self, connection_string):
+        super().__init__(connection_string)
+        self.queries = []
+
+    def execute_query(self, query, params=None, *args, **kwargs):
+        self.queries.append(dict(params or {}))
+        return super().execute_query(query, params, *args, **kwargs)
+
+
+def _sales(seed: int = 0, n_rows: int = 4000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, n_rows), unit='D')
+    produit_id = rng.integers(1, 10, n_rows)
+    return pd.DataFrame({
+        'date_vente': days.strftime('%Y-%m-%d'),
+        'categorie_principale': np.where(produit_id < 5, 'Alimentaire', 'Textile'),
+        'sous_categorie': np.where(produit_id % 2 == 0, 'Pair', 'Impair'),
+        'produit_id': produit_id,
+        'nom_produit': [f"Produit {value}" for value in produit_id],
+        'region_id': rng.integers(1, 4, n_rows),
+        'montant_vente': rng.integers(100, 10000, n_rows) / 100,
+        'quantite': rng.integers(1, 5, n_rows),
+        'transaction_id': rng.integers(1, 1500, n_rows)
+    })
+
+
+@pytest.fixture(scope='module')
+def database_url(tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp('blocks') / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        _sales().to_sql('ventes', connection, index=False)
+    return f"sqlite:///{path}"
+
+
+@pytest.fixture
+def db(database_url) -> CountingConnection:
+    return CountingConnection(database_url)
+
+
+@pytest.fixture
+def executor(db) -> BlockedQueryExecutor:
+    return BlockedQueryExecutor(
+        db=db,
+        query_builder=QueryBuilder(schema=None, dialect='sqlite'),
+        cache=QueryCache(),
+        incremental=False
+    )
+
+
+def _unsplit(db, *args) -> pd.DataFrame:
+    query, params = QueryBuilder(schema=None, dialect='sqlite').build_query(*args)
+    return DatabaseConnection.execute_query(db, query, params)
+
+
+def test_split_into_months_with_partial_ends():
+    blocks = split_date_range('2023-03-15', '2024-02-10', 'mois')
+    assert [block.key for block in blocks] == [
+        f"2023-{month:02d}" for month in range(3, 13)
+    ] + ['2024-01', '2024-02']
+    assert (blocks[0].start, blocks[0].complete) == (date(2023, 3, 15), False)
+    assert (blocks[-1].end, blocks[-1].complete) == (date(2024, 2, 10), False)
+    assert all(block.complete for block in blocks[1:-1])
+    assert blocks[1].start == date(2023, 4, 1) and blocks[1].end == date(2023, 4, 30)
+
+
+def test_split_into_years_and_unsplit_weeks():
+    blocks = split_date_range('2022-06-01', '2024-12-31', 'annee')
+    assert [(block.key, block.complete) for block in blocks] == [
+        ('2022', False), ('2023', True), ('2024', True)
+    ]
+    weeks = split_date_range('2023-01-05', '2023-03-20', 'semaine')
+    assert len(weeks) == 1 and (weeks[0].start, weeks[0].end) == (date(2023, 1, 5), date(2023, 3, 20))
+    assert split_date_range('2023-02-01', '2023-01-01') == []
+
+
+def test_contiguous_runs_group_consecutive_blocks():
+    blocks = split_date_range('2023-01-01', '2023-08-31')
+    runs = _contiguous_runs([blocks[0], blocks[1], blocks[3], blocks[6], blocks[7]])
+    assert [[block.key for block in run] for run in runs] == [
+        ['2023-01', '2023-02'], ['2023-04'], ['2023-07', '2023-08']
+    ]
+
+
+@pytest.mark.parametrize('time_dimension', ['jour', 'semaine', 'mois', 'annee'])
+@pytest.mark.parametrize('granularity', ['entreprise', 'categorie', 'produit'])
+def test_blocks_match_unsplit_query(db, executor, granularity, time_dimension):
+    filters = {'date_debut': '2023-03-15', 'date_fin': '2024-09-10', 'region': [1, 2]}
+    expected = _unsplit(db, 'nombre_transactions', filters, granularity, time_dimension)
+    result = executor.execute('nombre_transactions', filters, granularity, time_dimension)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    # Deuxième lecture entièrement servie par le cache
+    queries = len(db.queries)
+    result = executor.execute('nombre_transactions', filters, granularity, time_dimension)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert len(db.queries) == queries
+
+
+def test_missing_blocks_are_read_by_contiguous_runs(db, executor):
+    for month in ('2023-03', '2023-06'):
+        start = pd.Timestamp(f"{month}-01")
+        executor.execute('ca_total', {
+            'date_debut': start.strftime('%Y-%m-%d'),
+            'date_fin': (start + pd.offsets.MonthEnd(0)).strftime('%Y-%m-%d')
+        }, 'categorie')
+    db.queries.clear()
+
+    filters = {'date_debut': '2023-01-01', 'date_fin': '2023-08-31'}
+    result = executor.execute('ca_total', filters, 'categorie')
+    assert [(query['date_debut'], query['date_fin']) for query in db.queries] == [
+        ('2023-01-01', '2023-02-28'), ('2023-04-01', '2023-05-31'), ('2023-07-01', '2023-08-31')
+    ]
+    # Blocs en cache et blocs lus assemblés dans l'ordre des périodes
+    pd.testing.assert_frame_equal(
+        result, _unsplit(db, 'ca_total', filters, 'categorie'), check_dtype=False
+    )
+
+
+def test_sliding_range_reads_only_the_new_month(db, executor):
+    executor.execute('quantite_vendue', {'date_debut': '2023-01-01', 'date_fin': '2023-12-31'}, 'produit')
+    db.queries.clear()
+
+    filters = {'date_debut': '2023-02-01', 'date_fin': '2024-01-31'}
+    result = executor.execute('quantite_vendue', filters, 'produit')
+    assert [(query['date_debut'], query['date_fin']) for query in db.queries] == [
+        ('2024-01-01', '2024-01-31')
+    ]
+    pd.testing.assert_frame_equal(
+        result, _unsplit(db, 'quantite_vendue', filters, 'produit'), check_dtype=False
+    )
+
+
+def test_weeks_use_exact_range_cache(db, executor):
+    filters = {'date_debut': '2023-01-05', 'date_fin': '2023-06-20'}
+    executor.execute('ca_total', filters, 'categorie', 'semaine')
+    assert [(query['date_debut'], query['date_fin']) for query in db.queries] == [
+        ('2023-01-05', '2023-06-20')
+    ]
+    assert executor.is_cached('ca_total', filters, 'categorie', 'semaine')
+    # Une autre plage n'est pas recomposée à partir de la précédente
+    assert not executor.is_cached(
+        'ca_total', {'date_debut': '2023-01-05', 'date_fin': '2023-06-27'}, 'categorie', 'semaine'
+    )
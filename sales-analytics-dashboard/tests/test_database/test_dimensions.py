@@ -0,0 +1,157 @@
+"""
+Tests du cache des dimensions et de l'ajout tardif des libellés produit
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.cache import QueryCache
+from src.database.connection import DatabaseConnection
+from src.database.date_blocks import BlockedQueryExecutor
+from src.database.dimensions import DictionaryColumn, DimensionCache
+from src.database.invalidation import InProcessNotifier
+from src.database.query_builder import QueryBuilder
+
+
+CATEGORIES = {
+    1: ('Pommes', 'Fruits', 'Alimentaire'),
+    2: ('Poires', 'Fruits', 'Alimentaire'),
+    3: ('Carottes', 'Légumes', 'Alimentaire'),
+    4: ('Chemises', 'Hauts', 'Textile'),
+    5: ('Pulls', 'Hauts', 'Textile'),
+    6: ('Jeans', 'Bas', 'Textile')
+}
+
+
+@pytest.fixture
+def path(tmp_path):
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    produit_id = rng.integers(1, 7, n_rows)
+    sales = pd.DataFrame({
+        'date_vente': (
+            pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+        ).strftime('%Y-%m-%d'),
+        'categorie_principale': [CATEGORIES[value][2] for value in produit_id],
+        'sous_categorie': [CATEGORIES[value][1] for value in produit_id],
+        'produit_id': produit_id,
+        'nom_produit': [CATEGORIES[value][0] for value in produit_id],
+        'region_id': rng.integers(1, 4, n_rows),
+        'montant_vente': rng.integers(100, 10000, n_rows) / 100,
+        'quantite': rng.integers(1, 5, n_rows),
+        'transaction_id': np.arange(n_rows)
+    })
+    path = tmp_path / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        sales.to_sql('ventes', connection, index=False)
+    return path
+
+
+@pytest.fixture
+def db(path) -> DatabaseConnection:
+    return DatabaseConnection(f"sqlite:///{path}")
+
+
+@pytest.fixture
+def dimensions(db) -> DimensionCache:
+    return DimensionCache(db, QueryBuilder(schema=None, dialect='sqlite'))
+
+
+def test_dictionary_column_round_trip():
+    column = DictionaryColumn()
+    column.extend(pd.Series(['b', 'a', None, 'b']))
+    column.extend(pd.Series(['c', 'a']))
+    assert list(column.dictionary) == ['a', 'b', 'c']
+    assert column.codes.dtype == np.int32
+    assert column.codes.tolist() == [1, 0, -1, 1, 2, 0]
+    assert column.take(np.array([0, 2, 4])).tolist() == ['b', None, 'c']
+    categorical = column.to_categorical(4)
+    assert list(categorical.astype(object)) == ['b', 'a', np.nan, 'b']
+
+
+def test_options_come_from_memory(dimensions):
+    assert dimensions.options('categorie', all_label='Toutes') == [
+        {'label': 'Toutes', 'value': 'all'},
+        {'label': 'Alimentaire', 'value': 'Alimentaire'},
+        {'label': 'Textile', 'value': 'Textile'}
+    ]
+    assert [option['value'] for option in dimensions.options('sous_categorie', parent='Textile')] == [
+        'Bas', 'Hauts'
+    ]
+    assert dimensions.options('produit')[:2] == [
+        {'label': 'Pommes', 'value': 1}, {'label': 'Poires', 'value': 2}
+    ]
+    assert [option['value'] for option in dimensions.options('region')] == [1, 2, 3]
+    assert dimensions.options('region')[0]['label'] == 'Région 1'
+    with pytest.raises(ValueError):
+        dimensions.options('magasin')
+
+
+def test_labels_and_member_counts(dimensions):
+    assert dimensions.labels('produit', [6, 9, 1]).tolist() == ['Jeans', None, 'Pommes']
+    assert dimensions.label('region', 2) == 'Région 2'
+    assert dimensions.member_count('entreprise') == 1
+    assert dimensions.member_count('sous_categorie') == 4
+    assert dimensions.member_count('produit', categories=['Textile']) == 3
+
+
+@pytest.mark.parametrize('time_dimension', ['mois', 'semaine'])
+def test_late_labels_match_full_query(db, dimensions, time_dimension):
+    query_builder = QueryBuilder(schema=None, dialect='sqlite')
+    executor = BlockedQueryExecutor(
+        db=db, query_builder=query_builder, cache=QueryCache(), dimensions=dimensions
+    )
+    filters = {'date_debut': '2023-02-15', 'date_fin': '2023-11-30', 'region': [1, 3]}
+    result = executor.execute('ca_total', filters, 'produit', time_dimension)
+
+    query, params = query_builder.build_query('ca_total', filters, 'produit', time_dimension)
+    expected = db.execute_query(query, params)
+    assert list(result.columns) == list(expected.columns)
+    # ORDER BY periode seulement : ordre des produits d'une période non défini
+    keys = ['periode', 'produit_id']
+    result = result.astype({column: object for column in result.select_dtypes('category')})
+    pd.testing.assert_frame_equal(
+        result.sort_values(keys).reset_index(drop=True),
+        expected.sort_values(keys).reset_index(drop=True),
+        check_dtype=False
+    )
+
+
+def test_new_products_are_labelled_after_refresh(path, db, dimensions):
+    executor = BlockedQueryExecutor(
+        db=db, query_builder=QueryBuilder(schema=None, dialect='sqlite'),
+        cache=QueryCache(), dimensions=dimensions
+    )
+    dimensions.load()
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "INSERT INTO ventes VALUES ('2023-12-30', 'Textile', 'Bas', 7, 'Shorts', 1, 10.0, 1, 5000)"
+        )
+    result = executor.execute('ca_total', {'date_debut': '2023-12-01', 'date_fin': '2023-12-31'}, 'produit')
+    assert 'Shorts' in set(result['nom_produit'])
+    assert dimensions.label('produit', 7) == 'Shorts'
+
+
+def test_notification_reloads_renamed_and_moved_products(path, dimensions):
+    notifier = InProcessNotifier()
+    dimensions.attach(notifier)
+    dimensions.load()
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE ventes SET nom_produit = 'Pommes bio' WHERE produit_id = 1")
+        connection.execute(
+            "UPDATE ventes SET sous_categorie = 'Racines', categorie_principale = 'Primeurs' "
+            "WHERE produit_id = 3"
+        )
+
+    # Aucun nouvel identifiant : le rafraîchissement incrémental ne voit rien
+    assert dimensions.refresh() == 0
+    assert dimensions.label('produit', 1) == 'Pommes'
+
+    notifier.notify('2023-01-01', '2023-12-31')
+    assert dimensions.label('produit', 1) == 'Pommes bio'
+    assert [option['value'] for option in dimensions.options('categorie')] == [
+        'Alimentaire', 'Primeurs', 'Textile'
+    ]
+    assert dimensions.product_frame().set_index('produit_id').loc[3, 'sous_categorie'] == 'Racines'
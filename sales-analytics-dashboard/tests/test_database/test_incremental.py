@@ -0,0 +1,186 @@
+"""
+Tests du rafraîchissement incrémental des agrégats par watermark
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.cache import QueryCache
+from src.database.connection import DatabaseConnection
+from src.database.date_blocks import BlockedQueryExecutor
+from src.database.incremental import IncrementalAggregate
+from src.database.invalidation import CacheInvalidator, InProcessNotifier
+from src.database.query_builder import QueryBuilder
+
+
+def _sales(start: str, days: int, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n_rows), unit='D')
+    produit_id = rng.integers(1, 8, n_rows)
+    return pd.DataFrame({
+        'date_vente': dates.strftime('%Y-%m-%d'),
+        'categorie_principale': np.where(produit_id < 4, 'Alimentaire', 'Textile'),
+        'sous_categorie': np.where(produit_id % 2 == 0, 'Pair', 'Impair'),
+        'produit_id': produit_id,
+        'nom_produit': [f"Produit {value}" for value in produit_id],
+        'region_id': rng.integers(1, 4, n_rows),
+        'montant_vente': rng.integers(100, 10000, n_rows) / 100,
+        'quantite': rng.integers(1, 5, n_rows),
+        'transaction_id': rng.integers(1, 100000, n_rows)
+    })
+
+
+class RecordingConnection(DatabaseConnection):
+    """Connexion SQLite qui enregistre les paramètres des requêtes"""
+
+    def __init__(self, connection_string):
+        super().__init__(connection_string)
+        self.queries = []
+
+    def execute_query(self, query, params=None, *args, **kwargs):
+        self.queries.append(dict(params or {}))
+        return super().execute_query(query, params, *args, **kwargs)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'ventes.db'
+    history = _sales('2023-01-01', 181, 3000)
+    history.loc[0, 'date_vente'] = '2023-06-30'
+    with sqlite3.connect(path) as connection:
+        history.to_sql('ventes', connection, index=False)
+    return path
+
+
+@pytest.fixture
+def db(path) -> RecordingConnection:
+    return RecordingConnection(f"sqlite:///{path}")
+
+
+def _append(path, sales: pd.DataFrame):
+    with sqlite3.connect(path) as connection:
+        sales.to_sql('ventes', connection, index=False, if_exists='append')
+
+
+def _expected(db, *args) -> pd.DataFrame:
+    query, params = QueryBuilder(schema=None, dialect='sqlite').build_query(*args)
+    return DatabaseConnection.execute_query(db, query, params)
+
+
+def _executor(db) -> BlockedQueryExecutor:
+    return BlockedQueryExecutor(
+        db=db,
+        query_builder=QueryBuilder(schema=None, dialect='sqlite'),
+        cache=QueryCache(),
+        incremental=True
+    )
+
+
+def test_load_binds_watermark_on_sqlite(db):
+    aggregate = IncrementalAggregate(
+        'ca_total', {'date_debut': '2023-02-01'}, 'categorie', 'mois',
+        db=db, query_builder=QueryBuilder(schema=None, dialect='sqlite')
+    )
+    result = aggregate.load()
+    assert aggregate.watermark == '2023-06-30'
+    pd.testing.assert_frame_equal(
+        result, _expected(db, 'ca_total', {'date_debut': '2023-02-01'}, 'categorie', 'mois'),
+        check_dtype=False
+    )
+
+
+@pytest.mark.parametrize('indicator_id', ['ca_total', 'quantite_vendue', 'nombre_transactions'])
+def test_append_is_merged_as_delta(path, db, indicator_id):
+    executor = _executor(db)
+    notifier = InProcessNotifier()
+    invalidator = CacheInvalidator(notifier, executor.cache)
+    filters = {'date_debut': '2023-01-01', 'date_fin': '2023-12-31'}
+    executor.execute(indicator_id, filters, 'categorie', 'semaine')
+
+    _append(path, _sales('2023-07-01', 10, 200, seed=1))
+    db.queries.clear()
+    notifier.notify('2023-07-01', '2023-07-10')
+
+    # Seul le delta postérieur au watermark est relu
+    reads = [query for query in db.queries if 'date_apres' in query]
+    assert [query['date_apres'] for query in reads] == ['2023-06-30']
+    assert invalidator.refreshed == 1 and invalidator.evicted == 0
+
+    db.queries.clear()
+    result = executor.execute(indicator_id, filters, 'categorie', 'semaine')
+    assert db.queries == []
+    pd.testing.assert_frame_equal(
+        result, _expected(db, indicator_id, filters, 'categorie', 'semaine'), check_dtype=False
+    )
+
+
+def test_restated_partition_is_recomputed(path, db):
+    aggregate = IncrementalAggregate(
+        'ca_total', {}, 'produit', 'jour',
+        db=db, query_builder=QueryBuilder(schema=None, dialect='sqlite')
+    )
+    aggregate.load()
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "UPDATE ventes SET montant_vente = montant_vente + 1000 WHERE date_vente = '2023-03-14'"
+        )
+    # Ventes tardives du jour du watermark, et nouvelles ventes
+    late = _sales('2023-06-30', 1, 20, seed=2)
+    _append(path, pd.concat([late, _sales('2023-07-01', 5, 50, seed=3)]))
+
+    summary = aggregate.refresh()
+    assert summary['restated_partitions'] == [pd.Timestamp('2023-03-01'), pd.Timestamp('2023-06-01')]
+    pd.testing.assert_frame_equal(
+        aggregate.to_frame(), _expected(db, 'ca_total', {}, 'produit', 'jour'), check_dtype=False
+    )
+
+    # Changement notifié sur une autre période : les partitions corrigées hors
+    # de cette période ne sont pas comparées
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE ventes SET quantite = quantite + 1 WHERE date_vente = '2023-02-10'")
+        connection.execute("UPDATE ventes SET montant_vente = 0 WHERE date_vente = '2023-04-03'")
+    assert aggregate.refresh('2023-04-01', '2023-04-30')['restated_partitions'] == [
+        pd.Timestamp('2023-04-01')
+    ]
+    # Empreintes à jour : la partition d'avril n'est plus signalée
+    assert aggregate.refresh()['restated_partitions'] == [pd.Timestamp('2023-02-01')]
+    pd.testing.assert_frame_equal(
+        aggregate.to_frame(), _expected(db, 'ca_total', {}, 'produit', 'jour'), check_dtype=False
+    )
+
+
+def test_non_additive_recomputes_open_periods(path, db):
+    executor = _executor(db)
+    notifier = InProcessNotifier()
+    CacheInvalidator(notifier, executor.cache)
+    filters = {'date_debut': '2023-01-01', 'date_fin': '2023-12-31'}
+    executor.execute('panier_moyen', filters, 'categorie', 'semaine')
+
+    _append(path, _sales('2023-07-01', 10, 200, seed=4))
+    db.queries.clear()
+    notifier.notify('2023-07-01', '2023-07-10')
+    assert not any('date_apres' in query for query in db.queries)
+    # Relecture à partir du début de la semaine du watermark seulement
+    reads = [query for query in db.queries if query.get('date_debut') != filters['date_debut']]
+    assert any(query.get('date_debut') == '2023-06-26' for query in reads)
+
+    result = executor.execute('panier_moyen', filters, 'categorie', 'semaine')
+    pd.testing.assert_frame_equal(
+        result, _expected(db, 'panier_moyen', filters, 'categorie', 'semaine'),
+        check_dtype=False
+    )
+
+
+def test_failed_refresh_evicts_entry(path, db):
+    executor = _executor(db)
+    notifier = InProcessNotifier()
+    invalidator = CacheInvalidator(notifier, executor.cache)
+    filters = {'date_debut': '2023-01-01', 'date_fin': '2023-12-31'}
+    executor.execute('ca_total', filters, 'entreprise', 'semaine')
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("DROP TABLE ventes")
+    notifier.notify('2023-07-01', '2023-07-10')
+    assert invalidator.evicted == 1 and len(executor.cache) == 0
@@ -0,0 +1,189 @@
+"""
+Tests de l'invalidation du cache sur changement des données
+"""
+import sqlite3
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import CACHE_CONFIG
+from src.database.cache import QueryCache
+from src.database.connection import DatabaseConnection
+from src.database.date_blocks import BlockedQueryExecutor
+from src.database.invalidation import (
+    CacheInvalidator,
+    ChangeEvent,
+    ChangeTablePoller,
+    InProcessNotifier,
+    PostgresListenNotifier,
+    install_cache_invalidation,
+)
+from src.database.query_builder import QueryBuilder
+
+
+class CountingConnection(DatabaseConnection):
+    """Connexion SQLite qui enregistre les requêtes envoyées"""
+
+    def __init__(self, connection_string):
+        super().__init__(connection_string)
+        self.queries = []
+
+    def execute_query(self, query, params=None, *args, **kwargs):
+        self.queries.append(dict(params or {}))
+        return super().execute_query(query, params, *args, **kwargs)
+
+
+@pytest.fixture
+def path(tmp_path):
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    produit_id = rng.integers(1, 6, n_rows)
+    sales = pd.DataFrame({
+        'date_vente': (
+            pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+        ).strftime('%Y-%m-%d'),
+        'categorie_principale': np.where(produit_id < 3, 'Alimentaire', 'Textile'),
+        'sous_categorie': 'Divers',
+        'produit_id': produit_id,
+        'nom_produit': [f"Produit {value}" for value in produit_id],
+        'region_id': rng.integers(1, 4, n_rows),
+        'montant_vente': rng.integers(100, 10000, n_rows) / 100,
+        'quantite': rng.integers(1, 5, n_rows),
+        'transaction_id': np.arange(n_rows)
+    })
+    path = tmp_path / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        sales.to_sql('ventes', connection, index=False)
+    return path
+
+
+@pytest.mark.parametrize('meta, touched', [
+    ({'date_debut': '2023-05-01', 'date_fin': '2023-05-31'}, True),
+    ({'date_debut': '2023-04-01', 'date_fin': '2023-04-30'}, False),
+    ({'date_debut': '2023-07-01', 'date_fin': '2023-07-31'}, False),
+    ({'date_debut': '2023-06-30', 'date_fin': '2023-12-31'}, True),
+    ({'date_debut': '2023-05-01', 'date_fin': '2023-05-31', 'regions': [2, 3]}, True),
+    ({'date_debut': '2023-05-01', 'date_fin': '2023-05-31', 'regions': ['3']}, False),
+    ({'date_fin': '2023-05-10'}, True),
+    ({}, True),
+])
+def test_event_overlaps_entry_scope(meta, touched):
+    event = ChangeEvent(date(2023, 5, 10), date(2023, 6, 30), [1, 2])
+    assert event.overlaps(meta) is touched
+
+
+def test_unbounded_event_touches_every_entry():
+    event = ChangeEvent.from_payload('{"regions": 2}')
+    assert event == ChangeEvent(None, None, [2])
+    assert event.overlaps({'date_debut': '2020-01-01', 'date_fin': '2020-01-31', 'regions': [2]})
+    assert not event.overlaps({'regions': [1]})
+    assert ChangeEvent.from_payload('').overlaps({'date_debut': '2020-01-01', 'regions': [1]})
+
+
+def test_only_overlapping_entries_are_evicted():
+    cache = QueryCache()
+    notifier = InProcessNotifier()
+    invalidator = CacheInvalidator(notifier, cache)
+    cache.set('mars', 1, meta={'date_debut': '2023-03-01', 'date_fin': '2023-03-31'})
+    cache.set('avril', 2, meta={'date_debut': '2023-04-01', 'date_fin': '2023-04-30'})
+    cache.set('avril_nord', 3, meta={'date_debut': '2023-04-01', 'date_fin': '2023-04-30', 'regions': [1]})
+    cache.set('sans_perimetre', 4)
+
+    notifier.notify('2023-04-15', '2023-04-15', regions=[2])
+    assert invalidator.evicted == 2
+    assert 'mars' in cache and 'avril_nord' in cache
+    assert 'avril' not in cache and 'sans_perimetre' not in cache
+
+
+def test_notify_evicts_changed_blocks_only(path):
+    db = CountingConnection(f"sqlite:///{path}")
+    executor = BlockedQueryExecutor(
+        db=db,
+        query_builder=QueryBuilder(schema=None, dialect='sqlite'),
+        cache=QueryCache(),
+        incremental=False
+    )
+    notifier = InProcessNotifier()
+    CacheInvalidator(notifier, executor.cache)
+    filters = {'date_debut': '2023-01-01', 'date_fin': '2023-12-31'}
+    executor.execute('ca_total', filters, 'categorie')
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE ventes SET montant_vente = montant_vente * 2 WHERE date_vente = '2023-06-12'")
+    db.queries.clear()
+    notifier.notify('2023-06-12', '2023-06-12')
+
+    result = executor.execute('ca_total', filters, 'categorie')
+    # Seul le bloc de juin est relu, et le résultat reflète la modification
+    assert [(query['date_debut'], query['date_fin']) for query in db.queries] == [
+        ('2023-06-01', '2023-06-30')
+    ]
+    query, params = QueryBuilder(schema=None, dialect='sqlite').build_query('ca_total', filters, 'categorie')
+    pd.testing.assert_frame_equal(
+        result, DatabaseConnection.execute_query(db, query, params), check_dtype=False
+    )
+
+
+def test_long_ttl_only_with_external_source(tmp_path):
+    cache = QueryCache(default_timeout=300)
+    notifier = InProcessNotifier()
+    install_cache_invalidation(notifier, cache)
+    assert cache.default_timeout == 300
+
+    path = tmp_path / 'changes.db'
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE ventes_changes (id INTEGER, date_debut TEXT, date_fin TEXT, region_id INTEGER)")
+    poller = ChangeTablePoller(DatabaseConnection(f"sqlite:///{path}"), table='ventes_changes', poll_interval=60)
+    try:
+        install_cache_invalidation(poller, cache)
+        assert cache.default_timeout == CACHE_CONFIG['invalidated_timeout']
+    finally:
+        poller.stop()
+
+
+class RecordingStop(threading.Event):
+    """Événement d'arrêt qui enregistre les délais d'attente sans attendre"""
+
+    def __init__(self):
+        super().__init__()
+        self.delays = []
+
+    def wait(self, timeout=None):
+        self.delays.append(timeout)
+        return self.is_set()
+
+
+class ScriptedListener(PostgresListenNotifier):
+    """Sessions d'écoute scénarisées : échec de connexion ou coupure"""
+
+    def __init__(self, script):
+        super().__init__(channel='ventes_changes', reconnect_delay=1, max_reconnect_delay=4)
+        self.script = list(script)
+        self._stop = RecordingStop()
+
+    def _listen(self, reconnected=False):
+        if not self.script:
+            self._stop.set()
+            return
+        outcome = self.script.pop(0)
+        if outcome == 'connected':
+            self._listening = True
+            if reconnected:
+                self.reconnections += 1
+                self.publish(ChangeEvent())
+        raise ConnectionError(outcome)
+
+
+def test_listener_reconnects_with_backoff_and_purges():
+    listener = ScriptedListener(['refused', 'refused', 'refused', 'refused', 'connected', 'refused', 'connected'])
+    events = []
+    listener.subscribe(events.append)
+    listener._run()
+
+    # Délai doublé jusqu'au plafond, puis réinitialisé après une connexion établie
+    assert listener._stop.delays[:7] == [1, 2, 4, 4, 1, 2, 1]
+    # Purge complète à la reconnexion seulement (pas à la première connexion)
+    assert listener.reconnections == 1 and events == [ChangeEvent()]
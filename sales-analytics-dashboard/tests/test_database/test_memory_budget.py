@@ -0,0 +1,107 @@
+"""
+Tests du budget mémoire par requête (plan de la vue, top N, lecture par morceaux)
+"""
+import sqlite3
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database import connection as connection_module
+from src.database.connection import DatabaseConnection, streaming_reads
+from src.database.cost_guard import CostGuard, request_memory
+from src.database.dimensions import DimensionCache
+from src.database.query_builder import QueryBuilder
+from src.database.views import OTHERS_LABEL, ViewSelection, to_store_frame
+from src.utils.memory import MemoryTracker
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory) -> DatabaseConnection:
+    # 200 produits répartis en 4 catégories
+    products = pd.DataFrame({'produit_id': range(1, 201)})
+    products['categorie_principale'] = [f"Catégorie {i % 4}" for i in range(200)]
+    products['sous_categorie'] = [f"Sous-catégorie {i % 8}" for i in range(200)]
+    products['nom_produit'] = [f"Produit {i}" for i in products['produit_id']]
+    products['region_id'] = 1
+
+    path = tmp_path_factory.mktemp('memory') / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        products.to_sql('ventes', connection, index=False)
+    return DatabaseConnection(f"sqlite:///{path}")
+
+
+def _guard(db, budget_mb) -> CostGuard:
+    dimensions = DimensionCache(db, QueryBuilder(schema=None, dialect='sqlite'))
+    return CostGuard(db=db, dimensions=dimensions, max_rows=10 ** 9, memory_budget_mb=budget_mb)
+
+
+def _selection(granularity='produit'):
+    return ViewSelection('ca_total', 'all', granularity, 'all', '2023-01-01', '2024-12-31')
+
+
+def test_memory_plan_escalates_with_smaller_budgets(db):
+    # 24 mois × 200 produits = 4 800 lignes
+    rows = 4800
+    assert _guard(db, 0).check(_selection()).action == 'run'
+
+    roomy = request_memory(rows, rows) / 1024 / 1024 + 1
+    assert _guard(db, roomy).check(_selection()) == _guard(db, 0).check(_selection())
+
+    streamed = request_memory(rows, rows, streaming=True) / 1024 / 1024
+    decision = _guard(db, (streamed + request_memory(rows, rows) / 1024 / 1024) / 2).check(_selection())
+    assert decision.streaming and decision.top_n is None and decision.action == 'run'
+
+    decision = _guard(db, 1).check(_selection())
+    assert decision.action == 'downgrade' and decision.streaming
+    assert 5 <= decision.top_n < 200
+    assert decision.selection.granularity == 'produit'
+
+    decision = _guard(db, 0.05).check(_selection())
+    assert decision.top_n is None
+    assert (decision.selection.granularity, decision.time_dimension) != ('produit', 'mois')
+
+
+def test_confirmed_view_still_fits_memory(db):
+    guard = _guard(db, 1)
+    guard.max_rows, guard.mode = 10, 'confirm'
+    assert guard.check(_selection()).action == 'confirm'
+    assert guard.check(_selection(), confirmed=True).top_n is not None
+
+
+def test_top_n_groups_others_for_additive_indicators():
+    data = pd.DataFrame({
+        'periode': ['2024-01-01'] * 4 + ['2024-02-01'] * 4,
+        'nom_produit': ['A', 'B', 'C', 'D'] * 2,
+        'valeur': [10.0, 5.0, 1.0, 2.0, 20.0, 5.0, 1.0, 1.0]
+    })
+    frame = to_store_frame(data, 'produit', top_n=2, indicator='ca_total')
+    assert list(frame['categorie']) == ['A', 'B', OTHERS_LABEL] * 2
+    assert list(frame['valeur']) == [10.0, 5.0, 3.0, 20.0, 5.0, 2.0]
+
+    averages = to_store_frame(data, 'produit', top_n=2, indicator='panier_moyen')
+    assert set(averages['categorie']) == {'A', 'B'}
+
+
+def test_streaming_reads_return_compact_frame(db, monkeypatch):
+    monkeypatch.setattr(connection_module, 'STREAMING_CHUNKSIZE', 64)
+    query = "SELECT nom_produit, categorie_principale, produit_id FROM ventes ORDER BY produit_id"
+    full = db.execute_query(query)
+    with streaming_reads():
+        compact = db.execute_query(query)
+    assert isinstance(compact['nom_produit'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(compact.astype(full.dtypes.to_dict()), full)
+
+
+def test_nested_tracemalloc_measures_keep_outer_peak():
+    tracker = MemoryTracker('tracemalloc')
+    with tracker.track() as outer:
+        big = np.ones(2_000_000)
+        del big
+        with tracker.track() as inner:
+            small = np.ones(100_000)
+        del small
+    tracemalloc.stop()
+    assert inner.bytes >= 800_000
+    assert outer.bytes >= 16_000_000
@@ -0,0 +1,62 @@
+"""
+Tests de l'aperçu sur échantillon (requête et estimateurs)
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.connection import DatabaseConnection
+from src.database.query_builder import QueryBuilder
+from src.database.sampling import estimate_from_sample
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory) -> DatabaseConnection:
+    rng = np.random.default_rng(0)
+    n_rows = 20000
+    sales = pd.DataFrame({
+        'date_vente': pd.to_datetime('2023-01-01') + pd.to_timedelta(
+            rng.integers(0, 59, n_rows), unit='D'
+        ),
+        'categorie_principale': rng.choice(['Alimentaire', 'Textile'], n_rows),
+        'montant_vente': rng.uniform(10, 100, n_rows).round(2)
+    })
+    sales['date_vente'] = sales['date_vente'].dt.strftime('%Y-%m-%d')
+
+    path = tmp_path_factory.mktemp('sampling') / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        sales.to_sql('ventes', connection, index=False)
+    return DatabaseConnection(f"sqlite:///{path}"), sales
+
+
+def test_sample_estimate_brackets_exact_total(db):
+    connection, sales = db
+    builder = QueryBuilder(schema=None, dialect='sqlite')
+    query, params = builder.build_sample_query('ca_total', {}, 'categorie', percent=20)
+    sample = connection.execute_query(query, params)
+
+    preview = estimate_from_sample(sample, 'ca_total', 0.2)
+    assert list(preview.columns) == ['valeur', 'marge', 'periode', 'categorie_principale']
+    assert len(preview) == 4
+
+    sales['periode'] = sales['date_vente'].str[:7] + '-01'
+    exact = sales.groupby(['periode', 'categorie_principale'])['montant_vente'].sum()
+    estimated = preview.set_index(['periode', 'categorie_principale'])
+    error = (estimated['valeur'] - exact.loc[estimated.index]).abs()
+    # Large tolérance (4 marges) : le tirage SQLite n'est pas reproductible
+    assert (error <= 4 * estimated['marge']).all()
+
+
+def test_average_estimate_uses_sample_mean():
+    sample = pd.DataFrame({
+        'periode': ['2023-01-01'],
+        'somme': [30.0],
+        'somme_carres': [350.0],
+        'nombre': [3]
+    })
+    preview = estimate_from_sample(sample, 'panier_moyen', 0.01)
+    assert preview['valeur'].iloc[0] == 10.0
+    # Variance de l'échantillon 25, marge 1.96 × √(25 / 3)
+    assert preview['marge'].iloc[0] == pytest.approx(1.96 * np.sqrt(25 / 3))
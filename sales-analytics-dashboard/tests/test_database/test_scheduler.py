@@ -0,0 +1,133 @@
+"""
+Tests de l'ordonnanceur de requêtes (priorités, équité, refus)
+"""
+import threading
+import time
+
+import pytest
+
+from src.database.scheduler import QueryRejected, QueryScheduler, query_context
+
+
+def _hold(scheduler, release, **kwargs):
+    """Occupe un créneau jusqu'à ce que l'évènement release soit levé"""
+    def run():
+        with scheduler.slot(**kwargs):
+            release.wait()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_batch_limits_keep_slots_for_interactive():
+    scheduler = QueryScheduler(
+        capacity=3, limits={'interactive': 3, 'prefetch': 1, 'export': 1},
+        queue_size=10, wait_timeout=0.05
+    )
+    release = threading.Event()
+    threads = [_hold(scheduler, release, priority='export') for _ in range(2)]
+    _wait_for(lambda: scheduler.stats()['running_export'] == 1)
+
+    # Le second export attend, l'interactif passe immédiatement
+    with scheduler.slot(priority='interactive'):
+        assert scheduler.stats()['running_interactive'] == 1
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_released_slot_goes_to_highest_priority_then_least_busy_user():
+    scheduler = QueryScheduler(
+        capacity=1, limits={'interactive': 1, 'prefetch': 1, 'export': 1},
+        queue_size=10, wait_timeout=2
+    )
+    order = []
+
+    def request(priority, user):
+        with scheduler.slot(priority=priority, user=user):
+            order.append((priority, user))
+
+    release = threading.Event()
+    holder = _hold(scheduler, release, priority='interactive', user='a')
+    _wait_for(lambda: scheduler.stats()['running_interactive'] == 1)
+
+    waiters = []
+    for priority, user in [('export', 'b'), ('prefetch', 'b'), ('interactive', 'a'), ('interactive', 'c')]:
+        waiters.append(threading.Thread(target=request, args=(priority, user)))
+        waiters[-1].start()
+        _wait_for(lambda: scheduler.stats()['waiting'] == len(waiters))
+
+    release.set()
+    holder.join()
+    for thread in waiters:
+        thread.join()
+
+    # 'a' a déjà été servi : 'c' passe avant
+    assert order == [
+        ('interactive', 'c'), ('interactive', 'a'), ('prefetch', 'b'), ('export', 'b')
+    ]
+
+
+def test_full_queue_and_timeout_are_rejected():
+    scheduler = QueryScheduler(
+        capacity=1, limits={'interactive': 1, 'prefetch': 1, 'export': 1},
+        queue_size=0, wait_timeout=0.05
+    )
+    release = threading.Event()
+    holder = _hold(scheduler, release)
+    _wait_for(lambda: scheduler.stats()['running_interactive'] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(QueryRejected):
+        with scheduler.slot():
+            pass
+    assert time.monotonic() - started < 0.05
+
+    scheduler.queue_size = 1
+    with pytest.raises(QueryRejected):
+        with scheduler.slot():
+            pass
+    assert scheduler.stats()['rejected'] == 2
+
+    release.set()
+    holder.join()
+
+
+def test_priority_comes_from_context():
+    scheduler = QueryScheduler(capacity=2)
+    with query_context('prefetch', user='u'):
+        with scheduler.slot():
+            assert scheduler.stats()['running_prefetch'] == 1
+    with scheduler.slot():
+        assert scheduler.stats()['running_interactive'] == 1
+
+
+def test_served_counts_decay_and_inactive_users_are_forgotten():
+    scheduler = QueryScheduler(capacity=2, fairness_halflife=0.2)
+    for index in range(200):
+        with scheduler.slot(user=f"10.0.0.{index}"):
+            pass
+    for _ in range(4):
+        with scheduler.slot(user='habitue'):
+            pass
+    assert scheduler.stats()['tracked_users'] == 201
+
+    time.sleep(0.25)
+    # Une demi-vie : les utilisateurs servis une fois sont oubliés, les autres
+    # conservent la moitié de leur compteur
+    with scheduler.slot(user='nouveau'):
+        pass
+    assert scheduler._served_by_user == {'habitue': 2, 'nouveau': 1}
+
+    time.sleep(0.65)
+    with scheduler.slot(user='nouveau'):
+        pass
+    assert scheduler._served_by_user == {'nouveau': 1}
@@ -0,0 +1,112 @@
+"""
+Tests de la fusion des agrégats partiels sur des shards SQLite locaux
+"""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.connection import DatabaseConnection
+from src.database.query_builder import QueryBuilder
+from src.database.shards import ShardedDatabase
+
+
+REGIONS = [1, 2, 3]
+
+
+def _sales(seed: int = 0, n_rows: int = 3000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 540, n_rows), unit='D')
+    produit_id = rng.integers(1, 12, n_rows)
+    return pd.DataFrame({
+        'date_vente': days.strftime('%Y-%m-%d %H:%M:%S'),
+        'categorie_principale': np.where(produit_id < 6, 'Alimentaire', 'Textile'),
+        'sous_categorie': np.where(produit_id % 2 == 0, 'Pair', 'Impair'),
+        'produit_id': produit_id,
+        'nom_produit': [f"Produit {value}" for value in produit_id],
+        'region_id': rng.choice(REGIONS, n_rows),
+        'montant_vente': rng.integers(100, 10000, n_rows) / 100,
+        'quantite': rng.integers(1, 5, n_rows),
+        'transaction_id': rng.integers(1, 800, n_rows)
+    })
+
+
+def _write(path, sales: pd.DataFrame) -> str:
+    with sqlite3.connect(path) as connection:
+        sales.to_sql('ventes', connection, index=False)
+    return f"sqlite:///{path}"
+
+
+@pytest.fixture(scope='module')
+def sales() -> pd.DataFrame:
+    data = _sales()
+    # Une transaction est toujours rattachée à une seule région
+    data['transaction_id'] = data['transaction_id'] * 10 + data['region_id']
+    return data
+
+
+@pytest.fixture(scope='module')
+def reference(tmp_path_factory, sales) -> DatabaseConnection:
+    path = tmp_path_factory.mktemp('reference') / 'ventes.db'
+    return DatabaseConnection(_write(path, sales))
+
+
+@pytest.fixture(scope='module')
+def sharded(tmp_path_factory, sales) -> ShardedDatabase:
+    folder = tmp_path_factory.mktemp('shards')
+    shards = {
+        region_id: _write(folder / f"region_{region_id}.db", sales[sales['region_id'] == region_id])
+        for region_id in REGIONS
+    }
+    database = ShardedDatabase(shards, workers=len(REGIONS))
+    yield database
+    database.close()
+
+
+def _expected(reference: DatabaseConnection, *args, **kwargs) -> pd.DataFrame:
+    query, params = QueryBuilder(schema=None, dialect='sqlite').build_query(*args, **kwargs)
+    data = reference.execute_query(query, params)
+    data['periode'] = pd.to_datetime(data['periode'])
+    return data
+
+
+@pytest.mark.parametrize('indicator_id', [
+    'ca_total', 'quantite_vendue', 'nombre_transactions', 'panier_moyen'
+])
+@pytest.mark.parametrize('granularity', ['entreprise', 'categorie', 'produit'])
+@pytest.mark.parametrize('time_dimension', ['semaine', 'mois', 'annee'])
+def test_fan_out_matches_single_database(
+    reference, sharded, indicator_id, granularity, time_dimension
+):
+    filters = {'date_debut': '2023-03-01', 'date_fin': '2024-02-29'}
+    expected = _expected(reference, indicator_id, filters, granularity, time_dimension)
+    result = sharded.execute_aggregate(indicator_id, filters, granularity, time_dimension)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_region_filter_prunes_shards(reference, sharded):
+    filters = {'region': [2, 3], 'categorie': ['Textile']}
+    assert [shard.regions for shard in sharded.shards_for(filters)] == [(2,), (3,)]
+
+    expected = _expected(reference, 'ca_total', filters, 'categorie')
+    result = sharded.execute_aggregate('ca_total', filters, 'categorie')
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_distinct_pairs_for_shared_transactions(tmp_path):
+    # Identifiants de transaction communs à plusieurs régions
+    sales = _sales(seed=1)
+    shards = {
+        region_id: _write(tmp_path / f"region_{region_id}.db", sales[sales['region_id'] == region_id])
+        for region_id in REGIONS
+    }
+    reference = DatabaseConnection(_write(tmp_path / 'ventes.db', sales))
+    expected = _expected(reference, 'nombre_transactions', {}, 'categorie', 'annee')
+
+    database = ShardedDatabase(shards, disjoint_transactions=False)
+    try:
+        result = database.execute_aggregate('nombre_transactions', {}, 'categorie', 'annee')
+    finally:
+        database.close()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
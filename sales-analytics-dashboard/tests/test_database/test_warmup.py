@@ -0,0 +1,176 @@
+"""
+Tests du préchauffage du cache et du préchargement des vues
+"""
+import sqlite3
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.database.cache import QueryCache
+from src.database.connection import DatabaseConnection
+from src.database.date_blocks import BlockedQueryExecutor
+from src.database.invalidation import InProcessNotifier
+from src.database.query_builder import QueryBuilder
+from src.database.views import QueryLog, ViewSelection
+from src.database.warmup import CacheWarmer, default_selection
+
+
+@pytest.fixture
+def executor(tmp_path) -> BlockedQueryExecutor:
+    rng = np.random.default_rng(0)
+    n_rows = 1000
+    produit_id = rng.integers(1, 6, n_rows)
+    start = pd.Timestamp(date.today()) - pd.Timedelta(days=400)
+    sales = pd.DataFrame({
+        'date_vente': (start + pd.to_timedelta(rng.integers(0, 400, n_rows), unit='D')).strftime('%Y-%m-%d'),
+        'categorie_principale': np.where(produit_id < 3, 'Alimentaire', 'Textile'),
+        'sous_categorie': np.where(produit_id % 2 == 0, 'Pair', 'Impair'),
+        'produit_id': produit_id,
+        'nom_produit': [f"Produit {value}" for value in produit_id],
+        'region_id': rng.integers(1, 4, n_rows),
+        'montant_vente': rng.integers(100, 10000, n_rows) / 100,
+        'quantite': rng.integers(1, 5, n_rows),
+        'transaction_id': np.arange(n_rows)
+    })
+    path = tmp_path / 'ventes.db'
+    with sqlite3.connect(path) as connection:
+        sales.to_sql('ventes', connection, index=False)
+    return BlockedQueryExecutor(
+        db=DatabaseConnection(f"sqlite:///{path}"),
+        query_builder=QueryBuilder(schema=None, dialect='sqlite'),
+        cache=QueryCache(),
+        incremental=False
+    )
+
+
+def _selection(**changes) -> ViewSelection:
+    return default_selection(date(2024, 6, 30))._replace(**changes)
+
+
+def test_default_selection_covers_last_year():
+    selection = default_selection(date(2024, 6, 30))
+    assert selection.combination() == ('ca_total', 'all', 'entreprise', 'all')
+    assert (selection.start_date, selection.end_date) == (date(2023, 7, 1), date(2024, 6, 30))
+
+
+def test_selections_follow_query_log():
+    query_log = QueryLog()
+    for selection, count in [
+        (_selection(granularity='categorie'), 3),
+        (_selection(indicator='quantite_vendue', region='2'), 2),
+        (_selection(), 2),
+        (_selection(granularity='produit'), 1)
+    ]:
+        for _ in range(count):
+            query_log.record(selection)
+
+    warmer = CacheWarmer(executor=object(), query_log=query_log, top_k=3)
+    combinations = [selection.combination() for selection in warmer.selections_to_warm()]
+    # Vue par défaut d'abord, puis les plus fréquentes sans doublon
+    assert combinations == [
+        ('ca_total', 'all', 'entreprise', 'all'),
+        ('ca_total', 'all', 'categorie', 'all'),
+        ('quantite_vendue', 'all', 'entreprise', '2')
+    ]
+
+
+def test_warm_fills_cache(executor):
+    query_log = QueryLog()
+    query_log.record(_selection(granularity='categorie', region='1'))
+    warmer = CacheWarmer(executor=executor, query_log=query_log, top_k=5)
+
+    assert warmer.warm() == 2
+    for selection in warmer.selections_to_warm():
+        assert executor.is_cached(
+            selection.indicator, selection.to_filters(), selection.granularity, 'mois'
+        )
+
+
+class BlockingWarmer(CacheWarmer):
+    """Préchauffage bloqué jusqu'à libération, pour observer le regroupement"""
+
+    def __init__(self):
+        super().__init__(executor=object(), query_log=QueryLog())
+        self.release = threading.Event()
+        self.running = threading.Event()
+
+    def warm(self):
+        self.running.set()
+        self.release.wait(5)
+        return 0
+
+
+def test_notifications_share_one_warm_up_thread():
+    warmer = BlockingWarmer()
+    notifier = InProcessNotifier()
+    warmer.attach(notifier)
+
+    thread = warmer.start()
+    assert warmer.running.wait(5)
+    for _ in range(10):
+        notifier.notify('2024-01-01', '2024-01-31')
+    assert warmer.start() is thread
+
+    warmer.release.set()
+    thread.join(5)
+    # Le préchauffage en cours, puis un seul pour toutes les demandes suivantes
+    assert not thread.is_alive() and warmer.warm_runs == 2
+
+
+class RecordingWarmer(CacheWarmer):
+    """Enregistre les préchargements au lieu de les exécuter"""
+
+    def __init__(self, prefetch_delay):
+        super().__init__(executor=object(), query_log=QueryLog(), prefetch_delay=prefetch_delay)
+        self.prefetched = []
+        self.done = threading.Event()
+
+    def _prefetch(self, selection):
+        self.prefetched.append(selection)
+        self.done.set()
+
+
+def test_prefetch_selects_next_granularity():
+    warmer = RecordingWarmer(prefetch_delay=0.01)
+    warmer.schedule_prefetch(_selection(granularity='categorie', region='2'))
+    assert warmer.done.wait(5)
+    assert warmer.prefetched == [_selection(granularity='sous_categorie', region='2')]
+
+
+def test_new_request_cancels_pending_prefetch():
+    warmer = RecordingWarmer(prefetch_delay=60)
+    warmer.schedule_prefetch(_selection(granularity='entreprise'))
+    pending = warmer._prefetch_timers[None]
+    # Granularité la plus fine : rien à précharger, l'attente est annulée
+    warmer.schedule_prefetch(_selection(granularity='produit'))
+    assert warmer._prefetch_timers == {}
+    pending.join(5)
+    assert not pending.is_alive() and warmer.prefetched == []
+
+
+def test_prefetch_is_scheduled_per_user():
+    warmer = RecordingWarmer(prefetch_delay=60)
+    warmer.schedule_prefetch(_selection(granularity='entreprise'), user='10.0.0.1')
+    first = warmer._prefetch_timers['10.0.0.1']
+    warmer.schedule_prefetch(_selection(granularity='categorie'), user='10.0.0.2')
+    # La demande d'un autre utilisateur n'annule pas l'attente du premier
+    assert warmer._prefetch_timers['10.0.0.1'] is first and first.is_alive()
+
+    warmer.schedule_prefetch(_selection(granularity='entreprise', region='3'), user='10.0.0.2')
+    warmer.schedule_prefetch(_selection(granularity='sous_categorie'), user='10.0.0.1')
+    assert not first.is_alive()
+
+    # Chaque utilisateur précharge la suite de sa propre dernière vue
+    warmer.prefetch_delay = 0.05
+    warmer.schedule_prefetch(_selection(granularity='categorie'), user='10.0.0.1')
+    warmer.schedule_prefetch(_selection(granularity='entreprise', region='3'), user='10.0.0.2')
+    for timer in list(warmer._prefetch_timers.values()):
+        timer.join(5)
+    assert sorted(warmer.prefetched) == sorted([
+        _selection(granularity='sous_categorie'),
+        _selection(granularity='categorie', region='3')
+    ])
+    assert warmer._prefetch_timers == {}
@@ -0,0 +1,102 @@
+"""
+Tests du générateur de charge (cascade des callbacks, synthèse)
+"""
+import random
+
+import pytest
+from dash import Dash, dcc, html, Input, Output
+
+from src.utils.load_test import (
+    InProcessTransport,
+    Sample,
+    VirtualUser,
+    layout_state,
+    load_app_model,
+    parse_dependencies,
+    percentile,
+    run_level,
+    summarize,
+)
+
+
+def small_app() -> Dash:
+    app = Dash(__name__)
+    app.layout = html.Div([
+        dcc.Dropdown(id='main-indicator-dropdown', options=['ca_total', 'quantite_vendue'], value='ca_total'),
+        dcc.Store(id='data-store'),
+        html.Div(id='main-chart')
+    ])
+
+    @app.callback(Output('main-chart', 'children'), Input('data-store', 'data'))
+    def render(data):
+        return f"graphique {data}"
+
+    @app.callback(Output('data-store', 'data'), Input('main-indicator-dropdown', 'value'))
+    def fetch(indicator):
+        return indicator.upper()
+
+    return app
+
+
+def test_cascade_follows_dependencies():
+    app = small_app()
+    transport = InProcessTransport(app.server)
+    callbacks = parse_dependencies(transport.get('/_dash-dependencies'))
+    state, _ = layout_state(transport.get('/_dash-layout'))
+
+    user = VirtualUser(transport, callbacks, state, [], random.Random(0))
+    assert user.load()
+    # data-store est calculé avant le graphique qui en dépend
+    assert [sample.name for sample in user.samples] == ['data-store.data', 'main-chart.children']
+    assert user.state[('main-chart', 'children')] == "graphique CA_TOTAL"
+
+    assert user.act('indicateur')
+    assert user.state[('main-chart', 'children')] == "graphique QUANTITE_VENDUE"
+    assert [action.name for action in user.actions] == ['chargement', 'indicateur']
+
+
+def test_run_level_reports_requests_and_errors():
+    app = small_app()
+    result = run_level(lambda index: InProcessTransport(app.server), users=2, duration=0.2, think=0.01)
+    assert result['requests']['count'] >= 4
+    assert result['requests']['error_rate'] == 0.0
+    assert set(result['callbacks']) == {'data-store.data', 'main-chart.children'}
+
+
+def test_view_inputs_come_from_the_layout():
+    import app as dashboard
+
+    transport = InProcessTransport(dashboard.app.server)
+    callbacks, state, _ = load_app_model(transport)
+    # Filtres de la vue lus dans la mise en page servie, aucune valeur ajoutée
+    for view_input in dashboard.VIEW_INPUTS:
+        assert (view_input.component_id, view_input.component_property) in state
+    labels = {callback.label for callback in callbacks}
+    assert 'data-store.data' in labels
+    # Composant commenté dans la mise en page : le navigateur ne le déclenche pas
+    assert 'indicator-list.children' not in labels
+
+
+def test_missing_view_input_fails_fast():
+    app = small_app()
+
+    @app.callback(
+        Output('main-chart', 'title'),
+        Input('main-indicator-dropdown', 'value'),
+        Input('date-picker', 'start_date')
+    )
+    def dated(indicator, start_date):
+        return f"{indicator} {start_date}"
+
+    with pytest.raises(ValueError, match='date-picker.start_date'):
+        load_app_model(InProcessTransport(app.server))
+
+
+def test_summary_percentiles():
+    samples = [Sample('x', seconds / 1000, seconds != 100) for seconds in range(1, 101)]
+    stats = summarize(samples, elapsed=10)
+    assert stats['per_second'] == 10
+    assert stats['p50_ms'] == 50
+    assert stats['p99_ms'] == 99
+    assert stats['error_rate'] == 0.01
+    assert percentile([], 95) == 0.0
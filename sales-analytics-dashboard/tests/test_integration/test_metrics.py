@@ -0,0 +1,43 @@
+"""
+Tests des métriques Prometheus et de la route /metrics
+"""
+from src.database.cache import QueryCache
+from src.utils.metrics import MetricsRegistry, MetricFamily
+
+
+def test_histogram_exposition_is_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('latence_seconds', "Latence", ['callback'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, callback='update_table')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE latence_seconds histogram' in lines
+    assert 'latence_seconds_bucket{callback="update_table",le="0.1"} 1' in lines
+    assert 'latence_seconds_bucket{callback="update_table",le="1.0"} 3' in lines
+    assert 'latence_seconds_bucket{callback="update_table",le="+Inf"} 4' in lines
+    assert 'latence_seconds_count{callback="update_table"} 4' in lines
+
+
+def test_failing_collector_does_not_break_exposition():
+    registry = MetricsRegistry()
+    registry.register_collector(lambda: 1 / 0)
+    registry.register_collector(lambda: [MetricFamily('entrees', "Entrées", 'gauge', [({}, 3)])])
+    assert registry.render().splitlines()[-1] == 'entrees 3'
+
+
+def test_cache_hit_ratio_ignores_presence_checks():
+    cache = QueryCache()
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+    assert 'b' not in cache
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+
+def test_metrics_route():
+    import app
+
+    response = app.app.server.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
@@ -0,0 +1,71 @@
+"""
+Tests du profilage à la demande des callbacks
+"""
+import json
+import os
+import time
+
+from flask import Flask, request
+
+from src.utils import profiling
+from src.utils.profiling import RequestProfile, install_profiling, stage
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stage_is_inert_without_profile():
+    with stage('fetch'):
+        pass
+    assert profiling._current_profile.get() is None
+
+
+def test_sampling_profile_writes_folded_stacks_and_breakdown(tmp_path):
+    profile = RequestProfile('update_table', mode='sampling', interval=0.001)
+    token = profiling._current_profile.set(profile)
+    try:
+        with stage('transform'):
+            busy(0.05)
+    finally:
+        profiling._current_profile.reset(token)
+    profile.stop()
+
+    report = json.loads(open(profile.write(str(tmp_path)), encoding='utf-8').read())
+    assert set(report['stages']) == {'transform', 'serialize'}
+    assert report['stages']['transform'] >= 0.05
+    folded = open(tmp_path / report['profile'], encoding='utf-8').read()
+    assert 'busy (test_profiling.py' in folded
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in folded.splitlines())
+
+
+def test_admin_header_triggers_cprofile(tmp_path, monkeypatch):
+    monkeypatch.setitem(profiling.PROFILING_CONFIG, 'token', 'secret')
+    monkeypatch.setitem(profiling.PROFILING_CONFIG, 'mode', 'cprofile')
+    monkeypatch.setitem(profiling.PROFILING_CONFIG, 'folder', str(tmp_path))
+
+    server = Flask(__name__)
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    def update():
+        with stage('render'):
+            busy(0.01)
+        return '{}'
+
+    install_profiling(server, lambda: request.get_json()['output'])
+    client = server.test_client()
+
+    client.post('/_dash-update-component', json={'output': 'main-chart.figure'})
+    client.post('/_dash-update-component', json={'output': 'main-chart.figure'},
+                headers={'X-Dashboard-Profile': 'wrong'})
+    assert os.listdir(tmp_path) == []
+
+    client.post('/_dash-update-component', json={'output': 'main-chart.figure'},
+                headers={'X-Dashboard-Profile': 'secret'})
+    files = sorted(os.listdir(tmp_path))
+    assert [os.path.splitext(name)[1] for name in files] == ['.json', '.pstats']
+    assert files[0].endswith('_main-chart_figure.json')
+    report = json.loads((tmp_path / files[0]).read_text(encoding='utf-8'))
+    assert report['stages']['render'] >= 0.01
@@ -0,0 +1,23 @@
+"""
+Test de non-régression du temps de démarrage (import de app.py)
+"""
+from config.settings import PERFORMANCE_CONFIG
+from src.utils.import_time import measure, total_ms
+
+
+# Chargés à la première utilisation seulement (voir app.DEFERRED_MODULES)
+HEAVY_MODULES = {'pandas', 'numpy', 'sqlalchemy', 'plotly.express', 'src.database.views'}
+
+
+def test_app_import_stays_light_and_within_budget():
+    # Meilleure de deux mesures : la première peut payer le cache disque
+    runs = [measure('app') for _ in range(2)]
+    for entries in runs:
+        assert not HEAVY_MODULES & {entry.module for entry in entries}
+    assert min(total_ms(entries) for entries in runs) <= PERFORMANCE_CONFIG['import_time_budget_ms']
+
+
+def test_deferred_modules_are_importable():
+    import app
+
+    app.preload_modules()
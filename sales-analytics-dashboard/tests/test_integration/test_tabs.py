@@ -0,0 +1,69 @@
+"""
+Tests des onglets : seul l'onglet affiché est calculé, depuis le data-store
+"""
+import random
+
+import pytest
+
+import app as dashboard
+from src.utils.load_test import InProcessTransport, VirtualUser, load_app_model
+from src.visualizations.render_cache import get_render_cache
+
+
+@pytest.fixture
+def user() -> VirtualUser:
+    get_render_cache().clear()
+    transport = InProcessTransport(dashboard.app.server)
+    callbacks, state, tabs = load_app_model(transport)
+    user = VirtualUser(transport, callbacks, state, tabs, random.Random(0))
+    assert user.load()
+    return user
+
+
+def _switch_tab(user: VirtualUser, tab_id: str) -> list:
+    """Change d'onglet ; retourne les callbacks exécutés"""
+    first = len(user.samples)
+    user.tabs = [tab_id]
+    assert user.act('onglet')
+    return [sample.name for sample in user.samples[first:]]
+
+
+def test_only_tab_callbacks_listen_to_tabs(user):
+    listeners = {
+        callback.label for callback in user.callbacks if ('tabs', 'active_tab') in callback.inputs
+    }
+    # Changer d'onglet ne relance ni la requête ni l'aperçu
+    assert listeners == {'main-chart.figure', 'table-container.children'}
+
+
+def test_hidden_table_is_not_built(user):
+    assert user.state[('tabs', 'active_tab')] == 'tab-chart'
+    token = dashboard.data_token(user.state[('data-store', 'data')])
+    assert user.state[('chart-rendered', 'data')] == token
+    # Le tableau (pivot et DataTable) n'a pas été calculé
+    assert user.state.get(('table-rendered', 'data')) is None
+    assert get_render_cache().stats()['entries'] == 2
+
+
+def test_switching_tab_renders_from_data_store(user):
+    data = user.state[('data-store', 'data')]
+    figure = user.state[('main-chart', 'figure')]
+
+    executed = _switch_tab(user, 'tab-table')
+    assert 'data-store.data' not in executed and 'preview-store.data' not in executed
+    assert user.state[('data-store', 'data')] is data
+    assert user.state[('table-rendered', 'data')] == dashboard.data_token(data)
+
+    # Retour au graphique : déjà rendu pour ce data-store, rien n'est renvoyé
+    table = user.state[('table-container', 'children')]
+    _switch_tab(user, 'tab-chart')
+    assert user.state[('main-chart', 'figure')] is figure
+
+    # Nouvelles données pendant que le graphique est affiché : le tableau
+    # masqué n'est recalculé qu'à la réouverture de son onglet
+    assert user.act('indicateur')
+    assert user.state[('table-container', 'children')] is table
+    _switch_tab(user, 'tab-table')
+    assert user.state[('table-rendered', 'data')] == dashboard.data_token(
+        user.state[('data-store', 'data')]
+    )
@@ -0,0 +1,65 @@
+"""
+Tests de l'agrégation parallélisée par partitions
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.aggregator import ParallelAggregator
+
+
+@pytest.fixture(scope='module')
+def aggregator():
+    aggregator = ParallelAggregator(workers=2, min_rows=0)
+    yield aggregator
+    aggregator.close()
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n_rows = 5000
+    data = pd.DataFrame({
+        'periode': np.sort(rng.choice(pd.date_range('2023-01-01', periods=12, freq='MS'), n_rows)),
+        'categorie_principale': rng.choice(['Alimentaire', 'Textile', 'Maison'], n_rows),
+        'region_id': rng.integers(1, 5, n_rows),
+        'montant': rng.uniform(1, 500, n_rows).round(2),
+        'quantite': rng.integers(1, 10, n_rows)
+    })
+    # Valeurs et clés manquantes : ignorées comme par pandas
+    data.loc[rng.choice(n_rows, 50, replace=False), 'montant'] = np.nan
+    data.loc[rng.choice(n_rows, 20, replace=False), 'categorie_principale'] = None
+    return data
+
+
+def test_parallel_path_is_used(aggregator, data):
+    assert aggregator.use_parallel(data, 'sum')
+    assert not aggregator.use_parallel(data, 'median')
+
+
+@pytest.mark.parametrize('aggfunc', ['sum', 'mean', 'count'])
+@pytest.mark.parametrize('value', ['montant', 'quantite'])
+def test_groupby_matches_pandas(aggregator, data, aggfunc, value):
+    by = ['periode', 'categorie_principale']
+    result = aggregator.groupby(data, by, value, aggfunc, partition_column='periode')
+    expected = data.groupby(by)[value].agg(aggfunc).reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=aggfunc != 'count')
+
+
+@pytest.mark.parametrize('aggfunc', ['sum', 'mean', 'count'])
+def test_pivot_table_matches_pandas(aggregator, data, aggfunc):
+    result = aggregator.pivot_table(
+        data, values='montant', index=['categorie_principale', 'region_id'],
+        columns='periode', aggfunc=aggfunc
+    )
+    expected = pd.pivot_table(
+        data, values='montant', index=['categorie_principale', 'region_id'],
+        columns='periode', aggfunc=aggfunc, fill_value=0
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_integer_sums_keep_dtype(aggregator, data):
+    result = aggregator.pivot_table(data, values='quantite', index='region_id', columns='periode')
+    expected = pd.pivot_table(data, values='quantite', index='region_id', columns='periode', aggfunc='sum', fill_value=0)
+    pd.testing.assert_frame_equal(result, expected)
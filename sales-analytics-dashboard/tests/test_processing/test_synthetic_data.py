@@ -0,0 +1,103 @@
+"""
+Tests du générateur de données synthétiques
+"""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.utils.synthetic_data import (
+    COLUMNS,
+    REGIONS,
+    SyntheticSpec,
+    generate,
+    main,
+    parse_rows,
+    write_copy,
+    write_parquet,
+    write_sqlite,
+)
+
+
+SPEC = SyntheticSpec(rows=20000, seed=7, products=300, chunk_rows=6000)
+
+
+def frame(spec: SyntheticSpec = SPEC) -> pd.DataFrame:
+    return pd.concat(generate(spec), ignore_index=True)
+
+
+def test_same_seed_gives_same_rows():
+    pd.testing.assert_frame_equal(frame(), frame())
+    assert not frame(SPEC._replace(seed=8)).equals(frame())
+
+
+def test_rows_columns_and_chunks():
+    chunks = list(generate(SPEC))
+    assert [len(chunk) for chunk in chunks] == [6000, 6000, 6000, 2000]
+    assert all(list(chunk.columns) == COLUMNS for chunk in chunks)
+
+
+def test_rows_are_sorted_by_date_over_the_whole_period():
+    data = frame()
+    assert data['date_vente'].is_monotonic_increasing
+    assert data['date_vente'].min() >= pd.Timestamp('2021-01-01')
+    assert data['date_vente'].max() <= pd.Timestamp('2023-12-31')
+    # Fêtes de fin d'année plus actives que le mois d'août
+    months = data['date_vente'].dt.month.value_counts()
+    assert months[12] > months[8]
+
+
+def test_transactions_have_several_lines():
+    data = frame()
+    transactions = data.groupby('transaction_id')
+    assert transactions['transaction_id'].size().mean() > 1.5
+    # Une transaction : une date et une région
+    assert (transactions['date_vente'].nunique() == 1).all()
+    assert (transactions['region_id'].nunique() == 1).all()
+    assert set(data['region_id']) <= set(REGIONS)
+
+
+def test_products_follow_a_skewed_distribution():
+    data = frame()
+    sales = data['produit_id'].value_counts()
+    assert sales.iloc[:30].sum() > len(data) * 0.4
+    assert (data.groupby('produit_id')['categorie_principale'].nunique() == 1).all()
+    assert (data['cout_achat'] < data['montant_vente']).all()
+    assert (data['quantite'] >= 1).all()
+
+
+def test_parse_rows():
+    assert parse_rows('1M') == 1_000_000
+    assert parse_rows('250k') == 250_000
+    assert parse_rows('1_000') == 1000
+    assert parse_rows('2.5m') == 2_500_000
+
+
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / 'ventes.db')
+    assert write_sqlite(generate(SPEC), path) == SPEC.rows
+    with sqlite3.connect(path) as connection:
+        stored = pd.read_sql("SELECT * FROM ventes ORDER BY rowid", connection)
+    expected = frame().assign(date_vente=lambda df: df['date_vente'].dt.strftime('%Y-%m-%d'))
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'ventes.parquet')
+    assert write_parquet(generate(SPEC), path) == SPEC.rows
+    pd.testing.assert_frame_equal(pd.read_parquet(path), frame(), check_dtype=False)
+
+
+def test_copy_files(tmp_path):
+    assert write_copy(generate(SPEC), str(tmp_path)) == SPEC.rows
+    stored = pd.read_csv(tmp_path / 'ventes.csv', parse_dates=['date_vente'])
+    assert len(stored) == SPEC.rows and list(stored.columns) == COLUMNS
+    script = (tmp_path / 'ventes.sql').read_text(encoding='utf-8')
+    assert "\\copy sales.ventes FROM 'ventes.csv'" in script
+
+
+def test_cli_writes_requested_formats(tmp_path, capsys):
+    assert main(['--rows', '2k', '--products', '50', '--formats', 'sqlite,copy', '--out', str(tmp_path)]) == 0
+    assert (tmp_path / 'ventes.db').exists() and (tmp_path / 'ventes.csv').exists()
+    assert 'sqlite: 2,000 lignes' in capsys.readouterr().out
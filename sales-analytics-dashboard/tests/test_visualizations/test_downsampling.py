@@ -0,0 +1,82 @@
+"""
+Tests de la réduction des séries longues pour l'affichage
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from src.visualizations.charts.downsampling import (
+    display_time_dimension,
+    downsample,
+    lttb_indices,
+    min_max_indices,
+    zoom_range,
+)
+from src.visualizations.charts.stacked_bar import StackedBarChart
+
+
+def _daily(days=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'periode': pd.date_range('2015-01-01', periods=days, freq='D').strftime('%Y-%m-%d'),
+        'valeur': rng.normal(1000, 50, days).round(2)
+    })
+    data.loc[days // 3, 'valeur'] = 10000
+    return data
+
+
+def test_lttb_keeps_endpoints_and_spike():
+    data = _daily()
+    indices = lttb_indices(np.arange(len(data)), data['valeur'].to_numpy(), 200)
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(data) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(data) // 3 in indices
+
+
+def test_min_max_keeps_extremes_within_threshold():
+    data = _daily()
+    values = data['valeur'].to_numpy()
+    indices = min_max_indices(values, 100)
+    assert len(indices) <= 100
+    assert np.argmax(values) in indices and np.argmin(values) in indices
+
+
+def test_downsample_sorts_date_strings_and_passes_short_series():
+    data = _daily().sample(frac=1, random_state=0)
+    reduced = downsample(data, 'periode', 'valeur', max_points=300)
+    assert len(reduced) == 300
+    assert reduced['periode'].is_monotonic_increasing
+    assert reduced['valeur'].max() == 10000
+
+    short = _daily(days=50)
+    assert downsample(short, 'periode', 'valeur', max_points=300) is short
+
+
+def test_display_time_dimension_fits_width_budget():
+    assert display_time_dimension('2021-01-01', '2023-12-31', 'jour', 200) == 'semaine'
+    assert display_time_dimension('2014-01-01', '2023-12-31', 'jour', 200) == 'mois'
+    assert display_time_dimension('2023-03-01', '2023-04-30', 'jour', 200) == 'jour'
+    # Jamais plus fin que le grain demandé
+    assert display_time_dimension('2023-03-01', '2023-04-30', 'mois', 200) == 'mois'
+
+
+def test_zoom_range_variants():
+    assert zoom_range(None) is None
+    assert zoom_range({'xaxis.autorange': True}) is None
+    assert zoom_range({'xaxis.range[0]': 3.5, 'xaxis.range[1]': 7.5}) is None
+    assert zoom_range({
+        'xaxis.range[0]': '2023-04-15 12:00:00', 'xaxis.range[1]': '2023-03-01'
+    }) == (date(2023, 3, 1), date(2023, 4, 15))
+    assert zoom_range({'xaxis.range': ['2023-03-01', '2023-03-31']}) == (
+        date(2023, 3, 1), date(2023, 3, 31)
+    )
+
+
+def test_comparison_line_is_capped():
+    fig = StackedBarChart().add_comparison_line(
+        go.Figure(), _daily(), 'periode', 'valeur', max_points=250
+    )
+    assert len(fig.data[0].x) == 250
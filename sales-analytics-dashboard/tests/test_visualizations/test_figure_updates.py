@@ -0,0 +1,88 @@
+"""
+Tests des mises à jour partielles du graphique principal
+"""
+import json
+
+import numpy as np
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+from src.visualizations.charts.figure_updates import (
+    PayloadStats,
+    build_figure,
+    chart_shape,
+    patch_figure,
+    payload_size,
+)
+
+
+def _data(seed, categories=('A', 'B', 'C'), periods=24):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=periods, freq='MS').strftime('%Y-%m-%d')
+    data = pd.DataFrame(
+        [(date, category) for date in dates for category in categories],
+        columns=['periode', 'categorie']
+    )
+    data['valeur'] = rng.uniform(1000, 5000, len(data)).round(2)
+    return data
+
+
+def _apply(figure, patch):
+    """Applique les opérations Assign d'un Patch à un graphique sérialisé"""
+    for operation in patch.to_plotly_json()['operations']:
+        assert operation['operation'] == 'Assign'
+        *path, last = operation['location']
+        target = figure
+        for key in path:
+            target = target.setdefault(key, {}) if isinstance(target, dict) else target[key]
+        target[last] = operation['params']['value']
+    return figure
+
+
+def _serialized(figure):
+    return json.loads(json.dumps(figure.to_plotly_json(), cls=PlotlyJSONEncoder))
+
+
+def test_same_shape_is_patched_to_full_rebuild():
+    before, after = _data(0), _data(1)
+    assert chart_shape(before) == chart_shape(after)
+
+    patched = _apply(_serialized(build_figure(before)), patch_figure(after, approximate=True))
+    expected = _serialized(build_figure(after, approximate=True))
+    for patched_trace, expected_trace in zip(patched['data'], expected['data']):
+        assert patched_trace['y'] == expected_trace['y']
+        assert patched_trace['text'] == expected_trace['text']
+    assert patched['layout']['title']['text'] == expected['layout']['title']['text']
+
+
+def test_new_category_changes_shape():
+    assert chart_shape(_data(0)) != chart_shape(_data(0, categories=('A', 'B')))
+
+
+def test_patch_is_smaller_than_full_figure():
+    data = _data(0)
+    patch_bytes = payload_size(patch_figure(data))
+    full_bytes = payload_size(build_figure(data))
+    assert patch_bytes < full_bytes
+
+    stats = PayloadStats()
+    stats.record('patch', patch_bytes, full_bytes)
+    summary = stats.summary()
+    assert summary['patch_updates'] == 1
+    assert summary['bytes_saved'] == full_bytes - patch_bytes
+
+
+def test_patch_full_size_is_estimated_from_last_full_update():
+    data = _data(0)
+    shape = chart_shape(data)
+    full_bytes = payload_size(build_figure(data))
+    patch_bytes = payload_size(patch_figure(_data(1)))
+
+    stats = PayloadStats()
+    # Structure jamais envoyée en entier : patch augmenté de la structure
+    assert stats.estimate_full(shape, patch_bytes) > patch_bytes
+    stats.record('full', full_bytes, shape=shape)
+    stats.record('patch', patch_bytes, shape=shape)
+    summary = stats.summary()
+    assert (summary['full_updates'], summary['patch_updates']) == (1, 1)
+    assert summary['bytes_saved'] == full_bytes - patch_bytes
@@ -0,0 +1,106 @@
+"""
+Tests du cache des composants rendus
+"""
+import json
+
+import numpy as np
+import pandas as pd
+from dash import dash_table
+from plotly.io.json import to_json_plotly
+
+from src.visualizations.charts.figure_updates import build_figure
+from src.visualizations.render_cache import (
+    RenderCache,
+    cached_render,
+    data_hash,
+    get_render_cache,
+)
+
+
+def _data(seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=12, freq='MS').strftime('%Y-%m-%d')
+    data = pd.DataFrame(
+        [(date, category) for date in dates for category in ('A', 'B')],
+        columns=['periode', 'categorie']
+    )
+    data['valeur'] = rng.uniform(1000, 5000, len(data)).round(2)
+    return data
+
+
+def test_repeat_view_skips_construction():
+    get_render_cache().clear()
+    data, builds = _data(), []
+
+    def build():
+        builds.append(1)
+        return build_figure(data, barmode='stack', options=['totals'])
+
+    first = cached_render('main_chart', data, build, barmode='stack', options=['totals'])
+    second = cached_render('main_chart', _data(), build, barmode='stack', options=['totals'])
+    assert len(builds) == 1
+    assert first == second == json.loads(to_json_plotly(build()))
+
+    cached_render('main_chart', data, build, barmode='group', options=['totals'])
+    cached_render('main_chart', _data(seed=1), build, barmode='stack', options=['totals'])
+    assert len(builds) == 4
+
+
+def test_table_is_cached_as_component_spec():
+    get_render_cache().clear()
+    table = cached_render(
+        'pivot_table', 'empreinte', lambda: dash_table.DataTable(data=[{'a': 1}])
+    )
+    assert table == {'props': {'data': [{'a': 1}]}, 'type': 'DataTable', 'namespace': 'dash_table'}
+
+
+def test_data_hash_follows_content():
+    assert data_hash(_data()) == data_hash(_data())
+    changed = _data()
+    changed.loc[3, 'valeur'] += 1
+    assert data_hash(changed) != data_hash(_data())
+    assert data_hash(_data().rename(columns={'valeur': 'montant'})) != data_hash(_data())
+    assert data_hash('empreinte') == 'empreinte'
+
+
+def test_size_budget_evicts_least_recently_used():
+    cache = RenderCache(max_size=10)
+    cache.set('a', 'A', 4)
+    cache.set('b', 'B', 4)
+    cache.get('a')
+    cache.set('c', 'C', 4)
+    assert cache.get('b') is None
+    assert cache.get('a') == ('A', 4) and cache.get('c') == ('C', 4)
+    cache.set('d', 'D', 11)
+    assert cache.get('d') is None
+    assert cache.stats()['size'] == 8
+
+
+def test_hit_skips_encoding_and_decoding(monkeypatch):
+    from src.visualizations import render_cache
+
+    get_render_cache().clear()
+    data = _data()
+    first, size = render_cache.render_entry('main_chart', data, lambda: build_figure(data))
+    assert size == len(to_json_plotly(build_figure(data)).encode('utf-8'))
+
+    calls = []
+    encode, decode = render_cache.to_json_plotly, json.loads
+    monkeypatch.setattr(render_cache, 'to_json_plotly', lambda value: calls.append('encode') or encode(value))
+    monkeypatch.setattr(json, 'loads', lambda payload: calls.append('decode') or decode(payload))
+    # Composant décodé renvoyé tel quel : ni encodage ni décodage
+    assert cached_render('main_chart', data, lambda: build_figure(data)) is first
+    assert calls == []
+
+
+def test_disabled_cache_always_builds():
+    cache = get_render_cache()
+    cache.clear()
+    max_size, cache.max_size = cache.max_size, 0
+    builds = []
+    try:
+        for _ in range(2):
+            cached_render('pivot_table', 'empreinte', lambda: builds.append(1) or [1, 2])
+    finally:
+        cache.max_size = max_size
+    assert len(builds) == 2 and len(cache) == 0
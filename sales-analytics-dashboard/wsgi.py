@@ -0,0 +1,61 @@
+"""
+Point d'entrée WSGI de production
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Avec le préchargement (SERVER_PRELOAD), create_app s'exécute une seule fois
+dans le processus maître : les modules différés par app.py, le cache de
+dimensions et le stockage colonnaire sont chargés avant le fork et partagés
+en copie sur écriture par les workers. Chaque worker recrée ensuite ses
+pools de connexions et démarre ses tâches de fond (init_worker, appelée
+par gunicorn.conf.py).
+"""
+from plotly.io.json import to_json_plotly
+
+from config.database import DATABASE_CONFIG
+from config.settings import SERVER_CONFIG
+from src.database.columnar_store import get_columnar_store
+from src.database.connection import init_worker_connections
+from src.database.dimensions import get_dimension_cache
+
+
+def create_app():
+    """
+    Construit l'application et l'état partagé entre les workers
+
+    Returns:
+        Application WSGI (serveur Flask de Dash)
+    """
+    from app import app, preload_modules
+
+    # Modules différés par app.py : importés avant le fork pour être partagés
+    preload_modules()
+    # Import paresseux de l'encodeur JSON de plotly : fait ici, une fois,
+    # plutôt que par plusieurs threads lors des premières requêtes
+    to_json_plotly({})
+
+    if DATABASE_CONFIG['database']:
+        try:
+            get_dimension_cache().ensure_loaded()
+            get_columnar_store(background=False)
+        except Exception as e:
+            # Les workers chargeront les données au premier accès
+            print(f"Préchargement des données impossible: {e}")
+
+    return app.server
+
+
+def init_worker(workers: int = None):
+    """
+    Initialisation d'un worker après le fork
+
+    Args:
+        workers: Nombre de workers se partageant les connexions BD
+    """
+    from app import start_background_tasks
+
+    init_worker_connections(workers or SERVER_CONFIG['workers'])
+    start_background_tasks()
+
+
+application = create_app()
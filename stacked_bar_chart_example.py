@@ -2,7 +2,7 @@
 Module de création de diagrammes à bandes superposées
 """
 import plotly.graph_objects as go
-import plotly.express as px
+from plotly.colors import qualitative
 import pandas as pd
 from typing import List, Optional, Dict
 
@@ -12,7 +12,7 @@ class StackedBarChart:
     
     def __init__(self, color_scheme: str = "Viridis"):
         self.color_scheme = color_scheme
-        self.default_colors = px.colors.qualitative.Set3
+        self.default_colors = qualitative.Set3
     
     def create_monthly_stacked_bar(
         self,
@@ -271,6 +271,9 @@ def quick_stacked_bar(
     """
     Fonction rapide pour créer un graphique empilé simple
     """
+    # plotly.express est long à importer : chargé seulement ici
+    import plotly.express as px
+
     fig = px.bar(
         data,
         x=x,